@@ -38,8 +38,18 @@ from kivy.uix.textinput import TextInput
 from kivy.uix.spinner import Spinner
 from kivy.core.window import Window
 from kivy.metrics import sp
-from kivy.lang import Builder
-Builder.load_file('base.kv')
+
+# True once base.kv is parsed (see load_base_rules)
+_base_rules_loaded = False
+
+def load_base_rules():
+    """ Parse base.kv, the first call only. The rules are needed by
+    every screen but the menu, they are parsed with the first of these
+    screens instead of at import time """
+    global _base_rules_loaded
+    if not _base_rules_loaded:
+        Builder.load_file('base.kv')
+        _base_rules_loaded = True
 
 def add_color(text, color):
     return "[color="+color+"]"+text+"[/color]" 
@@ -0,0 +1,248 @@
+# -*. coding: utf-8 -*-
+# Copyright (c) 2015 CNRS and University of Strasbourg
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+'''
+batchcalculator.py
+==================
+
+Compute the results of a screen for many methods at once, with the same
+validation, results and units as CapillaryCalculator. The entries of
+all the methods are converted to the units of the capillary one key at
+a time (see convertunits.convert_many) and the formulas are evaluated
+by CapillaryBatch in a single vectorized pass.
+
+The methods the vectorized pass does not handle as the application
+does (a value which is not a number, an unknown unit, a division by
+zero, a length to window greater than the capillary length, a null
+compound time) are computed again one by one by CapillaryCalculator,
+so their error message is the one of the application.
+
+Usage example
+-------------
+
+    from batchcalculator import compute_many
+    from storeschema import DEFAULTS
+
+    entries = dict(DEFAULTS)
+    entries['Idiameter'] = {"value": 75.0, "unit": u"µm"}
+    for errcode, errtext, results in compute_many('injection',
+                                                  [DEFAULTS, entries]):
+        print(errcode, errtext, results)
+
+'''
+import numpy as np
+
+from capillarybatch import CapillaryBatch
+from capillarycalculator import (ENTRIES, MBAR_TO_PSI, SECOND_TO_MINUTE,
+                                 METER_TO_CENTIMETER)
+from cetoolbox import compute_entries
+from convertunits import UNITS_BY_DIMENSION, TimeUnits, MolConcentrationUnits
+
+# The factor of a concentration in mmol/L, to multiply by the molecular
+# weight
+MMOL_TO_MOL = MolConcentrationUnits.convert_unit(1.0, u"mmol/L", u"mol/L")
+
+# The electro-osmosis time used by the mobility screen when it is null
+NULL_EOF_TIME = 1000000
+
+def _read_column(entries_list, key, valid):
+    '''Return the values of an entry of every method in the unit of the
+    capillary, the methods which cannot be read are marked as not valid
+    '''
+    attribute, dimension, unit = ENTRIES[key]
+    indexes = UNITS_BY_DIMENSION[dimension].unitList.indexes
+    values = np.empty(len(entries_list))
+    from_units = []
+    for i, entries in enumerate(entries_list):
+        entry = entries.get(key)
+        try:
+            values[i] = float(entry["value"])
+            from_unit = entry["unit"]
+        except (TypeError, ValueError, KeyError):
+            values[i] = 0.0
+            valid[i] = False
+            from_unit = None
+        if key == 'Concentration' and from_unit == u"mmol/L":
+            # converted with the molecular weight by _read_columns
+            from_unit = unit
+        elif from_unit not in indexes:
+            valid[i] = False
+            from_unit = unit
+        from_units.append(from_unit)
+    distinct = set(from_units)
+    if len(distinct) == 1:
+        # usually all the methods use the same unit
+        from_units = distinct.pop()
+    else:
+        from_units = np.array(from_units)
+    return UNITS_BY_DIMENSION[dimension].convert_many(values, from_units, unit)
+
+def _read_columns(entries_list, valid):
+    '''Return the inputs of the capillary of every method by attribute
+    '''
+    columns = {}
+    for key in ENTRIES:
+        columns[ENTRIES[key][0]] = _read_column(entries_list, key, valid)
+    # a concentration in mmol/L is converted with the molecular weight
+    in_mmol = np.array([valid[i] and entries.get('Concentration')["unit"] == u"mmol/L"
+                        for i, entries in enumerate(entries_list)], dtype=bool)
+    columns['concentration'] = np.where(in_mmol,
+                                        columns['molweight'] * (columns['concentration'] * MMOL_TO_MOL),
+                                        columns['concentration'])
+    return columns
+
+def _read_times(entries_list, valid):
+    '''Return the compound times of every method in seconds, all
+    together, and the index of the first time of each method
+    '''
+    times = []
+    units = []
+    starts = [0]
+    for i, entries in enumerate(entries_list):
+        try:
+            timecompounds = entries.get('Timecompounds')
+            values = [float(value) for value in timecompounds["value"]]
+            method_units = list(timecompounds["unit"])
+        except (TypeError, ValueError, KeyError):
+            values, method_units = [], []
+            valid[i] = False
+        if len(values) != len(method_units):
+            values, method_units = [], []
+            valid[i] = False
+        for unit in method_units:
+            if unit not in TimeUnits.unitList.indexes:
+                valid[i] = False
+        if not valid[i]:
+            values, method_units = [], []
+        times += values
+        units += method_units
+        starts.append(len(times))
+    if times:
+        distinct = set(units)
+        units = distinct.pop() if len(distinct) == 1 else np.array(units)
+        times = TimeUnits.convert_many(np.array(times), units, u"s")
+    return np.asarray(times, dtype=np.float64), starts
+
+def _finite(valid, *arrays):
+    '''Mark as not valid the methods with a result which is not finite
+    '''
+    for array in arrays:
+        valid &= np.isfinite(array)
+    return valid
+
+def _injection(columns, outputs, valid):
+    plug = outputs['injection_plug_length']
+    plug_total = ((plug / 10) / columns['total_length']) * 100
+    plug_window = ((plug / 10) / columns['to_window_length']) * 100
+    results = [("Hydrodynamicinjection", np.minimum(outputs['delivered_volume'],
+                                                    outputs['capillary_volume']), "nL"),
+               ("Capillaryvolume", outputs['capillary_volume'], "nL"),
+               ("Capillaryvolumetowin", outputs['to_window_volume'], "nL"),
+               ("Injectionpluglen", plug, "mm"),
+               ("Pluglenpertotallen", np.minimum(plug_total, 100.), "%"),
+               ("Pluglenperlentowin", np.minimum(plug_window, 100.), "%"),
+               ("Injectedanalyteng", outputs['analyte_injected_ng'], "ng"),
+               ("Injectedanalytepmol", outputs['analyte_injected_pmol'], "pmol"),
+               ("Injectionpressure", outputs['injection_pressure'] * MBAR_TO_PSI, "psi/s"),
+               ("Fieldstrength", outputs['field_strength'], "V/cm"),
+               ("Flowrate", outputs['flow_rate_inj'] / SECOND_TO_MINUTE, "nL/min")]
+    _finite(valid, outputs['delivered_volume'], plug_total, plug_window,
+            outputs['time_to_replace_volume'],
+            *[values for key, values, unit in results])
+    # the special warning
+    full = plug_window > 100.
+    return np.where(full, 2, 0), results
+
+def _viscosity(columns, outputs, valid):
+    results = [('Viscosity', outputs['compute_viscosity'], "cp")]
+    _finite(valid, outputs['compute_viscosity'])
+    return np.zeros(len(valid), dtype=int), results
+
+def _conductivity(columns, outputs, valid):
+    results = [('Conductivity', outputs['compute_conductivity'], "S/m")]
+    _finite(valid, outputs['compute_conductivity'])
+    return np.zeros(len(valid), dtype=int), results
+
+def _flow(columns, outputs, valid):
+    results = [("Fieldstrength", outputs['field_strength'], "V/cm"),
+               ("MicroEOF", outputs['micro_eof'], "cm²/V/s"),
+               ("Lengthpermin", outputs['length_per_minute'] * METER_TO_CENTIMETER, "cm"),
+               ("Flowrate", outputs['flow_rate_flow'], "nL/min")]
+    _finite(valid, *[values for key, values, unit in results])
+    return np.zeros(len(valid), dtype=int), results
+
+def _mobility(columns, outputs, valid):
+    results = [("MicroEOF", outputs['micro_eof'], "cm²/V/s")]
+    _finite(valid, outputs['micro_eof'])
+    return np.zeros(len(valid), dtype=int), results
+
+# The results of each screen, computed from the inputs and the outputs
+# of CapillaryBatch, they mark as not valid the methods to compute again
+SCREEN_RESULTS = {
+    'injection': _injection,
+    'viscosity': _viscosity,
+    'conductivity': _conductivity,
+    'flow': _flow,
+    'mobility': _mobility,
+}
+
+# The error message of each error code of the vectorized pass
+ERROR_TEXTS = {0: "", 2: "The capillary is full"}
+
+def compute_many(screen, entries_list):
+    '''Compute the results of a screen for many methods
+    @param screen: the screen name (see cetoolbox.SCREEN_INPUTS)
+    @type screen: str
+    @param entries_list: the store entries of each method, with all
+    the keys of the store
+    @type entries_list: [{str: {str: float, str: unicode}}]
+    @return: for each method, the error code, the error message and the
+    results, as returned by the CapillaryCalculator method of the screen
+    @rtype: [(int, str, [(str, float, str)])]
+    @raise ValueError: unknown screen
+    '''
+    if screen not in SCREEN_RESULTS:
+        raise ValueError("Unknown screen %s" % screen)
+    entries_list = list(entries_list)
+    if not entries_list:
+        return []
+    valid = np.ones(len(entries_list), dtype=bool)
+    columns = _read_columns(entries_list, valid)
+    if screen == 'mobility':
+        times, starts = _read_times(entries_list, valid)
+        columns['electro_osmosis_time'] = np.where(columns['electro_osmosis_time'] == 0,
+                                                   NULL_EOF_TIME,
+                                                   columns['electro_osmosis_time'])
+    outputs = CapillaryBatch(**columns).compute_all()
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        errcodes, results = SCREEN_RESULTS[screen](columns, outputs, valid)
+        valid &= ~(columns['to_window_length'] > columns['total_length'])
+        if screen == 'mobility':
+            methods = np.repeat(np.arange(len(entries_list)), np.diff(starts))
+            lengths = (columns['total_length'] * columns['to_window_length']) / columns['voltage']
+            microep = lengths[methods] / times - outputs['micro_eof'][methods]
+            valid[methods[~np.isfinite(microep) | (times == 0)]] = False
+    results = [(key, values.tolist(), unit) for key, values, unit in results]
+    computed = []
+    for i, entries in enumerate(entries_list):
+        if not valid[i]:
+            computed.append(compute_entries(screen, entries)[1])
+            continue
+        method_results = [(key, values[i], unit) for key, values, unit in results]
+        if screen == 'mobility':
+            method_results.append(("MicroEP", microep[starts[i]:starts[i + 1]].tolist(),
+                                   "cm²/V/s"))
+        errcode = int(errcodes[i])
+        computed.append((errcode, ERROR_TEXTS[errcode], method_results))
+    return computed
@@ -0,0 +1,404 @@
+# -*. coding: utf-8 -*-
+# Copyright (c) 2015 CNRS and University of Strasbourg
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+'''
+benchmark.py
+============
+
+Benchmark suite of CEToolbox. Each benchmark runs on a synthetic
+dataset of methods and the timings are written to a JSON file so
+several runs can be compared:
+
+    python benchmark.py --size 1000 --output bench.json
+    python benchmark.py --only capillary,convert
+
+The store benchmarks (CapillaryManager, save_*_result, create_store)
+need Kivy, they are skipped when Kivy is not installed. They run in a
+temporary directory so the cetoolboxdata.json of the application is
+not modified. The batch benchmark needs NumPy. The history benchmark
+inserts HISTORY_ROWS runs at once in a SQLite run history. The memory
+benchmark measures, with tracemalloc, the memory taken by a method in a
+list of Capillary objects, in a CapillaryRecords and in a
+CapillaryBatch.
+
+'''
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import OrderedDict
+
+from capillary import Capillary, DEPENDENCIES, INPUTS
+from capillarycalculator import CapillaryCalculator
+from capillaryrecords import CapillaryRecords
+from convertunits import UNITS_BY_DIMENSION
+from resultcache import ResultCache, get_result_cache
+from storeschema import DEFAULTS
+
+# The range of the random values of each store key
+RANGES = OrderedDict([
+    ('Capillary', (30.0, 100.0)),
+    ('Towindow', (20.0, 30.0)),
+    ('Idiameter', (10.0, 100.0)),
+    ('Pressure', (0.1, 5.0)),
+    ('Time', (1.0, 60.0)),
+    ('Viscosity', (0.5, 2.0)),
+    ('Concentration', (0.1, 10.0)),
+    ('Molweight', (100.0, 200000.0)),
+    ('Detectiontime', (1.0, 30.0)),
+    ('Voltage', (5000.0, 30000.0)),
+    ('Electriccurrent', (1.0, 100.0)),
+    ('Electroosmosis', (0.5, 10.0)),
+])
+
+# The range of the migration times of the compounds (min)
+TIMECOMPOUND_RANGE = (0.5, 20.0)
+
+# The benchmarks, in the order they are run
+BENCHMARKS = ('import', 'capillary', 'convert', 'calculator', 'batch',
+              'history', 'memory', 'manager', 'save', 'create_store')
+
+# The number of runs inserted at once by the history benchmark
+HISTORY_ROWS = 100000
+
+# The directory of the CEToolbox modules
+PACKAGE_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+def generate_methods(size, seed=0, nbcompounds=10):
+    '''Return size random methods as store entries
+    @param size: the number of methods
+    @type size: int
+    @param seed: the seed of the random generator
+    @type seed: int
+    @param nbcompounds: the number of compounds of each method
+    @type nbcompounds: int
+    @rtype: [{str: {str: float, str: unicode}}]
+    '''
+    rng = random.Random(seed)
+    methods = []
+    for i in range(size):
+        entries = dict(DEFAULTS)
+        for key, (low, high) in RANGES.items():
+            entries[key] = {"value": rng.uniform(low, high),
+                            "unit": DEFAULTS[key]["unit"]}
+        entries['Timecompounds'] = {
+            "value": [rng.uniform(*TIMECOMPOUND_RANGE) for j in range(nbcompounds)],
+            "unit": [u"min"] * nbcompounds}
+        methods.append(entries)
+    return methods
+
+def measure(func, args_list, repeat):
+    '''Call func once per item of args_list, repeat times, and return
+    the best total time and the time per call
+    '''
+    best = None
+    for i in range(repeat):
+        start = time.perf_counter()
+        for args in args_list:
+            func(*args)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return OrderedDict([("calls", len(args_list)),
+                        ("best_total_s", best),
+                        ("per_call_us", 1e6 * best / max(len(args_list), 1))])
+
+def bench_import(methods, repeat):
+    '''Time the import of the Kivy-free modules in a new interpreter
+    '''
+    results = OrderedDict()
+    for module in ('capillary', 'convertunits', 'capillarycalculator'):
+        code = ("import time; start = time.perf_counter(); import %s; "
+                "print(time.perf_counter() - start)" % module)
+        # the modules are imported from the directory of the benchmark,
+        # whatever the current directory
+        timings = [float(subprocess.check_output([sys.executable, '-c', code],
+                                                 cwd=PACKAGE_DIRECTORY))
+                   for i in range(repeat)]
+        results[module] = OrderedDict([("calls", 1),
+                                       ("best_total_s", min(timings)),
+                                       ("per_call_us", 1e6 * min(timings))])
+    return results
+
+def bench_capillary(methods, repeat):
+    '''Time each scalar Capillary method, without the cache
+    '''
+    capillaries = [CapillaryCalculator(entries).capillary for entries in methods]
+    results = OrderedDict()
+    def call(capillary, name):
+        capillary.invalidate()
+        getattr(capillary, name)()
+    for name in sorted(DEPENDENCIES):
+        results[name] = measure(call, [(capillary, name)
+                                       for capillary in capillaries], repeat)
+    results['micro_ep'] = measure(lambda capillary: capillary.micro_ep(60.0),
+                                  [(capillary,) for capillary in capillaries],
+                                  repeat)
+    return results
+
+def bench_convert(methods, repeat):
+    '''Time each convert_unit, from each unit to the first unit
+    '''
+    results = OrderedDict()
+    for dimension, units in sorted(UNITS_BY_DIMENSION.items()):
+        abbrs = sorted(units.unitList.units)
+        args_list = [(entries['Capillary']["value"], abbrs[i % len(abbrs)],
+                      units.unitList.baseUnitAbbr)
+                     for i, entries in enumerate(methods)]
+        results[units.__name__] = measure(units.convert_unit, args_list, repeat)
+    return results
+
+def bench_calculator(methods, repeat):
+    '''Time CapillaryCalculator construction and compute_*_result
+    '''
+    results = OrderedDict()
+    results['__init__'] = measure(CapillaryCalculator,
+                                  [(entries,) for entries in methods], repeat)
+    for name in ('compute_injection_result', 'compute_flow_result',
+                 'compute_vicosity_result', 'compute_conductivy_result',
+                 'compute_mobility_result'):
+        results[name] = measure(lambda entries: getattr(CapillaryCalculator(entries), name)(),
+                                [(entries,) for entries in methods], repeat)
+    # the injections read again from a warm result cache
+    cache = ResultCache(maxsize=len(methods))
+    calculators = [CapillaryCalculator(entries) for entries in methods]
+    for calculator in calculators:
+        calculator.cached_result('injection', cache)
+    results['cached_result_hit'] = measure(lambda calculator: calculator.cached_result('injection', cache),
+                                           [(calculator,) for calculator in calculators], repeat)
+    return results
+
+def bench_batch(methods, repeat):
+    '''Time CapillaryBatch.compute_all on the whole dataset
+    '''
+    from capillarybatch import CapillaryBatch
+    capillaries = [CapillaryCalculator(entries).capillary for entries in methods]
+    batch = CapillaryBatch.from_capillaries(capillaries)
+    results = OrderedDict()
+    results['compute_all'] = measure(batch.compute_all, [()], repeat)
+    results['compute_all']['per_method_us'] = (1e6 * results['compute_all']['best_total_s']
+                                               / max(len(methods), 1))
+    return results
+
+def bench_history(methods, repeat):
+    '''Time the bulk insert of HISTORY_ROWS injection runs in a new
+    run history, and the queries on the indexed columns
+    '''
+    from runhistory import RunHistory, run_row
+    calculators = [CapillaryCalculator(entries) for entries in methods]
+    runs = [run_row('injection', calculator,
+                    *calculator.compute_injection_result())
+            for calculator in calculators]
+    rows = [runs[i % len(runs)] for i in range(HISTORY_ROWS)]
+    diameter = calculators[0].diameter
+    results = OrderedDict()
+    with _StoreDirectory():
+        filenames = ('history%d.db' % i for i in itertools.count())
+        def add_runs():
+            history = RunHistory(next(filenames))
+            with history.bulk_load():
+                history.add_runs(rows)
+            history.close()
+        results['add_runs'] = measure(add_runs, [()], repeat)
+        results['add_runs']['per_run_us'] = (1e6 * results['add_runs']['best_total_s']
+                                             / HISTORY_ROWS)
+        results['add_runs']['runs_per_s'] = (HISTORY_ROWS
+                                             / results['add_runs']['best_total_s'])
+        history = RunHistory('history0.db')
+        results['find'] = measure(lambda: history.find('injection',
+                                                       [('diameter', '=', diameter),
+                                                        ('plug_percent_total', '>', 2.0)]),
+                                  [()], repeat)
+        history.close()
+    return results
+
+def _allocated(build):
+    '''Return the memory allocated by build() and still used by the
+    object it returns, in bytes
+    '''
+    tracemalloc.start()
+    try:
+        obj = build()
+        allocated = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del obj
+    return allocated
+
+def bench_memory(methods, repeat):
+    '''Measure the memory taken by a method in each container of
+    capillaries
+    '''
+    rows = [tuple(getattr(CapillaryCalculator(entries).capillary, name)
+                  for name in INPUTS) for entries in methods]
+    containers = OrderedDict([
+        ('Capillary', lambda: [Capillary(*row) for row in rows]),
+        ('CapillaryRecords', lambda: CapillaryRecords.from_capillaries(
+            Capillary(*row) for row in rows)),
+    ])
+    try:
+        from capillarybatch import CapillaryBatch
+    except ImportError:
+        pass
+    else:
+        containers['CapillaryBatch'] = lambda: CapillaryBatch(*zip(*rows))
+    results = OrderedDict()
+    for name, build in containers.items():
+        allocated = _allocated(build)
+        results[name] = OrderedDict([("methods", len(rows)),
+                                     ("bytes", allocated),
+                                     ("bytes_per_method", float(allocated)
+                                      / max(len(rows), 1))])
+    return results
+
+class _StoreDirectory(object):
+    '''Run the store benchmarks in a temporary directory
+    '''
+    def __enter__(self):
+        self.cwd = os.getcwd()
+        self.path = tempfile.mkdtemp()
+        os.chdir(self.path)
+        return self
+
+    def __exit__(self, *args):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.path)
+
+def _fill_store(store, entries):
+    with store.batch():
+        for key, entry in entries.items():
+            store.put(key, **entry)
+
+def bench_manager(methods, repeat):
+    '''Time CapillaryManager construction from the store
+    '''
+    import store
+    from capillarymanager import CapillaryManager
+    with _StoreDirectory():
+        store.create_store()
+        _fill_store(store.get_store(), methods[0])
+        return OrderedDict([('__init__', measure(CapillaryManager,
+                                                 [()] * len(methods),
+                                                 repeat))])
+
+def bench_save(methods, repeat):
+    '''Time each save_*_result, including the write of the json file.
+    The result cache is emptied before each call, so the results are
+    computed and not read from the cache.
+    '''
+    import store
+    from capillarymanager import CapillaryManager
+    cache = get_result_cache()
+    results = OrderedDict()
+    with _StoreDirectory():
+        store.create_store()
+        for name in ('save_injection_result', 'save_flow_result',
+                     'save_vicosity_result', 'save_conductivy_result',
+                     'save_mobility_result'):
+            def save(entries):
+                cache.invalidate()
+                _fill_store(store.get_store(), entries)
+                getattr(CapillaryManager(), name)()
+            results[name] = measure(save, [(entries,) for entries in methods],
+                                    repeat)
+    return results
+
+def bench_create_store(methods, repeat):
+    '''Time create_store on a missing json file
+    '''
+    import store
+    with _StoreDirectory():
+        def create():
+            if os.path.exists(store.STORE_FILENAME):
+                os.remove(store.STORE_FILENAME)
+            store.create_store()
+        return OrderedDict([('create_store', measure(create, [()] * 10, repeat))])
+
+def run(names, size, repeat, seed=0, nbcompounds=10):
+    '''Run the benchmarks and return the report
+    @param names: the benchmarks to run (see BENCHMARKS)
+    @type names: [str]
+    @param size: the number of synthetic methods
+    @type size: int
+    @param repeat: the number of runs, the best one is kept
+    @type repeat: int
+    @param nbcompounds: the number of compounds of each method
+    @type nbcompounds: int
+    @rtype: OrderedDict
+    '''
+    methods = generate_methods(size, seed, nbcompounds)
+    report = OrderedDict()
+    report['info'] = OrderedDict([("date", time.strftime("%Y-%m-%dT%H:%M:%S")),
+                                  ("python", platform.python_version()),
+                                  ("platform", platform.platform()),
+                                  ("size", size),
+                                  ("repeat", repeat),
+                                  ("seed", seed),
+                                  ("nbcompounds", nbcompounds)])
+    report['skipped'] = OrderedDict()
+    for name in names:
+        try:
+            report[name] = globals()['bench_' + name](methods, repeat)
+        except ImportError as error:
+            report['skipped'][name] = str(error)
+    return report
+
+def main(argv=None):
+    '''Entry point of the benchmark runner
+    '''
+    parser = argparse.ArgumentParser(description='CEToolbox benchmarks')
+    parser.add_argument('--size', type=int, default=1000,
+                        help='the number of synthetic methods')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='the number of runs, the best one is kept')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='the seed of the synthetic methods')
+    parser.add_argument('--compounds', type=int, default=10,
+                        help='the number of compounds of each method')
+    parser.add_argument('--only', default=','.join(BENCHMARKS),
+                        help='comma separated list of benchmarks among %s'
+                        % ', '.join(BENCHMARKS))
+    parser.add_argument('--output', default='benchmark.json',
+                        help='the JSON file of the results')
+    args = parser.parse_args(argv)
+    names = [name for name in args.only.split(',') if name]
+    for name in names:
+        if name not in BENCHMARKS:
+            parser.error('unknown benchmark %s' % name)
+    report = run(names, args.size, args.repeat, args.seed, args.compounds)
+    with open(args.output, 'w') as fd:
+        json.dump(report, fd, indent=2)
+    for name in names:
+        if name in report['skipped']:
+            print("%-14s skipped (%s)" % (name, report['skipped'][name]))
+            continue
+        for item, result in report[name].items():
+            if 'bytes_per_method' in result:
+                print("%-14s %-28s %12.2f bytes/method"
+                      % (name, item, result['bytes_per_method']))
+                continue
+            print("%-14s %-28s %12.2f us/call" % (name, item,
+                                                 result['per_call_us']))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
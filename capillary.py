@@ -29,14 +29,148 @@ The following example permits to compute the volume of a capillary:
     my_capillary = capillary.Capillary()
     my_capillary.capillary_volume()
 
+The derived values are cached. When an attribute of the capillary is
+changed, only the cached values depending on this attribute are
+computed again:
+
+    my_capillary.voltage = 25000.0
+    my_capillary.capillary_volume()  # still cached
+    my_capillary.field_strength()    # computed again
+
+The attributes are slots and the cache is created with the first
+derived value, so a capillary takes little memory. Many capillaries are
+better kept in a CapillaryRecords (see capillaryrecords.py).
+
 '''
 
+import functools
 import math
 
-class Capillary:
+# The inputs of a capillary, in the order of the constructor
+INPUTS = ('total_length', 'to_window_length', 'diameter', 'pressure',
+          'duration', 'viscosity', 'molweight', 'concentration',
+          'voltage', 'electric_current', 'detection_time',
+          'electro_osmosis_time')
+
+# The attributes and the derived values each derived value depends on
+DEPENDENCIES = {
+    'delivered_volume': ('pressure', 'diameter', 'duration', 'viscosity',
+                         'total_length'),
+    'capillary_volume': ('total_length', 'diameter'),
+    'to_window_volume': ('to_window_length', 'diameter'),
+    'injection_plug_length': ('pressure', 'diameter', 'duration',
+                              'viscosity', 'total_length'),
+    'time_to_replace_volume': ('viscosity', 'total_length', 'diameter',
+                               'pressure'),
+    'compute_viscosity': ('pressure', 'diameter', 'detection_time',
+                          'total_length', 'to_window_length'),
+    'compute_conductivity': ('total_length', 'electric_current', 'diameter',
+                             'voltage'),
+    'field_strength': ('voltage', 'total_length'),
+    'micro_eof': ('total_length', 'to_window_length',
+                  'electro_osmosis_time', 'voltage'),
+    'length_per_minute': ('micro_eof', 'field_strength'),
+    'flow_rate_inj': ('capillary_volume', 'time_to_replace_volume'),
+    'flow_rate_flow': ('diameter', 'length_per_minute'),
+    'injection_pressure': ('pressure', 'duration'),
+    'analyte_injected_ng': ('concentration', 'delivered_volume'),
+    'analyte_injected_pmol': ('analyte_injected_ng', 'molweight'),
+}
+
+# Each derived value is a power law of the attributes:
+# constant * attribute1**exponent1 * attribute2**exponent2 * ...
+# The formulas can then be inverted or derived without the methods
+# (see goalseek.py).
+POWER_LAWS = {
+    'delivered_volume': (math.pi / (128 * 10**5),
+                         (('pressure', 1), ('diameter', 4), ('duration', 1),
+                          ('viscosity', -1), ('total_length', -1))),
+    'capillary_volume': (math.pi / 400,
+                         (('total_length', 1), ('diameter', 2))),
+    'to_window_volume': (math.pi / 400,
+                         (('to_window_length', 1), ('diameter', 2))),
+    'injection_plug_length': (1.0 / 3200,
+                              (('pressure', 1), ('diameter', 2),
+                               ('duration', 1), ('viscosity', -1),
+                               ('total_length', -1))),
+    'time_to_replace_volume': (32 * 10**3,
+                               (('viscosity', 1), ('total_length', 2),
+                                ('diameter', -2), ('pressure', -1))),
+    'compute_viscosity': (1.0 / (32 * 10**3),
+                          (('pressure', 1), ('diameter', 2),
+                           ('detection_time', 1), ('total_length', -1),
+                           ('to_window_length', -1))),
+    'compute_conductivity': (4 * 10**4 / math.pi,
+                             (('total_length', 1), ('electric_current', 1),
+                              ('diameter', -2), ('voltage', -1))),
+    'field_strength': (1.0, (('voltage', 1), ('total_length', -1))),
+    'micro_eof': (1.0, (('total_length', 1), ('to_window_length', 1),
+                        ('electro_osmosis_time', -1), ('voltage', -1))),
+    'length_per_minute': (0.6, (('to_window_length', 1),
+                                ('electro_osmosis_time', -1))),
+    'flow_rate_inj': (math.pi / (400 * 32 * 10**3),
+                      (('total_length', -1), ('diameter', 4),
+                       ('viscosity', -1), ('pressure', 1))),
+    'flow_rate_flow': (0.15 * math.pi,
+                       (('diameter', 2), ('to_window_length', 1),
+                        ('electro_osmosis_time', -1))),
+    'injection_pressure': (1.0, (('pressure', 1), ('duration', 1))),
+    'analyte_injected_ng': (math.pi / (128 * 10**5),
+                            (('concentration', 1), ('pressure', 1),
+                             ('diameter', 4), ('duration', 1),
+                             ('viscosity', -1), ('total_length', -1))),
+    'analyte_injected_pmol': (1000 * math.pi / (128 * 10**5),
+                              (('concentration', 1), ('pressure', 1),
+                               ('diameter', 4), ('duration', 1),
+                               ('viscosity', -1), ('total_length', -1),
+                               ('molweight', -1))),
+}
+
+def _affected_values(dependencies):
+    '''Return, for each attribute, all the derived values depending
+    directly or not on it
+    '''
+    affected = {}
+    def add(name, derived):
+        if derived in affected.setdefault(name, set()):
+            return
+        affected[name].add(derived)
+        for other, needs in dependencies.items():
+            if derived in needs:
+                add(name, other)
+    for derived, needs in dependencies.items():
+        for name in needs:
+            add(name, derived)
+    return dict((name, frozenset(values))
+                for name, values in affected.items()
+                if name not in dependencies)
+
+# The derived values to compute again when an attribute changes
+AFFECTED_VALUES = _affected_values(DEPENDENCIES)
+
+def cached(method):
+    '''Decorator caching the value returned by a method without argument
+    until an attribute it depends on changes (see DEPENDENCIES)
+    '''
+    name = method.__name__
+    @functools.wraps(method)
+    def cached_method(self):
+        cache = self._cache
+        if cache is None:
+            cache = self._cache = {}
+        try:
+            return cache[name]
+        except KeyError:
+            value = cache[name] = method(self)
+            return value
+    return cached_method
+
+class Capillary(object):
     '''The Capillary class permits to compute capillary parameters
        during a Capillary Electrophoresis experiment.
     '''
+    __slots__ = INPUTS + ('_cache',)
+
     def __init__(self, total_length = 100.0, to_window_length = 90.0,
                  diameter = 30.0, pressure = 30.0, duration = 21.0,
                  viscosity = 1.0,
@@ -45,6 +179,9 @@ class Capillary:
                  detection_time = 3815.0, electro_osmosis_time = 100):
         '''Initialize the capillary
         '''
+        # The derived values already computed, None until the first one
+        self._cache = None
+
         # The length of the capillary (centimeter)
         self.total_length = total_length
 
@@ -81,88 +218,119 @@ class Capillary:
         # The electro-osmosis time (s)
         self.electro_osmosis_time = electro_osmosis_time
 
+    def __setattr__(self, name, value):
+        '''Set the attribute and forget the derived values depending
+        on it
+        '''
+        if name in AFFECTED_VALUES and getattr(self, name, None) != value:
+            cache = self._cache
+            if cache:
+                for derived in AFFECTED_VALUES[name]:
+                    cache.pop(derived, None)
+        object.__setattr__(self, name, value)
+
+    def invalidate(self):
+        '''Forget all the derived values
+        '''
+        self._cache = None
+
+    @cached
     def delivered_volume(self):
         '''Return the volume delivered during the injection
         '''
         delivered_volume = (self.pressure * self.diameter**4 * math.pi * self.duration) / (128 * self.viscosity * self.total_length * 10**5)
         return delivered_volume
 
+    @cached
     def capillary_volume(self):
         '''Return the volume of the capillary
         '''
         capillary_volume = (self.total_length * math.pi * (self.diameter / 2)**2) / 100
         return capillary_volume
 
+    @cached
     def to_window_volume(self):
         '''Return the volume to window
         '''
         to_window_volume = (self.to_window_length * math.pi * (self.diameter / 2)**2) / 100
         return to_window_volume
 
+    @cached
     def injection_plug_length(self):
         '''Return the plug_length used in the injection
         '''
         injection_plug_length = (self.pressure * self.diameter**2 * self.duration) / (32 * self.viscosity * self.total_length * 10**2)
         return injection_plug_length
 
+    @cached
     def time_to_replace_volume(self):
         '''Return the time required to replace the volume
         '''
         time_to_replace_volume = (32 * self.viscosity * self.total_length**2) / (self.diameter**2 * 10**-3 * self.pressure)
         return time_to_replace_volume
 
+    @cached
     def compute_viscosity(self):
         '''Return an assessment of the viscosity
         '''
         computed_viscosity = (self.pressure * self.diameter**2 *self.detection_time) / (32 * self.total_length * self.to_window_length * 10**3)
         return computed_viscosity
 
+    @cached
     def compute_conductivity(self):
         '''Return the conductivity
         '''
         computed_conductivity = (4 * self.total_length * 10**4 * self.electric_current) / (math.pi * self.diameter**2 * self.voltage)
         return computed_conductivity
 
+    @cached
     def field_strength(self):
         '''Return the field strength
         '''
         field_strength = self.voltage / self.total_length
         return field_strength
 
+    @cached
     def micro_eof(self):
         '''Return the Micro EOF
         '''
         micro_eof = (self.total_length * self.to_window_length) / (self.electro_osmosis_time * self.voltage)
         return micro_eof
 
+    @cached
     def length_per_minute(self):
         '''Return the length per minute
         '''
         length_per_minute = 60 * self.micro_eof() * self.field_strength() * 10**-2
         return length_per_minute
 
+    @cached
     def flow_rate_inj(self):
         '''Return the flow rate for the flow rate screen
         '''
         flow_rate = self.capillary_volume()/self.time_to_replace_volume()
         return flow_rate
 
+    @cached
     def flow_rate_flow(self):
         '''Return the flow rate per minute
         '''
         flow_rate = (math.pi * self.diameter**2 * self.length_per_minute()) / 4
         return flow_rate
 
+    @cached
     def injection_pressure(self):
         '''Return the injection pressure per second
         '''
         return self.pressure*self.duration
 
+    @cached
     def analyte_injected_ng(self):
         '''Return the analyte injected in ng
         '''
         return self.concentration * self.delivered_volume()
 
+    @cached
     def analyte_injected_pmol(self):
         '''Return the analyte injected in pmol
         '''
@@ -175,3 +343,10 @@ class Capillary:
     def micro_ep(self, time):
         '''Return the micro_ep time in second'''
         return self.micro_app(time) - self.micro_eof()
+
+    def micro_ep_many(self, times):
+        '''Return the micro_ep of each time in second, the terms which
+        do not depend on the time are computed once'''
+        lengths = (self.total_length * self.to_window_length) / self.voltage
+        microeof = self.micro_eof()
+        return [lengths / time - microeof for time in times]
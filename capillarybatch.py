@@ -0,0 +1,238 @@
+# -*. coding: utf-8 -*-
+# Copyright (c) 2015 CNRS and University of Strasbourg
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+
+'''
+CapillaryBatch
+==============
+
+The CapillaryBatch class computes the Capillary formulas on arrays of
+capillaries at once. Every input is stored as a NumPy array (struct of
+arrays) and every output is returned as an array, so a whole catalogue
+of methods is evaluated in one vectorized pass instead of one Capillary
+object per method.
+
+The inputs use the same units as the Capillary class (cm, µm, mbar, s,
+cp, g/L, g/mol, V and µA). A division by zero does not raise
+ZeroDivisionError as in the scalar class, the related rows get inf or
+nan instead.
+
+Usage example
+-------------
+
+The following example computes all the outputs for three diameters:
+
+    import capillarybatch
+
+    batch = capillarybatch.CapillaryBatch(diameter=[25.0, 50.0, 75.0])
+    results = batch.compute_all()
+    results["delivered_volume"]
+
+'''
+
+import math
+
+import numpy as np
+
+from capillary import INPUTS
+
+# The outputs returned by CapillaryBatch.compute_all
+OUTPUTS = ('delivered_volume', 'capillary_volume', 'to_window_volume',
+           'injection_plug_length', 'time_to_replace_volume',
+           'compute_viscosity', 'compute_conductivity', 'field_strength',
+           'micro_eof', 'length_per_minute', 'flow_rate_inj',
+           'flow_rate_flow', 'injection_pressure', 'analyte_injected_ng',
+           'analyte_injected_pmol')
+
+class CapillaryBatch(object):
+    '''The CapillaryBatch class permits to compute capillary parameters
+       for many Capillary Electrophoresis experiments at once.
+    '''
+    def __init__(self, total_length = 100.0, to_window_length = 90.0,
+                 diameter = 30.0, pressure = 30.0, duration = 21.0,
+                 viscosity = 1.0,
+                 molweight = 150000.0, concentration = 21.0,
+                 voltage = 30000.0, electric_current = 4.0,
+                 detection_time = 3815.0, electro_osmosis_time = 100):
+        '''Initialize the batch, each value can be a scalar or an array.
+        All the arrays are broadcasted to the same shape.
+        '''
+        arrays = np.broadcast_arrays(*[np.asarray(value, dtype=np.float64)
+                                       for value in (total_length,
+                                                     to_window_length,
+                                                     diameter, pressure,
+                                                     duration, viscosity,
+                                                     molweight,
+                                                     concentration,
+                                                     voltage,
+                                                     electric_current,
+                                                     detection_time,
+                                                     electro_osmosis_time)])
+        for name, array in zip(INPUTS, arrays):
+            setattr(self, name, array)
+
+    @classmethod
+    def from_capillaries(cls, capillaries):
+        '''Build a batch from a sequence of Capillary objects
+        @param capillaries: the capillaries to gather
+        @type capillaries: [Capillary]
+        @return: the batch
+        @rtype: CapillaryBatch
+        '''
+        capillaries = list(capillaries)
+        columns = {}
+        for name in INPUTS:
+            columns[name] = np.fromiter((getattr(capillary, name)
+                                         for capillary in capillaries),
+                                        dtype=np.float64,
+                                        count=len(capillaries))
+        return cls(**columns)
+
+    def __len__(self):
+        return self.total_length.size
+
+    @property
+    def shape(self):
+        '''The shape shared by all the inputs'''
+        return self.total_length.shape
+
+    def delivered_volume(self):
+        '''Return the volume delivered during the injection
+        '''
+        return (self.pressure * self.diameter**4 * math.pi * self.duration) / (128 * self.viscosity * self.total_length * 10**5)
+
+    def capillary_volume(self):
+        '''Return the volume of the capillary
+        '''
+        return (self.total_length * math.pi * (self.diameter / 2)**2) / 100
+
+    def to_window_volume(self):
+        '''Return the volume to window
+        '''
+        return (self.to_window_length * math.pi * (self.diameter / 2)**2) / 100
+
+    def injection_plug_length(self):
+        '''Return the plug_length used in the injection
+        '''
+        return (self.pressure * self.diameter**2 * self.duration) / (32 * self.viscosity * self.total_length * 10**2)
+
+    def time_to_replace_volume(self):
+        '''Return the time required to replace the volume
+        '''
+        return (32 * self.viscosity * self.total_length**2) / (self.diameter**2 * 10**-3 * self.pressure)
+
+    def compute_viscosity(self):
+        '''Return an assessment of the viscosity
+        '''
+        return (self.pressure * self.diameter**2 *self.detection_time) / (32 * self.total_length * self.to_window_length * 10**3)
+
+    def compute_conductivity(self):
+        '''Return the conductivity
+        '''
+        return (4 * self.total_length * 10**4 * self.electric_current) / (math.pi * self.diameter**2 * self.voltage)
+
+    def field_strength(self):
+        '''Return the field strength
+        '''
+        return self.voltage / self.total_length
+
+    def micro_eof(self):
+        '''Return the Micro EOF
+        '''
+        return (self.total_length * self.to_window_length) / (self.electro_osmosis_time * self.voltage)
+
+    def length_per_minute(self):
+        '''Return the length per minute
+        '''
+        return 60 * self.micro_eof() * self.field_strength() * 10**-2
+
+    def flow_rate_inj(self):
+        '''Return the flow rate for the flow rate screen
+        '''
+        return self.capillary_volume()/self.time_to_replace_volume()
+
+    def flow_rate_flow(self):
+        '''Return the flow rate per minute
+        '''
+        return (math.pi * self.diameter**2 * self.length_per_minute()) / 4
+
+    def injection_pressure(self):
+        '''Return the injection pressure per second
+        '''
+        return self.pressure*self.duration
+
+    def analyte_injected_ng(self):
+        '''Return the analyte injected in ng
+        '''
+        return self.concentration * self.delivered_volume()
+
+    def analyte_injected_pmol(self):
+        '''Return the analyte injected in pmol
+        '''
+        return (self.analyte_injected_ng()/self.molweight)*1000
+
+    def micro_app(self, time):
+        '''Return the micro_app time in second'''
+        return (self.total_length * self.to_window_length) / (np.asarray(time, dtype=np.float64) * self.voltage)
+
+    def micro_ep(self, time):
+        '''Return the micro_ep time in second'''
+        return self.micro_app(time) - self.micro_eof()
+
+    def compute_all(self, time=None):
+        '''Compute all the outputs in one pass. The intermediate values
+        shared by several formulas are computed only once.
+        @param time: the migration time of a compound (s), if given
+        micro_app and micro_ep are computed too
+        @type time: float or array
+        @return: the outputs by name
+        @rtype: {str: array}
+        '''
+        with np.errstate(divide='ignore', invalid='ignore'):
+            diameter2 = self.diameter**2
+            section = math.pi * diameter2 / 4
+            length_product = self.total_length * self.to_window_length
+            viscosity_length = self.viscosity * self.total_length
+            injection_pressure = self.pressure * self.duration
+
+            delivered_volume = (injection_pressure * diameter2**2 * math.pi) / (128 * viscosity_length * 10**5)
+            capillary_volume = self.total_length * section / 100
+            time_to_replace_volume = (32 * viscosity_length * self.total_length) / (diameter2 * 10**-3 * self.pressure)
+            field_strength = self.voltage / self.total_length
+            micro_eof = length_product / (self.electro_osmosis_time * self.voltage)
+            length_per_minute = 60 * micro_eof * field_strength * 10**-2
+            analyte_injected_ng = self.concentration * delivered_volume
+
+            results = {
+                'delivered_volume': delivered_volume,
+                'capillary_volume': capillary_volume,
+                'to_window_volume': self.to_window_length * section / 100,
+                'injection_plug_length': (injection_pressure * diameter2) / (32 * viscosity_length * 10**2),
+                'time_to_replace_volume': time_to_replace_volume,
+                'compute_viscosity': (self.pressure * diameter2 * self.detection_time) / (32 * length_product * 10**3),
+                'compute_conductivity': (4 * self.total_length * 10**4 * self.electric_current) / (math.pi * diameter2 * self.voltage),
+                'field_strength': field_strength,
+                'micro_eof': micro_eof,
+                'length_per_minute': length_per_minute,
+                'flow_rate_inj': capillary_volume / time_to_replace_volume,
+                'flow_rate_flow': section * length_per_minute,
+                'injection_pressure': injection_pressure,
+                'analyte_injected_ng': analyte_injected_ng,
+                'analyte_injected_pmol': (analyte_injected_ng / self.molweight) * 1000,
+            }
+            if time is not None:
+                micro_app = length_product / (np.asarray(time, dtype=np.float64) * self.voltage)
+                results['micro_app'] = micro_app
+                results['micro_ep'] = micro_app - micro_eof
+        return results
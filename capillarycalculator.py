@@ -0,0 +1,479 @@
+# -*. coding: utf-8 -*-
+# Copyright (c) 2015 CNRS and University of Strasbourg
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+
+'''
+CapillaryCalculator
+===================
+
+The CapillaryCalculator class converts the values entered by the user
+to the units of the capillary, once, when they are read (see
+quantity.py), checks them and computes the results of each screen. A
+unit of the wrong dimension raises UnitError.
+
+The values are read from any object with a get method returning the
+{"value": ..., "unit": ...} dictionnaries of the store, for instance a
+dictionnary. The Kivy application uses it through CapillaryManager,
+which reads and writes the store.
+
+Usage example
+-------------
+
+    from capillarycalculator import CapillaryCalculator
+    from storeschema import DEFAULTS
+
+    calculator = CapillaryCalculator(DEFAULTS)
+    errcode, errtext, results = calculator.compute_injection_result()
+
+cached_result returns the result from the shared result cache (see
+resultcache.py) when the same inputs were computed already:
+
+    errcode, errtext, results = calculator.cached_result('injection')
+
+'''
+# System import
+import math
+from operator import attrgetter
+
+# Project import
+from capillary import Capillary
+from convertunits import LengthUnits, PressureUnits, TimeUnits
+from quantity import Quantity
+from resultcache import canonical, get_result_cache
+
+# The attribute of the capillary set from each entry of the store, the
+# dimension of the entry and the unit of the capillary the value is
+# normalized to when it is read (see quantity.py). A concentration in
+# mmol/L is converted with the molecular weight.
+ENTRIES = {
+    'Capillary': ('total_length', 'length', u"cm"),
+    'Towindow': ('to_window_length', 'length', u"cm"),
+    'Idiameter': ('diameter', 'length', u"µm"),
+    'Pressure': ('pressure', 'pressure', u"mbar"),
+    'Time': ('duration', 'time', u"s"),
+    'Viscosity': ('viscosity', 'viscosity', u"cp"),
+    'Molweight': ('molweight', 'molweight', u"g/mol"),
+    'Concentration': ('concentration', 'concentration', u"g/L"),
+    'Voltage': ('voltage', 'voltage', u"V"),
+    'Electriccurrent': ('electric_current', 'current', u"µA"),
+    'Detectiontime': ('detection_time', 'time', u"s"),
+    'Electroosmosis': ('electro_osmosis_time', 'time', u"s"),
+}
+
+# The factors from the units of the capillary to the units of some
+# results, computed once
+MBAR_TO_PSI = PressureUnits.convert_unit(1, u"mbar", u"psi")
+SECOND_TO_MINUTE = TimeUnits.convert_unit(1, u"s", u"min")
+METER_TO_CENTIMETER = LengthUnits.convert_unit(1, u"m", u"cm")
+
+# The method computing the results of each calculation
+CALCULATION_METHODS = {
+    'injection': 'compute_injection_result',
+    'viscosity': 'compute_vicosity_result',
+    'conductivity': 'compute_conductivy_result',
+    'flow': 'compute_flow_result',
+    'mobility': 'compute_mobility_result',
+}
+
+# The attributes the results of each calculation depend on, the
+# mobility depends on the compound times too
+CALCULATION_INPUTS = {
+    'injection': ('total_length', 'to_window_length', 'diameter', 'pressure',
+                  'duration', 'viscosity', 'molweight', 'concentration',
+                  'voltage'),
+    'viscosity': ('total_length', 'to_window_length', 'diameter', 'pressure',
+                  'detection_time'),
+    'conductivity': ('total_length', 'to_window_length', 'diameter',
+                     'voltage', 'electric_current'),
+    'flow': ('total_length', 'to_window_length', 'diameter', 'voltage',
+             'electro_osmosis_time'),
+    'mobility': ('total_length', 'to_window_length', 'voltage',
+                 'electro_osmosis_time'),
+}
+
+_INPUT_GETTERS = dict((calculation, attrgetter(*attributes))
+                      for calculation, attributes in CALCULATION_INPUTS.items())
+
+class CapillaryCalculator(object):
+    '''CapillaryCalculator class
+    '''
+    def __init__(self, store):
+        '''Get all needed values from the store
+        @param store: where to read the values
+        @type store: JsonStore or {str: {str: float, str: unicode}}
+        '''
+        self.store = store
+
+        # The length of the capillary (centimeter)
+        self.total_length = self.read_entry('Capillary')
+
+        # The window length (centimeter)
+        self.to_window_length = self.read_entry('Towindow')
+
+        # The capillary inside diameter (micrometer)
+        self.diameter = self.read_entry('Idiameter')
+
+        # The pressure drop across the capillary (mbar)
+        self.pressure = self.read_entry('Pressure')
+
+        # The time the pressure is applied (second)
+        self.duration = self.read_entry('Time')
+
+        # The buffer viscosity (cp)
+        self.viscosity = self.read_entry('Viscosity')
+
+        # The molecular weight (g/mol)
+        self.molweight = self.read_entry('Molweight')
+
+        # Analyte concentration (g/L)
+        self.concentration = self.read_entry('Concentration')
+
+        # The voltage applied to the capillary (volt)
+        self.voltage = self.read_entry('Voltage')
+
+        # The current applied to the capillary (microampere)
+        self.electric_current = self.read_entry('Electriccurrent')
+
+        # The detection time (s)
+        self.detection_time = self.read_entry('Detectiontime')
+
+        # The electro-osmosis time (s)
+        self.electro_osmosis_time = self.read_entry('Electroosmosis')
+
+        self.capillary = Capillary(self.total_length, self.to_window_length,
+                                   self.diameter, self.pressure,
+                                   self.duration, self.viscosity, self.molweight,
+                                   self.concentration, self.voltage,
+                                   self.electric_current,
+                                   self.detection_time,
+                                   self.electro_osmosis_time)
+
+    def read_quantity(self, key):
+        '''Return the value of an entry of the store normalized to the
+        unit of the capillary (see ENTRIES)
+        @param key: the key of the entry
+        @type key: str
+        @rtype: Quantity
+        @raise UnitError: the unit is unknown or of another dimension
+        '''
+        entry = self.store.get(key)
+        attribute, dimension, unit = ENTRIES[key]
+        if key == 'Concentration' and entry["unit"] == u"mmol/L":
+            concentration = Quantity.from_entry(entry, 'molconcentration', u"mol/L")
+            return Quantity(self.molweight * concentration.magnitude, unit)
+        return Quantity.from_entry(entry, dimension, unit)
+
+    def read_entry(self, key):
+        '''Return the value of an entry of the store converted to the
+        unit of the capillary (see ENTRIES)
+        @param key: the key of the entry
+        @type key: str
+        @rtype: float
+        @raise UnitError: the unit is unknown or of another dimension
+        '''
+        return self.read_quantity(key).magnitude
+
+    def set_entry(self, key):
+        '''Read again an entry of the store which changed. Only the
+        results of the capillary depending on it are computed again.
+        @param key: the key of the entry
+        @type key: str
+        '''
+        attribute = ENTRIES[key][0]
+        value = self.read_entry(key)
+        setattr(self, attribute, value)
+        setattr(self.capillary, attribute, value)
+        if key == 'Molweight':
+            #a concentration in mmol/L depends on the molecular weight
+            self.set_entry('Concentration')
+
+    def compound_times(self):
+        '''Return the migration time of each compound of the
+        Timecompounds entry in second
+        @rtype: [float]
+        @raise UnitError: a unit is not a unit of time
+        '''
+        return Quantity.from_entry(self.store.get('Timecompounds'), 'time',
+                                   u"s").magnitude
+
+    def cache_key(self, calculation):
+        '''Return the key of the result of a calculation in the result
+        cache: the name of the calculation and its inputs in the units
+        of the capillary, rounded (see resultcache.canonical)
+        @param calculation: the name of the calculation (see
+        CALCULATION_METHODS)
+        @type calculation: str
+        @rtype: tuple
+        '''
+        key = (calculation, canonical(_INPUT_GETTERS[calculation](self)))
+        if calculation == 'mobility':
+            key += (canonical(self.compound_times()),)
+        return key
+
+    def cached_result(self, calculation, cache=None):
+        '''Return the result of a calculation, from the result cache if
+        the same inputs were computed already
+        @param calculation: the name of the calculation (see
+        CALCULATION_METHODS)
+        @type calculation: str
+        @param cache: the cache, the shared one by default
+        @type cache: ResultCache
+        @return: see compute_vicosity_result
+        '''
+        if cache is None:
+            cache = get_result_cache()
+        key = self.cache_key(calculation)
+        result = cache.get(key)
+        if result is None:
+            result = getattr(self, CALCULATION_METHODS[calculation])()
+            cache.put(key, result)
+        return result
+
+    def delivered_volume(self):
+        '''Return the volume delivered during the injection
+        '''
+        return self.capillary.delivered_volume()
+
+    def capillary_volume(self):
+        '''Return the volume of the capillary
+        '''
+        return self.capillary.capillary_volume()
+
+    def to_window_volume(self):
+        '''Return the volume to window
+        '''
+        return self.capillary.to_window_volume()
+
+    def injection_plug_length(self):
+        '''Return the plug_length used in the injection
+        '''
+        return self.capillary.injection_plug_length()
+
+    def time_to_replace_volume(self):
+        '''Return the time required to replace the volume
+        '''
+        return self.capillary.time_to_replace_volume()
+
+    def compute_viscosity(self):
+        '''Return an assessment of the viscosity
+        '''
+        return self.capillary.compute_viscosity()
+
+    def compute_conductivity(self):
+        '''Return the conductivity
+        '''
+        return self.capillary.compute_conductivity()
+
+    def field_strength(self):
+        '''Return the field strength
+        '''
+        return self.capillary.field_strength()
+
+    def micro_eof(self):
+        '''Return the Micro EOF
+        '''
+        return self.capillary.micro_eof()
+
+    def length_per_minute(self):
+        '''Return the length per minute
+        '''
+        return self.capillary.length_per_minute()
+
+    def flow_rate_inj(self):
+        '''Return the flow rate for the flow rate screen
+        '''
+        flow_rate_inj_per_second = self.capillary.flow_rate_inj()
+        return flow_rate_inj_per_second / SECOND_TO_MINUTE
+
+    def flow_rate_flow(self):
+        '''Return the flow rate per minute for the flow screen
+        '''
+        return self.capillary.flow_rate_flow()
+
+    def injection_pressure(self):
+        '''Return the injection pressure in psi per second
+        '''
+        inj_pressure = self.capillary.injection_pressure()
+        return inj_pressure * MBAR_TO_PSI
+
+    def analyte_injected_ng(self):
+        '''Return the analyte injected in ng
+        '''
+        return self.capillary.analyte_injected_ng()
+
+    def analyte_injected_pmol(self):
+        '''Return the analyte injected in pmol
+        '''
+        return self.capillary.analyte_injected_pmol()
+
+    def micro_app(self, time):
+        '''Return the micro_app time in second
+        '''
+        return self.capillary.micro_app(time)
+
+    def micro_ep(self, time):
+        '''Return the micro_ep time in second
+        '''
+        return self.capillary.micro_ep(time)
+
+    def micro_ep_many(self, times):
+        '''Return the micro_ep of each time in second
+        '''
+        return self.capillary.micro_ep_many(times)
+
+    def compute_vicosity_result(self):
+        '''Compute the results for the vicosity screen
+        @return: the error code (0: no error, 1: error, 2: warning), the
+        error message and the results as (key, value, unit)
+        @rtype: (int, str, [(str, float, str)])
+        '''
+        try:
+            viscosity = self.compute_viscosity()
+        except ZeroDivisionError:
+            if self.total_length == 0:
+                return 1, "The capillary length cannot be null", []
+            else:
+                return 1, "The window length cannot be null", []
+        if self.to_window_length > self.total_length:
+            return 1, "The length to window cannot be greater than the capillary length", []
+        return 0, "", [('Viscosity', viscosity, "cp")]
+
+    def compute_conductivy_result(self):
+        '''Compute the result for the conductivy screen
+        @return: see compute_vicosity_result
+        '''
+        try:
+            conductivity = self.compute_conductivity()
+        except ZeroDivisionError:
+            if self.voltage == 0:
+                return 1, "The voltage cannot be null", []
+            else:
+                return 1, "The diameter cannot be null", []
+        if self.to_window_length > self.total_length:
+            return 1, "The length to window cannot be greater than the capillary length", []
+        return 0, "", [('Conductivity', conductivity, "S/m")]
+
+    def compute_flow_result(self):
+        '''Compute the result for the flow screen
+        @return: see compute_vicosity_result
+        '''
+        try:
+            strengh = self.field_strength()
+            microeof = self.micro_eof()
+            lpermin = self.length_per_minute()
+            flowrate = self.flow_rate_flow()
+        except ZeroDivisionError:
+            if self.total_length == 0:
+                return 1, "The capillary length cannot be null", []
+            elif self.electro_osmosis_time:
+                return 1, "The EOF Time cannot be null", []
+            else:
+                return 1, "The voltage cannot be null", []
+        if self.to_window_length > self.total_length:
+            return 1, "The length to window cannot be greater than the capillary length", []
+        return 0, "", [("Fieldstrength", strengh, "V/cm"),
+                       ("MicroEOF", microeof, "cm²/V/s"),
+                       ("Lengthpermin", lpermin * METER_TO_CENTIMETER, "cm"),
+                       ("Flowrate", flowrate, "nL/min")]
+
+    def compute_injection_result(self):
+        '''Compute the result for the injection screen
+        @return: see compute_vicosity_result
+        '''
+        try:
+            hydroinj = self.delivered_volume()
+            capilaryvol = self.capillary_volume()
+            capilaryvoltowin = self.to_window_volume()
+            pluglen = self.injection_plug_length()
+            plugpertotallen = ((pluglen/10)/self.total_length)*100
+            plugpertowinlen = ((pluglen/10)/self.to_window_length)*100
+            #checks the volume can be replaced, the time is not shown
+            self.time_to_replace_volume()
+            analyteinjng = self.analyte_injected_ng()
+            analyteinjpmol = self.analyte_injected_pmol()
+            injpressure = self.injection_pressure()
+            strengh = self.field_strength()
+            flowrate = self.flow_rate_inj()
+        except ZeroDivisionError:
+            if self.viscosity == 0:
+                return 1, "The viscosity cannot be null", []
+            elif self.total_length == 0:
+                return 1, "The capillary length cannot be null", []
+            elif self.to_window_length == 0:
+                return 1, "The length to window cannot be null", []
+            elif self.diameter == 0:
+                return 1, "The diameter cannot be null", []
+            elif self.pressure == 0:
+                return 1, "The pressure cannot be null", []
+            elif self.duration == 0:
+                return 1, "The time cannot be null", []
+            else :
+                return 1, "The molecular weight cannot be null", []
+        if self.to_window_length > self.total_length:
+            return 1, "The length to window cannot be greater than the capillary length", []
+        #special warning
+        if plugpertowinlen > 100.:
+            errcode, errtext = 2, "The capillary is full"
+        else:
+            errcode, errtext = 0, ""
+        #floor for values
+        if hydroinj > capilaryvol:
+            hydroinj = capilaryvol
+        if plugpertotallen > 100.:
+            plugpertotallen = 100.
+        if plugpertowinlen > 100.:
+            plugpertowinlen = 100.
+        results = [("Hydrodynamicinjection", hydroinj, "nL"),
+                   ("Capillaryvolume", capilaryvol, "nL"),
+                   ("Capillaryvolumetowin", capilaryvoltowin, "nL"),
+                   ("Injectionpluglen", pluglen, "mm"),
+                   ("Pluglenpertotallen", plugpertotallen, "%"),
+                   ("Pluglenperlentowin", plugpertowinlen, "%"),
+                   ("Injectedanalyteng", analyteinjng, "ng"),
+                   ("Injectedanalytepmol", analyteinjpmol, "pmol"),
+                   ("Injectionpressure", injpressure, "psi/s"),
+                   ("Fieldstrength", strengh, "V/cm"),
+                   ("Flowrate", flowrate, "nL/min")]
+        return errcode, errtext, results
+
+    def compute_mobility_result(self):
+        '''Compute the result for the mobility result. The µEP of all
+        the compounds of the Timecompounds entry are computed at once and
+        returned as a single MicroEP result holding the list of values.
+        @return: see compute_vicosity_result
+        '''
+        if self.electro_osmosis_time == 0:
+            self.electro_osmosis_time = 1000000
+            self.capillary = Capillary(self.total_length, self.to_window_length,
+                                       self.diameter, self.pressure,
+                                       self.duration, self.viscosity, self.molweight,
+                                       self.concentration, self.voltage,
+                                       self.electric_current,
+                                       self.detection_time,
+                                       self.electro_osmosis_time)
+            self.electro_osmosis_time = 0.0
+        try :
+            microeof = self.micro_eof()
+        except ZeroDivisionError:
+            if self.voltage == 0:
+                return 1, "The voltage cannot be null", []
+        if self.to_window_length > self.total_length:
+            return 1, "The length to window cannot be greater than the capillary length", []
+        times = self.compound_times()
+        if 0 in times:
+            i = times.index(0) + 1
+            return 1, "The time for compound " + str(i) + " cannot be null", []
+        microep = self.micro_ep_many(times)
+        return 0, "", [("MicroEOF", microeof, "cm²/V/s"),
+                       ("MicroEP", microep, "cm²/V/s")]
@@ -0,0 +1,167 @@
+# -*. coding: utf-8 -*-
+# Copyright (c) 2015 CNRS and University of Strasbourg
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+'''
+CapillaryRecords
+================
+
+The CapillaryRecords class keeps the inputs of many capillaries in
+compact memory: an array('d') per input (struct of arrays), 8 bytes a
+value, instead of a Capillary object per method. It does not depend on
+NumPy, to_batch gives the records to CapillaryBatch without copying
+them.
+
+Usage example
+-------------
+
+The following example keeps a million methods and computes the
+delivered volume of the first one and of all of them:
+
+    from capillaryrecords import CapillaryRecords
+
+    records = CapillaryRecords()
+    for i in range(1000000):
+        records.append(diameter=25.0 + i % 50, duration=5.0 + i % 20)
+    records[0].delivered_volume()
+    records.to_batch().delivered_volume()
+
+An index returns a Capillary built from the row, a slice returns new
+records. The iteration returns the rows as tuples of the inputs, in the
+order of INPUTS, without building a Capillary.
+
+'''
+from array import array
+
+try:
+    from itertools import izip as zip
+except ImportError:
+    pass
+
+from capillary import Capillary, INPUTS
+
+# The value of each input when it is not given, the Capillary defaults
+_DEFAULTS = Capillary()
+DEFAULT_INPUTS = tuple(getattr(_DEFAULTS, name) for name in INPUTS)
+del _DEFAULTS
+
+class CapillaryRecords(object):
+    '''The inputs of many capillaries, an array by input
+    '''
+    def __init__(self, **columns):
+        '''
+        @param columns: the values of the inputs (see INPUTS) by name,
+        the inputs not given take the value of the Capillary default
+        @type columns: {str: sequence of float}
+        @raise ValueError: unknown input or columns of different lengths
+        '''
+        for name in columns:
+            if name not in INPUTS:
+                raise ValueError("Unknown input %s" % name)
+        size = max([len(values) for values in columns.values()] or [0])
+        self.columns = []
+        for name, default in zip(INPUTS, DEFAULT_INPUTS):
+            if name in columns:
+                column = array('d', columns[name])
+                if len(column) != size:
+                    raise ValueError("The column %s has %d values, %d expected"
+                                     % (name, len(column), size))
+            else:
+                column = array('d', [default]) * size
+            self.columns.append(column)
+
+    @classmethod
+    def from_capillaries(cls, capillaries):
+        '''Build the records of Capillary objects
+        @type capillaries: iterable of Capillary
+        @rtype: CapillaryRecords
+        '''
+        records = cls()
+        records.extend(tuple(getattr(capillary, name) for name in INPUTS)
+                       for capillary in capillaries)
+        return records
+
+    def __len__(self):
+        return len(self.columns[0])
+
+    def __getitem__(self, index):
+        '''Return the Capillary of a row, or the records of a slice
+        '''
+        if isinstance(index, slice):
+            records = CapillaryRecords()
+            records.columns = [column[index] for column in self.columns]
+            return records
+        return Capillary(*[column[index] for column in self.columns])
+
+    def __iter__(self):
+        '''Iterate on the rows, as tuples of the inputs
+        '''
+        return zip(*self.columns)
+
+    def column(self, name):
+        '''Return the array of the values of an input
+        @param name: the input name (see INPUTS)
+        @type name: str
+        @rtype: array
+        '''
+        return self.columns[INPUTS.index(name)]
+
+    def append(self, capillary=None, **values):
+        '''Add a row, the inputs of a Capillary or the inputs given by
+        name, the others taking the default value
+        '''
+        if capillary is not None:
+            row = [getattr(capillary, name) for name in INPUTS]
+        else:
+            for name in values:
+                if name not in INPUTS:
+                    raise ValueError("Unknown input %s" % name)
+            row = [values.get(name, default)
+                   for name, default in zip(INPUTS, DEFAULT_INPUTS)]
+        # raise before a column is changed if a value is not a number
+        row = array('d', row)
+        for column, value in zip(self.columns, row):
+            column.append(value)
+
+    def extend(self, rows):
+        '''Add rows, each row being the inputs in the order of INPUTS.
+        No row is added if a row is invalid.
+        @type rows: iterable of sequence of float
+        @raise ValueError: a row has not a value by input
+        '''
+        columns = [array('d') for name in INPUTS]
+        for row in rows:
+            row = array('d', row)
+            if len(row) != len(INPUTS):
+                raise ValueError("A row has %d values, %d expected"
+                                 % (len(row), len(INPUTS)))
+            for values, value in zip(columns, row):
+                values.append(value)
+        for column, values in zip(self.columns, columns):
+            column.extend(values)
+
+    @property
+    def nbytes(self):
+        '''The size of the values in bytes'''
+        return sum(column.itemsize * len(column) for column in self.columns)
+
+    def to_batch(self):
+        '''Return a CapillaryBatch of the records, its arrays share the
+        memory of the records so the records cannot grow while the batch
+        is used (NumPy is needed)
+        @rtype: CapillaryBatch
+        '''
+        import numpy as np
+        from capillarybatch import CapillaryBatch
+        return CapillaryBatch(**dict((name, np.frombuffer(column, dtype=np.float64))
+                                     for name, column in zip(INPUTS, self.columns)))
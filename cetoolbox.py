@@ -0,0 +1,277 @@
+# -*. coding: utf-8 -*-
+# Copyright (c) 2015 CNRS and University of Strasbourg
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+'''
+cetoolbox.py
+============
+
+Command line interface of CEToolbox. It does not need Kivy nor a window
+and it does not use the store.
+
+The batch command reads one method per row of a CSV file and writes the
+results of a screen, with the same validation as the application, one
+row at a time:
+
+    python -m cetoolbox batch in.csv out.csv --screen injection
+
+The input columns are named as the keys of the store (Capillary,
+Towindow, Idiameter, ...). The unit of a value is read from the column
+<key>Unit if present, the default unit of the store is used otherwise.
+For the mobility screen, each Timecompound<i> column is a compound.
+The output rows contain the input columns, errcode, errtext and, for
+each result, a <key> and a <key>Unit column. A result holding a list of
+values (MicroEP) is written in the columns <key>1, <key>2, ... Use - to read from the
+standard input or to write to the standard output.
+
+With --history, the runs are also appended to a run history database
+(see runhistory.py), in bulk:
+
+    python -m cetoolbox batch in.csv out.csv --history cetoolboxhistory.db
+
+The serve command runs the local HTTP calculation service (see
+service.py):
+
+    python -m cetoolbox serve --port 8765
+
+'''
+import argparse
+import csv
+import io
+import sys
+from collections import OrderedDict
+
+from capillarycalculator import CapillaryCalculator, CALCULATION_METHODS
+from quantity import UnitError
+from storeschema import DEFAULTS
+
+# The store keys read by each screen
+SCREEN_INPUTS = OrderedDict([
+    ('injection', ('Capillary', 'Towindow', 'Idiameter', 'Pressure', 'Time',
+                   'Viscosity', 'Concentration', 'Molweight', 'Voltage')),
+    ('viscosity', ('Capillary', 'Towindow', 'Idiameter', 'Pressure',
+                   'Detectiontime')),
+    ('conductivity', ('Capillary', 'Towindow', 'Idiameter', 'Voltage',
+                      'Electriccurrent')),
+    ('flow', ('Capillary', 'Towindow', 'Idiameter', 'Voltage',
+              'Electroosmosis')),
+    ('mobility', ('Capillary', 'Towindow', 'Voltage', 'Electroosmosis')),
+])
+
+# The CapillaryCalculator method computing the results of each screen
+SCREEN_METHODS = CALCULATION_METHODS
+
+def get_timecompounds(fieldnames):
+    '''Return the Timecompound<i> columns, in the compound order
+    '''
+    timecompounds = [name for name in fieldnames
+                     if name.startswith('Timecompound')
+                     and name[len('Timecompound'):].isdigit()]
+    return sorted(timecompounds, key=lambda name: int(name[len('Timecompound'):]))
+
+# The number of runs appended to the history at once
+HISTORY_CHUNK = 10000
+
+def read_row(screen, row, timecompounds=()):
+    '''Return the store entries of a method
+    @param screen: the screen name (see SCREEN_INPUTS)
+    @type screen: str
+    @param row: the values and the units by column name
+    @type row: {str: str}
+    @param timecompounds: the compound columns for the mobility screen,
+    their default unit is the one of the first default compound
+    @type timecompounds: [str]
+    @rtype: {str: {str: float, str: unicode}}
+    @raise ValueError: a value is empty or is not a number
+    '''
+    entries = dict(DEFAULTS)
+    for key in SCREEN_INPUTS[screen]:
+        unit = row.get(key + 'Unit') or DEFAULTS[key]["unit"]
+        entries[key] = {"value": float(row.get(key) or ''), "unit": unit}
+    if screen == 'mobility':
+        default = DEFAULTS['Timecompounds']["unit"][0]
+        entries['Timecompounds'] = {
+            "value": [float(row.get(key) or '') for key in timecompounds],
+            "unit": [row.get(key + 'Unit') or default for key in timecompounds]}
+    return entries
+
+def compute_entries(screen, entries):
+    '''Compute the results of a screen from store entries
+    @return: the calculator, None if a unit is unknown or of another
+    dimension, and the error code, the error message and the results
+    @rtype: (CapillaryCalculator, (int, str, [(str, float, str)]))
+    '''
+    try:
+        calculator = CapillaryCalculator(entries)
+        return calculator, getattr(calculator, SCREEN_METHODS[screen])()
+    except UnitError as error:
+        return None, (1, error.args[0], [])
+
+def compute_row(screen, row, timecompounds=()):
+    '''Compute the results of a screen for one method
+    @param screen: the screen name (see SCREEN_INPUTS)
+    @type screen: str
+    @param row: the values and the units by column name (see read_row)
+    @type row: {str: str}
+    @return: the error code, the error message and the results
+    @rtype: (int, str, [(str, float, str)])
+    '''
+    try:
+        entries = read_row(screen, row, timecompounds)
+    except ValueError:
+        return 1, "Empty field not allowed", []
+    return compute_entries(screen, entries)[1]
+
+def flatten_results(results):
+    '''Split the results holding a list of values in a result by value,
+    the index of the value (from 1) is added to the key
+    @rtype: [(str, float, str)]
+    '''
+    flat = []
+    for key, value, unit in results:
+        if isinstance(value, list):
+            flat += [(key + str(i), item, unit)
+                     for i, item in enumerate(value, 1)]
+        else:
+            flat.append((key, value, unit))
+    return flat
+
+def result_columns(screen, timecompounds=()):
+    '''Return the result keys and units of a screen, computed from the
+    default values
+    '''
+    row = dict((key, '1.0') for key in timecompounds)
+    for key in SCREEN_INPUTS[screen]:
+        row[key] = str(DEFAULTS[key]["value"])
+    errcode, errtext, results = compute_row(screen, row, timecompounds)
+    return [(key, unit) for key, value, unit in flatten_results(results)]
+
+def run_batch(infile, outfile, screen, history=None):
+    '''Compute the results of every row of infile and write them to
+    outfile, one row at a time
+    @param infile: the CSV input
+    @type infile: file
+    @param outfile: the CSV output
+    @type outfile: file
+    @param screen: the screen name (see SCREEN_INPUTS)
+    @type screen: str
+    @param history: where to append the runs computed, by chunks of
+    HISTORY_CHUNK runs
+    @type history: RunHistory
+    @return: the number of rows and the number of rows in error
+    @rtype: (int, int)
+    '''
+    reader = csv.DictReader(infile)
+    fieldnames = list(reader.fieldnames or [])
+    timecompounds = get_timecompounds(fieldnames) if screen == 'mobility' else []
+    columns = result_columns(screen, timecompounds)
+    header = fieldnames + ['errcode', 'errtext']
+    for key, unit in columns:
+        header += [key, key + 'Unit']
+    writer = csv.writer(outfile)
+    writer.writerow(header)
+    if history is not None:
+        from runhistory import run_row
+    nbrows = nberrors = 0
+    runs = []
+    for row in reader:
+        try:
+            entries = read_row(screen, row, timecompounds)
+        except ValueError:
+            calculator, result = None, (1, "Empty field not allowed", [])
+        else:
+            calculator, result = compute_entries(screen, entries)
+        errcode, errtext, results = result
+        if history is not None and results:
+            runs.append(run_row(screen, calculator, errcode, errtext, results))
+            if len(runs) >= HISTORY_CHUNK:
+                history.add_runs(runs)
+                runs = []
+        values = dict((key, value) for key, value, unit in flatten_results(results))
+        line = [row.get(name, '') for name in fieldnames] + [errcode, errtext]
+        for key, unit in columns:
+            if key in values:
+                line += [repr(values[key]), unit]
+            else:
+                line += ['', '']
+        writer.writerow(line)
+        nbrows += 1
+        if errcode == 1:
+            nberrors += 1
+    if runs:
+        history.add_runs(runs)
+    return nbrows, nberrors
+
+def _open(filename, mode):
+    '''Open a CSV file, - is the standard input or output
+    '''
+    if filename == '-':
+        stream = sys.stdin if mode == 'r' else sys.stdout
+        return io.open(stream.fileno(), mode, encoding='utf-8', newline='',
+                       closefd=False)
+    return io.open(filename, mode, encoding='utf-8', newline='')
+
+def main(argv=None):
+    '''Entry point of the command line interface
+    '''
+    parser = argparse.ArgumentParser(prog='cetoolbox',
+                                     description='CEToolbox calculations')
+    subparsers = parser.add_subparsers(dest='command')
+    batch = subparsers.add_parser('batch',
+                                  help='compute the results of a CSV file')
+    batch.add_argument('infile', help='the CSV file of methods')
+    batch.add_argument('outfile', help='the CSV file of results')
+    batch.add_argument('--screen', choices=list(SCREEN_INPUTS),
+                       default='injection',
+                       help='the calculation to perform')
+    batch.add_argument('--history', metavar='DATABASE',
+                       help='append the runs to this run history')
+    serve = subparsers.add_parser('serve',
+                                  help='run the local HTTP calculation service')
+    serve.add_argument('--host', default='127.0.0.1',
+                       help='the address to listen on')
+    serve.add_argument('--port', type=int, default=8765,
+                       help='the port to listen on')
+    serve.add_argument('--window', type=float, default=0.002,
+                       help='the time the requests are gathered in a batch (s)')
+    serve.add_argument('--max-batch', type=int, default=256,
+                       help='the maximum number of requests in a batch')
+    args = parser.parse_args(argv)
+    if args.command == 'serve':
+        import asyncio
+        from service import serve
+        try:
+            asyncio.run(serve(args.host, args.port, args.window, args.max_batch))
+        except KeyboardInterrupt:
+            pass
+        return 0
+    if args.command != 'batch':
+        parser.print_help()
+        return 2
+    history = None
+    if args.history:
+        from runhistory import RunHistory
+        history = RunHistory(args.history)
+    try:
+        with _open(args.infile, 'r') as infile:
+            with _open(args.outfile, 'w') as outfile:
+                nbrows, nberrors = run_batch(infile, outfile, args.screen,
+                                             history)
+    finally:
+        if history is not None:
+            history.close()
+    sys.stderr.write("%d rows, %d errors\n" % (nbrows, nberrors))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
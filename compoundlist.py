@@ -0,0 +1,152 @@
+# -*. coding: utf-8 -*-
+# Copyright (c) 2015 CNRS and University of Strasbourg
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+'''
+compoundlist.py
+===============
+
+The CompoundList is the in-memory model of the compound migration
+times edited in the mobility screen. The screen shows it in a
+RecycleView and the store is written only when the list is saved, as
+the single Timecompounds entry.
+
+parse_times reads migration times pasted from a spreadsheet or a text
+file, one time per line (or separated by tabs, semicolons or commas),
+each time optionally followed by its unit:
+
+    12.5
+    13.1 min
+    800 s
+
+A comma between two digits is a decimal comma, as written by the
+spreadsheets in French: "12,5" is 12.5 and not two times. Times
+separated by commas need a space after the comma ("12.5, 13.1").
+
+'''
+import re
+
+from storeschema import DEFAULTS
+
+# The units a migration time can be entered in
+TIME_UNITS = (u"s", u"min")
+
+# a comma between two digits is a decimal comma, not a separator
+_SEPARATORS = re.compile(r'(?:[\r\n\t;]|,(?!\d)|(?<!\d),)+')
+_TIME = re.compile(r'^([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)\s*([^\s\d].*)?$')
+
+def unicode_text(value):
+    '''Return the text of a value as shown in a TextInput
+    '''
+    return u"%s" % (value,)
+
+def parse_times(text, default_unit=u"min"):
+    '''Read migration times from a text
+    @param text: the times, see the module documentation
+    @type text: unicode
+    @param default_unit: the unit of the times without unit
+    @type default_unit: unicode
+    @return: the values and the units
+    @rtype: ([float], [unicode])
+    @raise ValueError: a time cannot be read or its unit is unknown
+    '''
+    values = []
+    units = []
+    for token in _SEPARATORS.split(text):
+        token = token.strip().replace(u",", u".")
+        if not token:
+            continue
+        match = _TIME.match(token)
+        if match is None:
+            raise ValueError(u"Invalid time %s" % token)
+        unit = (match.group(2) or default_unit).strip()
+        if unit not in TIME_UNITS:
+            raise ValueError(u"Unknown unit %s" % unit)
+        values.append(float(match.group(1)))
+        units.append(unit)
+    if not values:
+        raise ValueError(u"No time found")
+    return values, units
+
+class CompoundList(object):
+    '''The migration times of the compounds, as entered (the values
+    are kept as text until the list is saved)
+    '''
+    def __init__(self, values=(), units=()):
+        self.values = [unicode_text(value) for value in values]
+        self.units = list(units)
+
+    @classmethod
+    def from_entry(cls, entry):
+        '''Build the list from a Timecompounds entry of the store
+        '''
+        return cls(entry["value"], entry["unit"])
+
+    @classmethod
+    def default(cls):
+        '''Build the list of the default compounds
+        '''
+        return cls.from_entry(DEFAULTS['Timecompounds'])
+
+    def __len__(self):
+        return len(self.values)
+
+    def add(self, value=1.0, unit=u"min"):
+        '''Add a compound at the end of the list
+        @return: the row of the compound (see get_row)
+        '''
+        self.values.append(unicode_text(value))
+        self.units.append(unit)
+        return self.get_row(len(self.values) - 1)
+
+    def remove_last(self):
+        '''Remove the last compound, the first compound is never removed
+        @return: True if a compound was removed
+        '''
+        if len(self.values) <= 1:
+            return False
+        self.values.pop()
+        self.units.pop()
+        return True
+
+    def set_value(self, index, text):
+        self.values[index] = text
+
+    def set_unit(self, index, unit):
+        self.units[index] = unit
+
+    def replace(self, values, units):
+        '''Replace all the compounds, for instance by imported times
+        '''
+        self.values = [unicode_text(value) for value in values]
+        self.units = list(units)
+
+    def get_row(self, index):
+        '''Return the data of a row of the RecycleView
+        '''
+        return {"index": index,
+                "label": u"Time compound " + str(index + 1),
+                "value": self.values[index],
+                "unit": self.units[index]}
+
+    def get_rows(self):
+        '''Return the data of all the rows of the RecycleView
+        '''
+        return [self.get_row(index) for index in range(len(self.values))]
+
+    def to_entry(self):
+        '''Return the Timecompounds entry of the store
+        @raise ValueError: a value is not a number
+        '''
+        return {"value": [float(value) for value in self.values],
+                "unit": list(self.units)}
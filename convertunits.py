@@ -19,8 +19,34 @@ Units
 
 The Units provide a set of classes to manage units and unit conversion.
 
+Each units class handles a dimension (length, pressure, ...). The
+factor converting any unit of a dimension to any other unit of the same
+dimension is computed once, when the class is defined. The units
+classes are gathered in a registry, so the units class of a unit can be
+found from its abbreviation:
+
+    import convertunits
+
+    convertunits.get_units('psi')
+    convertunits.convert_many([1.0, 500.0, 0.1], ['psi', 'mbar', 'bar'],
+                              'mbar')
+
+convert_many needs NumPy, which is imported only when convert_many is
+called.
+
 '''
 
+# The units classes by dimension name
+UNITS_BY_DIMENSION = {}
+
+# The units classes by unit abbreviation
+UNITS_BY_ABBR = {}
+
+def _is_unit(unit):
+    '''Return True if unit is a single unit and not an array of units
+    '''
+    return isinstance(unit, (str, type(u'')))
+
 class UnitList:
     '''A class to manage units and to convert values.
     '''
@@ -28,34 +54,159 @@ class UnitList:
         self.baseUnitAbbr = baseUnitAbbr
         self.baseUnitName = baseUnitName
         self.units = {}
-        self.units[baseUnitAbbr] = [baseUnitName, 1]
+        # The factor from each unit to the base unit
+        self.factors = {}
+        # The position of each unit in the factor table
+        self.indexes = {}
+        # table[i][j] is the factor from the unit i to the unit j
+        self.table = []
+        self._array_table = None
+        self.add_unit(baseUnitAbbr, baseUnitName, 1)
 
     def add_unit(self, unitAbbr, unitName, unitFactor = 1):
         self.units[unitAbbr] = [unitName, unitFactor]
+        self.factors[unitAbbr] = unitFactor
+        self.indexes[unitAbbr] = len(self.indexes)
+        self._build_table()
+
+    def _build_table(self):
+        '''Compute the from->to factor of every pair of units
+        '''
+        abbrs = sorted(self.indexes, key=self.indexes.get)
+        self.table = [[float(self.factors[from_unit]) / self.factors[to_unit]
+                       for to_unit in abbrs]
+                      for from_unit in abbrs]
+        self._array_table = None
 
     def get_factor(self, unitAbbr):
-        return self.units[unitAbbr][1]
+        return self.factors[unitAbbr]
 
     def convert_to_unit(self, value, from_unit, to_unit):
-        convertedValue = value * self.get_factor(from_unit) / self.get_factor(to_unit)
-        return float(convertedValue)
+        '''Convert a value with the precomputed factor table
+        '''
+        i = self.indexes[from_unit]
+        j = self.indexes[to_unit]
+        factor = self.table[i][j]
+        if factor >= 1.0:
+            return float(value * factor)
+        # the factors lower than 1 are inexact, 1000000.0 is not
+        return float(value / self.table[j][i])
+
+    def get_table(self):
+        '''Return the factor table as a NumPy array
+        '''
+        if self._array_table is None:
+            import numpy
+            self._array_table = numpy.array(self.table, dtype=numpy.float64)
+        return self._array_table
+
+    def get_indexes(self, units):
+        '''Return the position in the factor table of a unit, or of each
+        unit of an array of units
+        '''
+        if _is_unit(units):
+            return self.indexes[units]
+        import numpy
+        units = numpy.asarray(units)
+        distinct, inverse = numpy.unique(units, return_inverse=True)
+        indexes = numpy.array([self.indexes[unit] for unit in distinct],
+                              dtype=numpy.intp)
+        return indexes[inverse].reshape(units.shape)
+
+    def convert_many(self, values, from_units, to_units):
+        import numpy
+        values = numpy.asarray(values, dtype=numpy.float64)
+        factors = self.get_table()[self.get_indexes(from_units),
+                                   self.get_indexes(to_units)]
+        return values * factors
+
+def register_units(dimension):
+    '''Class decorator adding a units class to the registry
+    @param dimension: the name of the dimension handled by the class
+    @type dimension: str
+    '''
+    def register(cls):
+        cls.dimension = dimension
+        UNITS_BY_DIMENSION[dimension] = cls
+        for unitAbbr in cls.unitList.units:
+            UNITS_BY_ABBR[unitAbbr] = cls
+        return cls
+    return register
+
+def get_units(unit):
+    '''Return the units class handling a unit
+    @param unit: the unit abbreviation
+    @type unit: unicode
+    @return: the units class
+    @rtype: BaseUnits subclass
+    '''
+    try:
+        return UNITS_BY_ABBR[unit]
+    except KeyError:
+        raise ValueError(u"Unknown unit %s" % unit)
+
+def convert_many(values, from_units, to_units):
+    '''Convert an array of values at once. Each of from_units and
+    to_units is either a single unit or an array of units with the
+    shape of values (for instance a mixed-unit column), all the units
+    must belong to the same dimension.
+    @param values: the values to convert
+    @type values: numpy.ndarray
+    @param from_units: the unit(s) of the values
+    @type from_units: unicode or numpy.ndarray
+    @param to_units: the unit(s) to get
+    @type to_units: unicode or numpy.ndarray
+    @return: the values converted
+    @rtype: numpy.ndarray'''
+    units = set()
+    for unit in (from_units, to_units):
+        if _is_unit(unit):
+            units.add(unit)
+        else:
+            import numpy
+            units.update(numpy.unique(numpy.asarray(unit)).tolist())
+    dimensions = set(get_units(unit) for unit in units)
+    if len(dimensions) != 1:
+        raise ValueError("Cannot convert between units of different dimensions")
+    return dimensions.pop().convert_many(values, from_units, to_units)
 
 class BaseUnits:
-    '''A class use to be herited to convert value
+    '''A class use to be herited to convert value.
+    The herited class must define its unitList.
     '''
+    unitList = None
 
     @classmethod
-    def convert_unit(self, value, from_unit, to_unit):
-        """
+    def convert_unit(cls, value, from_unit, to_unit):
+        '''Convert the value from an unit to another unit
         @param value: the value to convert
         @type value: float
         @param from_unit: the unit of the value
         @type from_unit: unicode
         @param to_unit: the unit to get
-        @type to_unit: unicode"""
-        raise NotImplementedError("""You must implement convert_unit's 
-            %s method""" % type(self).__name__)
+        @type to_unit: unicode
+        @return: the value converted
+        @rtype: float'''
+        if cls.unitList is None:
+            raise NotImplementedError("""You must define the unitList of
+            %s""" % cls.__name__)
+        return cls.unitList.convert_to_unit(value, from_unit, to_unit)
+
+    @classmethod
+    def convert_many(cls, values, from_units, to_units):
+        '''Convert an array of values with the precomputed factor table
+        @param values: the values to convert
+        @type values: numpy.ndarray
+        @param from_units: the unit(s) of the values, a single unit or
+        an array of units with the shape of values
+        @type from_units: unicode or numpy.ndarray
+        @param to_units: the unit(s) to get
+        @type to_units: unicode or numpy.ndarray
+        @return: the values converted
+        @rtype: numpy.ndarray'''
+        return cls.unitList.convert_many(values, from_units, to_units)
 
+@register_units('length')
 class LengthUnits(BaseUnits):
     '''A class use to convert length (only the metric system)
     It handles µm, mm, cm and m.
@@ -65,20 +216,7 @@ class LengthUnits(BaseUnits):
     unitList.add_unit('mm', 'millimetter', 0.001)
     unitList.add_unit(u'µm', 'micrometter', 0.000001)
 
-    @classmethod
-    def convert_unit(cls, value, from_unit, to_unit):
-        '''Convert the value from an unit to another unit
-        @param value: the value to convert
-        @type value: float
-        @param from_unit: the unit of the value
-        @type from_unit: unicode
-        @param to_unit: the unit to get
-        @type to_unit: unicode
-        @return: the value converted
-        @rtype: float'''
-        val = cls.unitList.convert_to_unit(value, from_unit, to_unit)
-        return float(val)
-
+@register_units('pressure')
 class PressureUnits(BaseUnits):
     '''A class use to convert pressure.
     It handles pa, mbar, bar and psi.
@@ -88,20 +226,7 @@ class PressureUnits(BaseUnits):
     unitList.add_unit('mbar', 'millibar',  100.0)
     unitList.add_unit('psi', 'psi', 6894.8)
 
-    @classmethod
-    def convert_unit(cls, value, from_unit, to_unit):
-        '''Convert the value from an unit to another unit
-        @param value: the value to convert
-        @type value: float
-        @param from_unit: the unit of the value
-        @type from_unit: unicode
-        @param to_unit: the unit to get
-        @type to_unit: unicode
-        @return: the value converted
-        @rtype: float'''
-        val = cls.unitList.convert_to_unit(value, from_unit, to_unit)
-        return float(val)
-
+@register_units('time')
 class TimeUnits(BaseUnits):
     '''A class use to convert time.
     It handles s, min and h.
@@ -110,20 +235,7 @@ class TimeUnits(BaseUnits):
     unitList.add_unit('min','minute', 60.0)
     unitList.add_unit('h','hour', 3600.0)
 
-    @classmethod
-    def convert_unit(cls, value, from_unit, to_unit):
-        '''Convert the value from an unit to another unit
-        @param value: the value to convert
-        @type value: float
-        @param from_unit: the unit of the value
-        @type from_unit: unicode
-        @param to_unit: the unit to get
-        @type to_unit: unicode
-        @return: the value converted
-        @rtype: float'''
-        val = cls.unitList.convert_to_unit(value, from_unit, to_unit)
-        return float(val)
-
+@register_units('concentration')
 class ConcentrationUnits(BaseUnits):
     '''A class use to convert concentration.
     It handles g/L and mg/L.
@@ -131,20 +243,7 @@ class ConcentrationUnits(BaseUnits):
     unitList = UnitList('g/L','gramm per litter')
     unitList.add_unit('mg/L','milligram per litter', 0.001)
 
-    @classmethod
-    def convert_unit(cls, value, from_unit, to_unit):
-        '''Convert the value from an unit to another unit
-        @param value: the value to convert
-        @type value: float
-        @param from_unit: the unit of the value
-        @type from_unit: unicode
-        @param to_unit: the unit to get
-        @type to_unit: unicode
-        @return: the value converted
-        @rtype: float'''
-        val = cls.unitList.convert_to_unit(value, from_unit, to_unit)
-        return float(val)
- 
+@register_units('molconcentration')
 class MolConcentrationUnits(BaseUnits):
     '''A class use to convert molar concentration.
     It handles mol/L and mmol/L.
@@ -152,20 +251,7 @@ class MolConcentrationUnits(BaseUnits):
     unitList = UnitList('mol/L','mol per litter')
     unitList.add_unit('mmol/L','millimol per litter', 0.001)
 
-    @classmethod
-    def convert_unit(cls, value, from_unit, to_unit):
-        '''Convert the value from an unit to another unit
-        @param value: the value to convert
-        @type value: float
-        @param from_unit: the unit of the value
-        @type from_unit: unicode
-        @param to_unit: the unit to get
-        @type to_unit: unicode
-        @return: the value converted
-        @rtype: float'''
-        val = cls.unitList.convert_to_unit(value, from_unit, to_unit)
-        return float(val)
-
+@register_units('molweight')
 class MolWeightUnits(BaseUnits):
     '''A class use to convert molar weight.
     It handles g/mol and mg/mol.
@@ -173,20 +259,7 @@ class MolWeightUnits(BaseUnits):
     unitList = UnitList('g/mol','gramm per mol')
     unitList.add_unit('mg/mol','milligram per mol', 0.001)
 
-    @classmethod
-    def convert_unit(cls, value, from_unit, to_unit):
-        '''Convert the value from an unit to another unit
-        @param value: the value to convert
-        @type value: float
-        @param from_unit: the unit of the value
-        @type from_unit: unicode
-        @param to_unit: the unit to get
-        @type to_unit: unicode
-        @return: the value converted
-        @rtype: float'''
-        val = cls.unitList.convert_to_unit(value, from_unit, to_unit)
-        return float(val)
-
+@register_units('voltage')
 class VoltUnits(BaseUnits):
     '''A class use to convert the volt familly.
     It handles V, mV and KV.
@@ -195,19 +268,23 @@ class VoltUnits(BaseUnits):
     unitList.add_unit('mV','millivolt', 0.001)
     unitList.add_unit('KV','kilovolt', 1000)
 
-    @classmethod
-    def convert_unit(cls, value, from_unit, to_unit):
-        '''Convert the value from an unit to another unit
-        @param value: the value to convert
-        @type value: float
-        @param from_unit: the unit of the value
-        @type from_unit: unicode
-        @param to_unit: the unit to get
-        @type to_unit: unicode
-        @return: the value converted
-        @rtype: float'''
-        val = cls.unitList.convert_to_unit(value, from_unit, to_unit)
-        return float(val)
+@register_units('viscosity')
+class ViscosityUnits(BaseUnits):
+    '''A class use to convert the dynamic viscosity.
+    It handles cp, mPa.s and Pa.s.
+    '''
+    unitList = UnitList('cp', 'centipoise')
+    unitList.add_unit('mPa.s', 'millipascal second', 1)
+    unitList.add_unit('Pa.s', 'pascal second', 1000)
+
+@register_units('current')
+class CurrentUnits(BaseUnits):
+    '''A class use to convert the electric current.
+    It handles A, mA and µA.
+    '''
+    unitList = UnitList('A', 'ampere')
+    unitList.add_unit('mA', 'milliampere', 0.001)
+    unitList.add_unit(u'µA', 'microampere', 0.000001)
 
 if __name__ == "__main__":
     print(LengthUnits.convert_unit(1000, u'µm', 'm'))
@@ -0,0 +1,167 @@
+# -*. coding: utf-8 -*-
+# Copyright (c) 2015 CNRS and University of Strasbourg
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+'''
+goalseek.py
+===========
+
+Inverse solvers ("goal seek"): find the value of an input of a capillary
+giving a target value of a result, the other inputs being kept.
+
+The results of the Capillary class are power laws of the inputs (see
+capillary.POWER_LAWS), goal_seek inverts them in closed form. Any other
+function of a CapillaryBatch is solved with a vectorized bisection
+(solve_bracketed). The targets can be a scalar or an array, the
+solution has the same shape.
+
+Usage example
+-------------
+
+The following example finds the pressure (mbar) delivering 10, 20 and
+50 nL and the duration (s) filling 2 % of the length to window:
+
+    import goalseek
+    from capillary import Capillary
+
+    capillary = Capillary()
+    goalseek.goal_seek(capillary, 'delivered_volume', 'pressure',
+                       [10.0, 20.0, 50.0])
+    goalseek.goal_seek(capillary, 'plug_percent_to_window', 'duration', 2.0)
+
+The units are the ones of the Capillary class (cm, µm, mbar, s, cp, g/L,
+g/mol, V and µA).
+
+'''
+import numpy as np
+
+from capillary import POWER_LAWS
+from capillarybatch import CapillaryBatch, INPUTS
+
+def _percent_of(name, length):
+    '''Return the power law of the plug length (mm) in percent of a
+    length (cm)
+    '''
+    constant, exponents = POWER_LAWS[name]
+    exponents = dict(exponents)
+    exponents[length] = exponents.get(length, 0) - 1
+    return constant * 10, tuple((attribute, exponent)
+                                for attribute, exponent in exponents.items()
+                                if exponent)
+
+# The results which can be solved in closed form
+TARGETS = dict(POWER_LAWS)
+TARGETS['plug_percent_total'] = _percent_of('injection_plug_length',
+                                            'total_length')
+TARGETS['plug_percent_to_window'] = _percent_of('injection_plug_length',
+                                                'to_window_length')
+
+def _inputs(capillary):
+    '''Return the inputs of a Capillary or a CapillaryBatch by name
+    '''
+    return dict((name, getattr(capillary, name)) for name in INPUTS)
+
+def solve_power_law(target, unknown, targets, inputs):
+    '''Return the value of unknown giving the targets
+    @param target: the name of the result (see TARGETS)
+    @type target: str
+    @param unknown: the name of the input to find
+    @type unknown: str
+    @param targets: the target values of the result
+    @type targets: float or array
+    @param inputs: the values of the other inputs
+    @type inputs: {str: float or array}
+    @rtype: float or numpy.ndarray
+    @raise ValueError: the result does not depend on unknown
+    '''
+    constant, exponents = TARGETS[target]
+    exponents = dict(exponents)
+    if unknown not in exponents:
+        raise ValueError("%s does not depend on %s" % (target, unknown))
+    others = constant
+    for name, exponent in exponents.items():
+        if name != unknown:
+            others = others * np.asarray(inputs[name], dtype=np.float64)**exponent
+    with np.errstate(divide='ignore', invalid='ignore'):
+        solution = (np.asarray(targets, dtype=np.float64) / others)**(1.0 / exponents[unknown])
+    if solution.ndim == 0:
+        return float(solution)
+    return solution
+
+def solve_bracketed(function, targets, low, high, rtol=1e-10, maxiter=200):
+    '''Find x in [low, high] with function(x) == targets by bisection,
+    for all the targets at once. function must be monotonic on the
+    bracket and accept an array of x.
+    @param function: the function to invert
+    @type function: callable
+    @param targets: the target values
+    @type targets: float or array
+    @param low: the lower bound of the solutions
+    @type low: float or array
+    @param high: the upper bound of the solutions
+    @type high: float or array
+    @return: the solutions, nan where the target is out of the bracket
+    @rtype: numpy.ndarray
+    '''
+    targets = np.asarray(targets, dtype=np.float64)
+    low, high, targets = np.broadcast_arrays(np.asarray(low, dtype=np.float64),
+                                             np.asarray(high, dtype=np.float64),
+                                             targets)
+    low = low.copy()
+    high = high.copy()
+    f_low = function(low) - targets
+    f_high = function(high) - targets
+    valid = np.sign(f_low) * np.sign(f_high) <= 0
+    increasing = f_high >= f_low
+    for i in range(maxiter):
+        middle = 0.5 * (low + high)
+        f_middle = function(middle) - targets
+        below = (f_middle < 0) == increasing
+        low = np.where(below, middle, low)
+        high = np.where(below, high, middle)
+        if np.all(high - low <= rtol * np.abs(middle)):
+            break
+    solution = 0.5 * (low + high)
+    return np.where(valid, solution, np.nan)
+
+def goal_seek(capillary, target, unknown, targets, low=None, high=None):
+    '''Return the value of the input unknown of the capillary giving the
+    target values of a result, the other inputs being kept.
+    @param capillary: the capillary
+    @type capillary: Capillary or CapillaryBatch
+    @param target: the name of a result (see TARGETS), solved in closed
+    form, or a function of a CapillaryBatch, solved by bisection
+    between low and high
+    @type target: str or callable
+    @param unknown: the name of the input to find (see INPUTS)
+    @type unknown: str
+    @param targets: the target values
+    @type targets: float or array
+    @param low: the lower bound of the solution, for a function
+    @type low: float or array
+    @param high: the upper bound of the solution, for a function
+    @type high: float or array
+    @rtype: float or numpy.ndarray
+    '''
+    if unknown not in INPUTS:
+        raise ValueError("Unknown input %s" % unknown)
+    inputs = _inputs(capillary)
+    if not callable(target):
+        return solve_power_law(target, unknown, targets, inputs)
+    if low is None or high is None:
+        raise ValueError("A bracket is needed to solve a function")
+    def function(values):
+        batch_inputs = dict(inputs)
+        batch_inputs[unknown] = values
+        return target(CapillaryBatch(**batch_inputs))
+    return solve_bracketed(function, targets, low, high)
@@ -0,0 +1,194 @@
+# -*. coding: utf-8 -*-
+# Copyright (c) 2015 CNRS and University of Strasbourg
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+'''
+instrumentation.py
+==================
+
+Opt-in counters and timers of the hot paths of CEToolbox (store access,
+CapillaryManager, popups). The instrumentation is disabled unless the
+environment variable CETOOLBOX_INSTRUMENT is set, or enable() is
+called. When it is disabled a timed function only checks a flag before
+calling the original function.
+
+    from instrumentation import timed
+
+    @timed('store.get')
+    def get(self, key):
+        ...
+
+For each name, the number of calls, the cumulative time and the
+percentiles of the last SAMPLE_SIZE calls are kept. dump() writes them
+to a JSON file, it is called on SIGUSR1 once install_signal_handler()
+was called, and by the F12 key in the application.
+
+'''
+import functools
+import json
+import os
+import signal
+import threading
+import time
+from collections import deque, OrderedDict
+
+# The environment variable enabling the instrumentation
+ENV_VARIABLE = 'CETOOLBOX_INSTRUMENT'
+
+# The number of latencies kept by name to compute the percentiles
+SAMPLE_SIZE = 1000
+
+# The default file written by dump, %d is the process id
+DUMP_FILENAME = 'cetoolbox-instrumentation-%d.json'
+
+_clock = getattr(time, 'perf_counter', time.time)
+
+_enabled = bool(os.environ.get(ENV_VARIABLE))
+
+# The Timer of each instrumented name
+_timers = {}
+
+# The calls are recorded from the user interface and the worker threads
+_lock = threading.Lock()
+
+class Timer(object):
+    '''The calls of an instrumented function
+    '''
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = deque(maxlen=SAMPLE_SIZE)
+
+    def add(self, elapsed):
+        '''Record a call which lasted elapsed seconds
+        '''
+        with _lock:
+            self.count += 1
+            self.total += elapsed
+            if elapsed > self.max:
+                self.max = elapsed
+            self.samples.append(elapsed)
+
+    def percentile(self, percent):
+        '''Return a percentile of the last calls, in seconds
+        '''
+        if not self.samples:
+            return 0.0
+        samples = sorted(self.samples)
+        index = int(round(percent / 100.0 * (len(samples) - 1)))
+        return samples[index]
+
+    def as_dict(self):
+        '''Return the statistics in microseconds
+        '''
+        return OrderedDict([("count", self.count),
+                            ("total_us", 1e6 * self.total),
+                            ("mean_us", 1e6 * self.total / max(self.count, 1)),
+                            ("p50_us", 1e6 * self.percentile(50)),
+                            ("p90_us", 1e6 * self.percentile(90)),
+                            ("p99_us", 1e6 * self.percentile(99)),
+                            ("max_us", 1e6 * self.max)])
+
+def enable():
+    '''Start recording the calls
+    '''
+    global _enabled
+    _enabled = True
+
+def disable():
+    '''Stop recording the calls, the recorded calls are kept
+    '''
+    global _enabled
+    _enabled = False
+
+def is_enabled():
+    '''Return True if the calls are recorded
+    '''
+    return _enabled
+
+def record(name, elapsed):
+    '''Record a call of name which lasted elapsed seconds
+    '''
+    try:
+        timer = _timers[name]
+    except KeyError:
+        with _lock:
+            timer = _timers.setdefault(name, Timer(name))
+    timer.add(elapsed)
+
+def timed(name):
+    '''Decorator recording the calls of a function under name
+    @param name: the name of the hot path
+    @type name: str
+    '''
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            start = _clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(name, _clock() - start)
+        return wrapper
+    return decorator
+
+def get_stats():
+    '''Return the statistics of each name
+    @rtype: {str: OrderedDict}
+    '''
+    with _lock:
+        return OrderedDict((name, _timers[name].as_dict())
+                           for name in sorted(_timers))
+
+def reset():
+    '''Forget the recorded calls
+    '''
+    with _lock:
+        _timers.clear()
+
+def dump(filename=None):
+    '''Write the statistics to a JSON file
+    @param filename: the file, DUMP_FILENAME by default
+    @type filename: str
+    @return: the name of the file
+    @rtype: str
+    '''
+    if filename is None:
+        filename = DUMP_FILENAME % os.getpid()
+    with open(filename, 'w') as fd:
+        json.dump(get_stats(), fd, indent=2)
+    return filename
+
+def _dump_on_signal(signum, frame):
+    '''Signal handler writing the statistics on another thread: the
+    signal may interrupt the thread holding the lock of the timers,
+    which would wait for itself if dump was called here
+    @return: the thread writing the statistics
+    @rtype: threading.Thread
+    '''
+    thread = threading.Thread(target=dump, name='InstrumentationDump')
+    thread.daemon = True
+    thread.start()
+    return thread
+
+def install_signal_handler(signum=getattr(signal, 'SIGUSR1', None)):
+    '''Call dump when the process receives signum (SIGUSR1 by default).
+    Do nothing on the platforms without this signal.
+    '''
+    if signum is None:
+        return
+    signal.signal(signum, _dump_on_signal)
@@ -0,0 +1,97 @@
+# -*. coding: utf-8 -*-
+# Copyright (c) 2015 CNRS and University of Strasbourg
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+'''
+livecalculation.py
+==================
+
+The LiveCalculation computes the results of a screen again while the
+values are typed. The values are kept in memory, the store is written
+only when the user computes the results (see CapillaryManager).
+
+The calculator is kept between the updates: an updated value only sets
+its attribute of the capillary, so only the results depending on it
+are computed again (changing the voltage does not compute the capillary
+volume again).
+
+Usage example
+-------------
+
+    from livecalculation import LiveCalculation
+    from storeschema import DEFAULTS
+
+    live = LiveCalculation(DEFAULTS, 'compute_injection_result')
+    live.set_value('Voltage', 25000.0, u"V")
+    errcode, errtext, changed = live.compute()
+
+'''
+from capillarycalculator import CapillaryCalculator, ENTRIES
+
+# The entries read by the calculator
+ENTRY_KEYS = tuple(ENTRIES) + ('Timecompounds',)
+
+class LiveCalculation(object):
+    '''The results of a screen computed from values kept in memory
+    '''
+    def __init__(self, store, method):
+        '''
+        @param store: where to read the initial values, it is not
+        written
+        @type store: JsonStore or {str: dict}
+        @param method: the CapillaryCalculator method computing the
+        results, for instance 'compute_injection_result'
+        @type method: str
+        '''
+        self.entries = dict((key, dict(store.get(key))) for key in ENTRY_KEYS)
+        self.calculator = CapillaryCalculator(self.entries)
+        self.method = method
+        # The results of the last computation, as {key: value}
+        self.results = {}
+
+    def set_value(self, key, value, unit=None):
+        '''Change the value of an entry
+        @param key: the key of the entry
+        @type key: str
+        @param value: the value, as entered
+        @type value: float or [float]
+        @param unit: the unit, None to keep it
+        @type unit: unicode
+        @return: True if the entry changed
+        @rtype: bool
+        '''
+        entry = self.entries[key]
+        if unit is None:
+            unit = entry["unit"]
+        if entry["value"] == value and entry["unit"] == unit:
+            return False
+        self.entries[key] = {"value": value, "unit": unit}
+        if key in ENTRIES:
+            self.calculator.set_entry(key)
+        return True
+
+    def compute(self):
+        '''Compute the results
+        @return: the error code, the error message (see
+        CapillaryCalculator.compute_vicosity_result) and the results
+        which changed since the last computation as (key, value, unit)
+        @rtype: (int, str, [(str, float, str)])
+        '''
+        errcode, errtext, results = getattr(self.calculator, self.method)()
+        if errcode == 1:
+            self.results = {}
+            return errcode, errtext, []
+        changed = [(key, value, unit) for key, value, unit in results
+                   if self.results.get(key) != value]
+        self.results = dict((key, value) for key, value, unit in results)
+        return errcode, errtext, changed
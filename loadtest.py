@@ -0,0 +1,232 @@
+# -*. coding: utf-8 -*-
+# Copyright (c) 2015 CNRS and University of Strasbourg
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+'''
+loadtest.py
+===========
+
+Load test of the calculation service (see service.py). Concurrent
+clients, each on its own kept alive connection, send random methods to
+a screen; the latency of every request is measured and the p50 and p99
+latencies and the number of requests per second are reported:
+
+    python loadtest.py --spawn --requests 20000 --concurrency 64
+    python loadtest.py --port 8765 --screen mobility --output load.json
+
+With --spawn the service is started in another process on --port and
+stopped at the end, otherwise it must already be running. The number of
+batches computed by the service during the test is read from /stats.
+
+'''
+import argparse
+import asyncio
+import json
+import math
+import random
+import subprocess
+import sys
+import time
+from collections import OrderedDict
+
+from cetoolbox import SCREEN_INPUTS
+from service import HOST, PORT
+
+# The range of the random values of each key, in the default units
+RANGES = {
+    'Capillary': (30.0, 100.0),
+    'Towindow': (20.0, 30.0),
+    'Idiameter': (10.0, 100.0),
+    'Pressure': (0.1, 5.0),
+    'Time': (1.0, 60.0),
+    'Viscosity': (0.5, 2.0),
+    'Concentration': (0.1, 10.0),
+    'Molweight': (100.0, 100000.0),
+    'Detectiontime': (1.0, 30.0),
+    'Voltage': (5000.0, 30000.0),
+    'Electriccurrent': (1.0, 100.0),
+    'Electroosmosis': (0.5, 10.0),
+}
+
+def percentile(values, percent):
+    '''Return a percentile of sorted values (nearest rank)
+    @param values: the values, sorted
+    @type values: [float]
+    @param percent: the percentile, between 0 and 100
+    @type percent: float
+    @rtype: float
+    '''
+    if not values:
+        return float('nan')
+    rank = int(math.ceil(percent / 100.0 * len(values)))
+    return values[min(max(rank, 1), len(values)) - 1]
+
+def random_bodies(screen, count, seed=0):
+    '''Return the JSON bodies of random methods
+    @rtype: [bytes]
+    '''
+    rng = random.Random(seed)
+    bodies = []
+    for i in range(count):
+        request = dict((key, rng.uniform(*RANGES[key]))
+                       for key in SCREEN_INPUTS[screen])
+        if screen == 'mobility':
+            request['Timecompounds'] = [rng.uniform(0.5, 20.0)
+                                        for j in range(rng.randint(1, 5))]
+        bodies.append(json.dumps(request).encode('utf-8'))
+    return bodies
+
+async def _request(reader, writer, method, path, body=b''):
+    '''Send a request on a kept alive connection and return the status
+    and the body of the response
+    '''
+    writer.write(('%s %s HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n'
+                  'Content-Length: %d\r\n\r\n' % (method, path, len(body))
+                  ).encode('latin-1') + body)
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, separator, value = line.decode('latin-1').partition(':')
+        if name.strip().lower() == 'content-length':
+            length = int(value)
+    return status, await reader.readexactly(length)
+
+async def _client(host, port, path, bodies, latencies, errors):
+    '''Send the bodies one after the other on a connection
+    '''
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for body in bodies:
+            start = time.perf_counter()
+            status, response = await _request(reader, writer, 'POST', path, body)
+            latencies.append(time.perf_counter() - start)
+            if status != 200 or json.loads(response.decode('utf-8'))["errcode"] == 1:
+                errors.append(status)
+    finally:
+        writer.close()
+
+async def _stats(host, port):
+    '''Return the /stats of the service
+    '''
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        status, response = await _request(reader, writer, 'GET', '/stats')
+        return json.loads(response.decode('utf-8'))
+    finally:
+        writer.close()
+
+async def load_test(host=HOST, port=PORT, screen='injection', requests=10000,
+                    concurrency=64, seed=0):
+    '''Run the load test
+    @param screen: the screen name (see cetoolbox.SCREEN_INPUTS)
+    @type screen: str
+    @param requests: the total number of requests
+    @type requests: int
+    @param concurrency: the number of clients sending requests at the
+    same time
+    @type concurrency: int
+    @return: the report: the latencies (ms), the requests per second and
+    the batches computed by the service
+    @rtype: OrderedDict
+    '''
+    bodies = random_bodies(screen, requests, seed)
+    latencies = []
+    errors = []
+    before = await _stats(host, port)
+    start = time.perf_counter()
+    await asyncio.gather(*[_client(host, port, '/' + screen,
+                                   bodies[i::concurrency], latencies, errors)
+                           for i in range(concurrency)])
+    elapsed = time.perf_counter() - start
+    after = await _stats(host, port)
+    latencies.sort()
+    batches = after["batches"] - before["batches"]
+    report = OrderedDict()
+    report["screen"] = screen
+    report["requests"] = len(latencies)
+    report["concurrency"] = concurrency
+    report["errors"] = len(errors)
+    report["elapsed_s"] = elapsed
+    report["requests_per_s"] = len(latencies) / elapsed if elapsed else 0.0
+    report["p50_ms"] = percentile(latencies, 50) * 1000
+    report["p99_ms"] = percentile(latencies, 99) * 1000
+    report["max_ms"] = latencies[-1] * 1000 if latencies else float('nan')
+    report["batches"] = batches
+    report["requests_per_batch"] = len(latencies) / batches if batches else 0.0
+    return report
+
+async def _wait_service(host, port, timeout=10.0):
+    '''Wait until the service accepts the connections
+    '''
+    deadline = time.time() + timeout
+    while True:
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+            writer.close()
+            return
+        except OSError:
+            if time.time() > deadline:
+                raise
+            await asyncio.sleep(0.05)
+
+def main(argv=None):
+    '''Entry point of the load test
+    '''
+    parser = argparse.ArgumentParser(description='CEToolbox service load test')
+    parser.add_argument('--host', default=HOST, help='the service host')
+    parser.add_argument('--port', type=int, default=PORT,
+                        help='the service port')
+    parser.add_argument('--screen', choices=list(SCREEN_INPUTS),
+                        default='injection', help='the calculation requested')
+    parser.add_argument('--requests', type=int, default=10000,
+                        help='the total number of requests')
+    parser.add_argument('--concurrency', type=int, default=64,
+                        help='the number of concurrent clients')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='the seed of the random methods')
+    parser.add_argument('--spawn', action='store_true',
+                        help='start the service in another process')
+    parser.add_argument('--output', help='the JSON file of the report')
+    args = parser.parse_args(argv)
+    process = None
+    if args.spawn:
+        process = subprocess.Popen([sys.executable, '-m', 'cetoolbox', 'serve',
+                                    '--host', args.host, '--port', str(args.port)])
+    try:
+        if process is not None:
+            asyncio.run(_wait_service(args.host, args.port))
+        report = asyncio.run(load_test(args.host, args.port, args.screen,
+                                       args.requests, args.concurrency,
+                                       args.seed))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+    if args.output:
+        with open(args.output, 'w') as fd:
+            json.dump(report, fd, indent=2)
+    print("%d requests, %d clients, %d errors" % (report["requests"],
+                                                 report["concurrency"],
+                                                 report["errors"]))
+    print("p50 %.3f ms, p99 %.3f ms, max %.3f ms" % (report["p50_ms"],
+                                                     report["p99_ms"],
+                                                     report["max_ms"]))
+    print("%.0f requests/s, %.1f requests by batch" % (report["requests_per_s"],
+                                                       report["requests_per_batch"]))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
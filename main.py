@@ -22,13 +22,20 @@ It's link to the manager.kv file
 
 '''
 
+import time
+from collections import OrderedDict
+from functools import partial
+
+# The start of the process, to measure the cold start
+START_TIME = time.time()
+
 # Kivy import
 import kivy
-kivy.require('1.9.0')
+kivy.require('1.10.0')
 
 from kivy.app import App
 from kivy.lang import Builder
-from kivy.properties import ObjectProperty
+from kivy.properties import ObjectProperty, StringProperty
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.scrollview import ScrollView
 from kivy.uix.gridlayout import GridLayout
@@ -38,19 +45,50 @@ from kivy.uix.popup import Popup
 from kivy.uix.screenmanager import ScreenManager, Screen
 from kivy.uix.textinput import TextInput
 from kivy.uix.spinner import Spinner
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
+from kivy.core.clipboard import Clipboard
 from kivy.core.window import Window
+from kivy.clock import Clock
 
 # Kivy import
 from store import get_store, create_store
 from base import *
 
 import capillarymanager
+from worker import BackgroundWorker
+from livecalculation import LiveCalculation
+from compoundlist import CompoundList, parse_times
+from storeschema import DEFAULTS
+from screenregistry import ScreenRegistry
+import instrumentation
+from instrumentation import timed
 
 # When the keyboard is open resize the window
 Window.softinput_mode = 'below_target'
 
 __version__ = '2.0.1'
 
+# The screens, their class and their kv file. The menu is in manager.kv
+# which is loaded with the app.
+SCREENS = [('menu', 'MenuScreen', None),
+           ('injection', 'InjectionScreen', 'injection.kv'),
+           ('viscosity', 'ViscosityScreen', 'viscosity.kv'),
+           ('conductivity', 'ConductivityScreen', 'conductivity.kv'),
+           ('mobility', 'MobilityScreen', 'mobility.kv'),
+           ('flow', 'FlowScreen', 'flow.kv'),
+           ('about', 'AboutScreen', 'about.kv')]
+
+# A screen not used for IDLE_TIMEOUT seconds is evicted
+IDLE_TIMEOUT = 300
+
+# The period of the search of idle screens in seconds
+IDLE_CHECK_PERIOD = 60
+
+# The results are computed again LIVE_DELAY seconds after the last
+# change of a value
+LIVE_DELAY = 0.3
+
 class CEToolBoxPopup(Popup):
     '''Popup use to be herited by all Popup of the app
     '''
@@ -60,6 +98,7 @@ class ErrorPopup(CEToolBoxPopup):
     '''Popup to show in case of erreur
     '''
 
+    @timed('ErrorPopup.show_popup')
     def show_popup(self, data):
         '''Fill the popup with the error message present in data
         @param data: dictionnary with the error type (should be
@@ -70,175 +109,345 @@ class ErrorPopup(CEToolBoxPopup):
         self.ids.errormessage.text = message
         self.open()
 
-class ViscosityPopup(CEToolBoxPopup):
-    '''Popup to show the Viscosity result
+def rounded(value):
+    '''Format a result with 2 decimals'''
+    return str(round(value, 2))
+
+def scientific(value):
+    '''Format a result in scientific notation'''
+    return "{:.2E}".format(value)
+
+class ResultPopup(CEToolBoxPopup):
+    '''Popup showing results. Its labels are built once, showing the
+    popup again only updates their text.
     '''
+    # (title, result key, format, color) of each line
+    lines = []
+
+    def __init__(self, **kwargs):
+        super(ResultPopup, self).__init__(**kwargs)
+        #the warning lines are shown only when there is a warning
+        self.warning = [CEToolBoxLabel(text=add_color("Warning :", "FF0000")),
+                        CEToolBoxLabel()]
+        self.values = []
+        for title, key, form, color in self.lines:
+            self.values.append(self.add_line(title, key, form, color))
+
+    def add_line(self, title, key, form, color):
+        '''Add the labels of a result line
+        @return: the label of the value, the key, the format and the
+        color of the line
+        '''
+        value = CEToolBoxLabel()
+        self.ids.inlayout.add_widget(CEToolBoxLabel(text=add_color(title, color)))
+        self.ids.inlayout.add_widget(value)
+        return value, key, form, color
+
+    def show_warning(self, data):
+        '''Show the warning lines on top of the results if data
+        contains a warning (errcode 2), hide them otherwise
+        @return: the number of lines of the warning
+        '''
+        layout = self.ids.inlayout
+        shown = self.warning[0].parent is not None
+        if data["errcode"] != 2:
+            if shown:
+                for label in self.warning:
+                    layout.remove_widget(label)
+            return 0
+        self.warning[1].text = add_color(data["errtext"], "FF0000")
+        if not shown:
+            #the last child of a layout is shown first
+            for label in reversed(self.warning):
+                layout.add_widget(label, index=len(layout.children))
+        return 1
 
     def show_popup(self, data):
-        '''Get and show the viscosity result from the store
+        '''Update the values from data and open the popup
+        @param data: dictionnary with the error type (0 (no error) or 2
+        (warning) for this kind of popup), the error message and the
+        results as {key: (value, unit)}
+        @type data: {str: int, str: str, str: {str: (float, str)}}
         '''
-        store = get_store()
-        self.ids.inlayout.rows = 1
-        self.ids.inlayout.add_widget(CEToolBoxLabel(text=add_color("Viscosity :", "FFFFFF")))
-        value = round(store.get('Viscosity')["value"], 2)
-        viscotext = str(value)+" "+store.get('Viscosity')["unit"]
-        self.ids.inlayout.add_widget(CEToolBoxLabel(text=add_color(viscotext, "FFFFFF")))
+        results = data["results"]
+        nbwarning = self.show_warning(data)
+        for label, key, form, color in self.values:
+            value, unit = results[key]
+            label.text = add_color(form(value)+" "+unit, color)
+        self.ids.inlayout.rows = nbwarning + self.get_nblines()
         self.open()
 
-class InjectionPopup(CEToolBoxPopup):
-    '''Popup to show the Injection result
+    def get_nblines(self):
+        '''Return the number of result lines'''
+        return len(self.values)
+
+class ViscosityPopup(ResultPopup):
+    '''Popup to show the Viscosity result
     '''
+    lines = [("Viscosity :", 'Viscosity', rounded, "FFFFFF")]
 
+    @timed('ViscosityPopup.show_popup')
     def show_popup(self, data):
-        '''Get and show injections results from the store.
-        Can add an error message from data.
-        @param data: dictionnary with the error type (should be
-        always 0 (no error) or 2 for this kind of popup) and the error message
-        @type data: {str: int, str: str}
-        '''
-        store = get_store()
-        if data["errcode"] == 2:
-            self.ids.inlayout.rows = 12
-        else:
-            self.ids.inlayout.rows = 11
-        #if there is an error to print
-        if data["errcode"] == 2:
-            self.ids.inlayout.add_widget(CEToolBoxLabel(text=add_color("Warning :", "FF0000")))
-            self.ids.inlayout.add_widget(CEToolBoxLabel(text=add_color(data["errtext"], "FF0000")))
-        #Hydrodynamic injection
-        self.ids.inlayout.add_widget(CEToolBoxLabel(text=add_color("Hydrodynamic injection :", "FFFFFF")))
-        value = round(store.get('Hydrodynamicinjection')["value"], 2)
-        value = str(value)+" "+store.get('Hydrodynamicinjection')["unit"]
-        self.ids.inlayout.add_widget(CEToolBoxLabel(text=add_color(value, "FFFFFF")))
-        #Capillary volume
-        self.ids.inlayout.add_widget(CEToolBoxLabel(text=add_color("Capillary volume :", "BFBFBF")))
-        value = round(store.get('Capillaryvolume')["value"], 2)
-        value = str(value)+" "+store.get('Capillaryvolume')["unit"]
-        self.ids.inlayout.add_widget(CEToolBoxLabel(text=add_color(value, "BFBFBF")))
-        #Capillary volume to window
-        self.ids.inlayout.add_widget(CEToolBoxLabel(text=add_color("Capillary volume to window :", "FFFFFF")))
-        value = round(store.get('Capillaryvolumetowin')["value"], 2)
-        value = str(value)+" "+store.get('Capillaryvolumetowin')["unit"]
-        self.ids.inlayout.add_widget(CEToolBoxLabel(text=add_color(value, "FFFFFF")))
-        #Injection plug length
-        self.ids.inlayout.add_widget(CEToolBoxLabel(text=add_color("Injection plug length :", "BFBFBF")))
-        value = round(store.get('Injectionpluglen')["value"], 2)
-        value = str(value)+" "+store.get('Injectionpluglen')["unit"]
-        self.ids.inlayout.add_widget(CEToolBoxLabel(text=add_color(value, "BFBFBF")))
-        #Plug (% of total length)
-        self.ids.inlayout.add_widget(CEToolBoxLabel(text=add_color("Plug (% of total length) :", "FFFFFF")))
-        value = round(store.get('Pluglenpertotallen')["value"], 2)
-        value = str(value)+" "+store.get('Pluglenpertotallen')["unit"]
-        self.ids.inlayout.add_widget(CEToolBoxLabel(text=add_color(value, "FFFFFF")))
-        #Plug (% of length to window)
-        self.ids.inlayout.add_widget(CEToolBoxLabel(text=add_color("Plug (% of length to window) :", "BFBFBF")))
-        value = round(store.get('Pluglenperlentowin')["value"], 2)
-        value = str(value)+" "+store.get('Pluglenperlentowin')["unit"]
-        self.ids.inlayout.add_widget(CEToolBoxLabel(text=add_color(value, "BFBFBF")))
-        #Injected analyte
-        self.ids.inlayout.add_widget(CEToolBoxLabel(text=add_color("Injected analyte :", "FFFFFF")))
-        value = round(store.get('Injectedanalyteng')["value"], 2)
-        value = str(value)+" "+store.get('Injectedanalyteng')["unit"]
-        self.ids.inlayout.add_widget(CEToolBoxLabel(text=add_color(value, "FFFFFF")))
-        self.ids.inlayout.add_widget(CEToolBoxLabel(text=""))
-        value = round(store.get('Injectedanalytepmol')["value"], 2)
-        value = str(value)+" "+store.get('Injectedanalytepmol')["unit"]
-        self.ids.inlayout.add_widget(CEToolBoxLabel(text=add_color(value, "FFFFFF")))
-        #Injection pressure
-        # self.ids.inlayout.add_widget(CEToolBoxLabel(text=add_color("Injection pressure :", "BFBFBF")))
-        # value = round(store.get('Injectionpressure')["value"], 2)
-        # value = str(value)+" "+store.get('Injectionpressure')["unit"]
-        # self.ids.inlayout.add_widget(CEToolBoxLabel(text=add_color(value, "BFBFBF")))
-        #Flow rate
-        self.ids.inlayout.add_widget(CEToolBoxLabel(text=add_color("Flow rate :", "FFFFFF")))
-        value = round(store.get('Flowrate')["value"], 2)
-        value = str(value)+" "+store.get('Flowrate')["unit"]
-        self.ids.inlayout.add_widget(CEToolBoxLabel(text=add_color(value, "FFFFFF")))
-        #Field strength
-        self.ids.inlayout.add_widget(CEToolBoxLabel(text=add_color("Field strength :", "BFBFBF")))
-        value = round(store.get('Fieldstrength')["value"], 2)
-        value = str(value)+" "+store.get('Fieldstrength')["unit"]
-        self.ids.inlayout.add_widget(CEToolBoxLabel(text=add_color(value, "BFBFBF")))
-        #open the popup
-        self.open()
+        super(ViscosityPopup, self).show_popup(data)
 
-class ConductivityPopup(CEToolBoxPopup):
+class InjectionPopup(ResultPopup):
+    '''Popup to show the Injection result, with the warning if any
+    '''
+    lines = [("Hydrodynamic injection :", 'Hydrodynamicinjection', rounded, "FFFFFF"),
+             ("Capillary volume :", 'Capillaryvolume', rounded, "BFBFBF"),
+             ("Capillary volume to window :", 'Capillaryvolumetowin', rounded, "FFFFFF"),
+             ("Injection plug length :", 'Injectionpluglen', rounded, "BFBFBF"),
+             ("Plug (% of total length) :", 'Pluglenpertotallen', rounded, "FFFFFF"),
+             ("Plug (% of length to window) :", 'Pluglenperlentowin', rounded, "BFBFBF"),
+             ("Injected analyte :", 'Injectedanalyteng', rounded, "FFFFFF"),
+             ("", 'Injectedanalytepmol', rounded, "FFFFFF"),
+             ("Flow rate :", 'Flowrate', rounded, "FFFFFF"),
+             ("Field strength :", 'Fieldstrength', rounded, "BFBFBF")]
+
+    @timed('InjectionPopup.show_popup')
+    def show_popup(self, data):
+        super(InjectionPopup, self).show_popup(data)
+
+class ConductivityPopup(ResultPopup):
     '''Popup to show the Conductivity result
     '''
+    lines = [("Conductivity :", 'Conductivity', rounded, "FFFFFF")]
 
+    @timed('ConductivityPopup.show_popup')
     def show_popup(self, data):
-        '''Get and show the conductivity result from the store.
-        '''
-        store = get_store()
-        self.ids.inlayout.rows = 1
-        self.ids.inlayout.add_widget(CEToolBoxLabel(text=add_color("Conductivity :", "FFFFFF")))
-        value = round(store.get('Conductivity')["value"], 2)
-        conductivitytext = str(value)+" "+store.get('Conductivity')["unit"]
-        self.ids.inlayout.add_widget(CEToolBoxLabel(text=add_color(conductivitytext, "FFFFFF")))
-        self.open()
+        super(ConductivityPopup, self).show_popup(data)
 
-class FlowPopup(CEToolBoxPopup):
+class FlowPopup(ResultPopup):
     '''Popup to show the Flow results
     '''
+    lines = [("Field strength :", 'Fieldstrength', rounded, "FFFFFF"),
+             ("µEOF :", 'MicroEOF', scientific, "BFBFBF"),
+             ("Length per min :", 'Lengthpermin', rounded, "FFFFFF"),
+             ("Flow rate :", 'Flowrate', rounded, "BFBFBF")]
 
+    @timed('FlowPopup.show_popup')
     def show_popup(self, data):
-        '''Get and show Flows results from the store.
-        '''
-        store = get_store()
-        self.ids.inlayout.rows = 4
-        #Field strength
-        self.ids.inlayout.add_widget(CEToolBoxLabel(text=add_color("Field strength :", "FFFFFF")))
-        value = round(store.get('Fieldstrength')["value"], 2)
-        value = str(value)+" "+store.get('Fieldstrength')["unit"]
-        self.ids.inlayout.add_widget(CEToolBoxLabel(text=add_color(value, "FFFFFF")))
-        #µEOF
-        self.ids.inlayout.add_widget(CEToolBoxLabel(text=add_color("µEOF :","BFBFBF")))
-        value = "{:.2E}".format(store.get('MicroEOF')["value"])
-        value = value +" "+store.get('MicroEOF')["unit"]
-        self.ids.inlayout.add_widget(CEToolBoxLabel(text=add_color(value,"BFBFBF")))
-        #Length per min
-        self.ids.inlayout.add_widget(CEToolBoxLabel(text=add_color("Length per min :", "FFFFFF")))
-        value = round(store.get('Lengthpermin')["value"], 2)
-        value = str(value)+" "+store.get('Lengthpermin')["unit"]
-        self.ids.inlayout.add_widget(CEToolBoxLabel(text=add_color(value,"FFFFFF")))
-        #Flow rate
-        self.ids.inlayout.add_widget(CEToolBoxLabel(text=add_color("Flow rate :", "BFBFBF")))
-        value = round(store.get('Flowrate')["value"], 2)
-        value = str(value)+" "+store.get('Flowrate')["unit"]
-        self.ids.inlayout.add_widget(CEToolBoxLabel(text=add_color(value,"BFBFBF")))
-        #open the popup
-        self.open()
+        super(FlowPopup, self).show_popup(data)
 
-class MobilityPopup(CEToolBoxPopup):
-    '''Popup to show the Mobility results
+class MobilityPopup(ResultPopup):
+    '''Popup to show the Mobility results. There is a µEP line per
+    compound, the lines are kept when the number of compounds
+    decreases and reused when it increases again.
     '''
+    lines = [("µEOF :", 'MicroEOF', scientific, "FFFFFF")]
+
+    def __init__(self, **kwargs):
+        super(MobilityPopup, self).__init__(**kwargs)
+        self.nbmicroep = 0
+        #the µEP lines: the title, the value, the format and the color
+        self.microep_lines = []
 
+    def set_nbmicroep(self, nbmicroep):
+        '''Show nbmicroep µEP lines
+        '''
+        layout = self.ids.inlayout
+        while len(self.microep_lines) < nbmicroep:
+            i = len(self.microep_lines) + 1
+            color = "BFBFBF" if i%2 != 0 else "FFFFFF"
+            title = CEToolBoxLabel(text=add_color("µEP"+str(i)+" :", color))
+            self.microep_lines.append((title, CEToolBoxLabel(), color))
+        for i in range(self.nbmicroep, nbmicroep):
+            title, value, color = self.microep_lines[i]
+            layout.add_widget(title)
+            layout.add_widget(value)
+        for i in range(nbmicroep, self.nbmicroep):
+            title, value, color = self.microep_lines[i]
+            layout.remove_widget(title)
+            layout.remove_widget(value)
+        self.nbmicroep = nbmicroep
+
+    @timed('MobilityPopup.show_popup')
     def show_popup(self, data):
-        '''Get and show Mobility results from the store.
+        values, unit = data["results"]['MicroEP']
+        self.set_nbmicroep(len(values))
+        for i, value in enumerate(values):
+            title, label, color = self.microep_lines[i]
+            label.text = add_color(scientific(value)+" "+unit, color)
+        super(MobilityPopup, self).show_popup(data)
+
+    def get_nblines(self):
+        '''Return the number of result lines'''
+        return len(self.values) + self.nbmicroep
+
+# The popups already built, by class (see get_popup)
+_popups = {}
+
+def get_popup(popup_class):
+    '''Return the popup of a class, build it the first time
+    '''
+    try:
+        return _popups[popup_class]
+    except KeyError:
+        popup = _popups[popup_class] = popup_class()
+        return popup
+
+def show_results(popup_class, errcode, errtext, results=()):
+    '''Show the results in the popup of popup_class, or the error in
+    the error popup
+    @param results: the results computed by CapillaryManager
+    @type results: [(str, float, str)]
+    @return: the popup shown
+    '''
+    data = {}
+    data["errcode"] = errcode
+    data["errtext"] = errtext
+    data["results"] = dict((key, (value, unit)) for key, value, unit in results)
+    if errcode == 1:
+        popup = get_popup(ErrorPopup)
+    else:
+        popup = get_popup(popup_class)
+    popup.show_popup(data)
+    return popup
+
+# The calculations and the writes of the store run on this thread, the
+# results are shown on the main thread
+worker = BackgroundWorker(lambda func: Clock.schedule_once(lambda dt: func()))
+
+def read_entries(screen, keys):
+    '''Return the values entered in a screen as store entries, the
+    unit of a value is read from the widget <key>Unit
+    @raise ValueError: a value is empty or is not a number
+    @rtype: OrderedDict
+    '''
+    entries = OrderedDict()
+    for key in keys:
+        entries[key] = {"value": float(screen.ids[key].text),
+                        "unit": screen.ids[key+'Unit'].text}
+    return entries
+
+def run_calculation(screen, name, entries, method, popup_class):
+    '''Save the entries and compute the results of a screen in the
+    background, then show them in the popup of popup_class. The taps on
+    the button while the results are pending are ignored.
+    @param method: the CapillaryManager method computing the results
+    @type method: str
+    '''
+    def show(result):
+        screen._popup = show_results(popup_class, *result)
+    def show_error(error):
+        screen._popup = show_results(ErrorPopup, 1, str(error))
+    worker.submit(name, capillarymanager.save_and_compute, (entries, method),
+                  on_result=show, on_error=show_error)
+
+class LiveScreen(Screen):
+    '''A screen showing its results while the values are typed. The
+    changes are debounced: the results are computed LIVE_DELAY seconds
+    after the last change, from the values kept in memory by a
+    LiveCalculation, and only the results which changed are formatted
+    again. The store is written only by the Calculate button.
+    '''
+    # The keys of the values of the screen
+    keys = ()
+    # The CapillaryCalculator method computing the results
+    method = None
+    # The popup showing the results, the live results use its lines
+    popup_class = None
+
+    def __init__(self, **kwargs):
+        super(LiveScreen, self).__init__(**kwargs)
+        self.live = None
+        self._changed = set()
+        self._live_bound = False
+        #the text of each result shown
+        self._live_texts = {}
+        self._live_trigger = Clock.create_trigger(self.live_update, LIVE_DELAY)
+
+    def get_live_lines(self):
+        '''Return the (title, result key, format, color) of the
+        results shown
         '''
-        store = get_store()
-        self.ids.inlayout.rows = 1 + store.get('Nbtimecompound')["value"]
-        #the first µEOF
-        self.ids.inlayout.add_widget(CEToolBoxLabel(text=add_color("µEOF :","FFFFFF")))
-        value = "{:.2E}".format(store.get('MicroEOF')["value"])
-        value = value+" "+store.get('MicroEOF')["unit"]
-        self.ids.inlayout.add_widget(CEToolBoxLabel(text=add_color(value,"FFFFFF")))
-        #add all the µEP
-        for i in range(1, store.get('Nbtimecompound')["value"]+1):
-            if i%2 != 0:
-                color = "BFBFBF"
-            else:
-                color = "FFFFFF"
-            self.ids.inlayout.add_widget(CEToolBoxLabel(text=add_color("µEP"+str(i)+" :", color)))
-            value = "{:.2E}".format(store.get('MicroEP'+str(i))["value"])
-            value = value +" "+store.get('MicroEP'+str(i))["unit"]
-            self.ids.inlayout.add_widget(CEToolBoxLabel(text=add_color(value,color)))
-        #open the popup
-        self.open()
+        return self.popup_class.lines
+
+    def start_live(self):
+        '''Show the results of the values of the store and follow the
+        changes of the values. Called once the values are shown.
+        '''
+        if not self._live_bound:
+            for key in self.keys:
+                self.ids[key].bind(text=partial(self.on_entry_text, key))
+                self.ids[key+'Unit'].bind(text=partial(self.on_entry_text, key))
+            self._live_bound = True
+        self._live_trigger.cancel()
+        self._changed.clear()
+        self._live_texts.clear()
+        self.live = LiveCalculation(get_store(), self.method)
+        self.show_live(*self.live.compute())
+
+    def on_entry_text(self, key, *args):
+        '''A value changed, compute the results once the typing stops
+        '''
+        if self.live is not None:
+            self._changed.add(key)
+            self._live_trigger()
+
+    def read_live_value(self, key):
+        '''Return the value and the unit of key entered in the screen
+        @raise ValueError: the value is empty or is not a number
+        '''
+        return float(self.ids[key].text), self.ids[key+'Unit'].text
+
+    def reset(self):
+        '''Executed when cliqued on the reset button, show the default
+        values of the store schema (see storeschema.DEFAULTS)
+        '''
+        for key in self.keys:
+            self.ids[key].text = str(DEFAULTS[key]["value"])
+            self.ids[key+'Unit'].text = DEFAULTS[key]["unit"]
+
+    def live_update(self, *args):
+        '''Update the changed values and show the results again. The
+        invalid values are kept until they are fixed.
+        '''
+        changed, self._changed = self._changed, set()
+        for key in changed:
+            try:
+                value, unit = self.read_live_value(key)
+            except ValueError:
+                self._changed.add(key)
+                continue
+            self.live.set_value(key, value, unit)
+        if self._changed:
+            self.show_live(1, "Empty field not allowed", [])
+        else:
+            self.show_live(*self.live.compute())
 
-class InjectionScreen(Screen):
+    def show_live(self, errcode, errtext, changed):
+        '''Format the results which changed and show the results
+        '''
+        if errcode == 1:
+            #show all the results once the error is fixed
+            self.live.results.clear()
+            self._live_texts.clear()
+            self.ids.liveresults.text = add_color(errtext, "FF0000")
+            return
+        formats = dict((key, (title, form, color))
+                       for title, key, form, color in self.get_live_lines())
+        for key, value, unit in changed:
+            title, form, color = formats[key]
+            if isinstance(value, list):
+                text = "\n".join(add_color(title+str(i+1)+" : "+form(item)+" "+unit, color)
+                                 for i, item in enumerate(value))
+            else:
+                text = add_color(title+" "+form(value)+" "+unit, color)
+            self._live_texts[key] = text
+        lines = [self._live_texts[key] for title, key, form, color
+                 in self.get_live_lines() if key in self._live_texts]
+        if errcode == 2:
+            lines.insert(0, add_color("Warning : "+errtext, "FF0000"))
+        self.ids.liveresults.text = "\n".join(lines)
+
+class InjectionScreen(LiveScreen):
     '''The screen for Injection
     '''
+    keys = ('Capillary', 'Towindow', 'Idiameter', 'Pressure', 'Time',
+            'Viscosity', 'Concentration', 'Molweight', 'Voltage')
+    method = 'compute_injection_result'
+    popup_class = InjectionPopup
 
     def on_pre_enter(self):
         '''Special function lauch at the clic of the button to go
@@ -264,57 +473,26 @@ class InjectionScreen(Screen):
         self.ids.MolweightUnit.text = store.get('Molweight')["unit"]
         self.ids.Voltage.text = str(store.get('Voltage')["value"])
         self.ids.VoltageUnit.text = store.get('Voltage')["unit"]
+        self.start_live()
 
     def show_injection_results(self):
         '''Launch when clicked on result.
-        Compute, store the computation and lauch a popup
+        Compute and store the computation in the background, then
+        lauch a popup
         '''
-        #save data
-        store = get_store()
         try:
-            store.put('Capillary', value=float(self.ids.Capillary.text),
-                      unit=self.ids.CapillaryUnit.text)
-            store.put('Towindow', value=float(self.ids.Towindow.text),
-                      unit=self.ids.TowindowUnit.text)
-            store.put('Idiameter', value=float(self.ids.Idiameter.text),
-                      unit=self.ids.IdiameterUnit.text)
-            store.put('Pressure', value=float(self.ids.Pressure.text),
-                      unit=self.ids.PressureUnit.text)
-            store.put('Time', value=float(self.ids.Time.text),
-                      unit=self.ids.TimeUnit.text)
-            store.put('Viscosity', value=float(self.ids.Viscosity.text),
-                      unit=self.ids.ViscosityUnit.text)
-            store.put('Concentration',
-                      value=float(self.ids.Concentration.text),
-                      unit=self.ids.ConcentrationUnit.text)
-            store.put('Molweight', value=float(self.ids.Molweight.text),
-                      unit=self.ids.MolweightUnit.text)
-            store.put('Voltage', value=float(self.ids.Voltage.text),
-                      unit=self.ids.VoltageUnit.text)
+            entries = read_entries(self, self.keys)
         except ValueError:
-            data = {}
-            data["errcode"] = 1
-            data["errtext"] = "Empty field not allowed"
-            self._popup = ErrorPopup()
-            self._popup.show_popup(data)
+            self._popup = show_results(ErrorPopup, 1, "Empty field not allowed")
             return
-        # Add data
-        capillary_manager = capillarymanager.CapillaryManager()
-
-        # set default data to capillary
-        errcode, errtext = capillary_manager.save_injection_result()
-        data = {}
-        data["errcode"] = errcode
-        data["errtext"] = errtext
-        if data["errcode"] == 1:
-            self._popup = ErrorPopup()
-        else:
-            self._popup = InjectionPopup()
-        self._popup.show_popup(data)
+        run_calculation(self, 'injection', entries, 'save_injection_result', InjectionPopup)
 
-class ViscosityScreen(Screen):
+class ViscosityScreen(LiveScreen):
     '''The screen for Viscosity
     '''
+    keys = ('Capillary', 'Towindow', 'Idiameter', 'Pressure', 'Detectiontime')
+    method = 'compute_vicosity_result'
+    popup_class = ViscosityPopup
 
     def on_pre_enter(self):
         '''Special function lauch at the clic of the button to go
@@ -332,46 +510,26 @@ class ViscosityScreen(Screen):
         self.ids.PressureUnit.text = store.get('Pressure')["unit"]
         self.ids.Detectiontime.text = str(store.get('Detectiontime')["value"])
         self.ids.DetectiontimeUnit.text = store.get('Detectiontime')["unit"]
+        self.start_live()
 
     def show_viscosity_results(self):
-        '''Launch when clicked on result
-        Compute, store the computation and lauch a popup
+        '''Launch when clicked on result.
+        Compute and store the computation in the background, then
+        lauch a popup
         '''
-        #save data
-        store = get_store()
         try:
-            store.put('Capillary', value=float(self.ids.Capillary.text),
-                      unit=self.ids.CapillaryUnit.text)
-            store.put('Towindow', value=float(self.ids.Towindow.text),
-                      unit=self.ids.TowindowUnit.text)
-            store.put('Idiameter', value=float(self.ids.Idiameter.text),
-                      unit=self.ids.IdiameterUnit.text)
-            store.put('Pressure', value=float(self.ids.Pressure.text),
-                      unit=self.ids.PressureUnit.text)
-            store.put('Detectiontime', value=float(self.ids.Detectiontime.text),
-                      unit=self.ids.DetectiontimeUnit.text)
+            entries = read_entries(self, self.keys)
         except ValueError:
-            data = {}
-            data["errcode"] = 1
-            data["errtext"] = "Empty field not allowed"
-            self._popup = ErrorPopup()
-            self._popup.show_popup(data)
+            self._popup = show_results(ErrorPopup, 1, "Empty field not allowed")
             return
-        #get and use error codes
-        capillary_manager = capillarymanager.CapillaryManager()
-        errcode, errtext = capillary_manager.save_vicosity_result()
-        data = {}
-        data["errcode"] = errcode
-        data["errtext"] = errtext
-        if data["errcode"] == 1:
-            self._popup = ErrorPopup()
-        else:
-            self._popup = ViscosityPopup()
-        self._popup.show_popup(data)
+        run_calculation(self, 'viscosity', entries, 'save_vicosity_result', ViscosityPopup)
 
-class ConductivityScreen(Screen):
+class ConductivityScreen(LiveScreen):
     '''The screen for conductivity
     '''
+    keys = ('Capillary', 'Towindow', 'Idiameter', 'Voltage', 'Electriccurrent')
+    method = 'compute_conductivy_result'
+    popup_class = ConductivityPopup
 
     def on_pre_enter(self):
         '''Special function lauch at the clic of the button to go
@@ -389,45 +547,26 @@ class ConductivityScreen(Screen):
         self.ids.VoltageUnit.text = store.get('Voltage')["unit"]
         self.ids.Electriccurrent.text = str(store.get('Electriccurrent')["value"])
         self.ids.ElectriccurrentUnit.text = store.get('Electriccurrent')["unit"]
+        self.start_live()
 
     def show_conductivity_results(self):
-        '''Launch when clicked on result
-        Compute, store the computation and lauch a popup
+        '''Launch when clicked on result.
+        Compute and store the computation in the background, then
+        lauch a popup
         '''
-        store = get_store()
         try:
-            store.put('Capillary', value=float(self.ids.Capillary.text),
-                      unit=self.ids.CapillaryUnit.text)
-            store.put('Towindow', value=float(self.ids.Towindow.text),
-                      unit=self.ids.TowindowUnit.text)
-            store.put('Idiameter', value=float(self.ids.Idiameter.text),
-                      unit=self.ids.IdiameterUnit.text)
-            store.put('Voltage', value=float(self.ids.Voltage.text),
-                      unit=self.ids.VoltageUnit.text)
-            store.put('Electriccurrent', value=float(self.ids.Electriccurrent.text),
-                      unit=self.ids.ElectriccurrentUnit.text)
+            entries = read_entries(self, self.keys)
         except ValueError:
-            data = {}
-            data["errcode"] = 1
-            data["errtext"] = "Empty field not allowed"
-            self._popup = ErrorPopup()
-            self._popup.show_popup(data)
+            self._popup = show_results(ErrorPopup, 1, "Empty field not allowed")
             return
-        #get and save error code
-        capillary_manager = capillarymanager.CapillaryManager()
-        errcode, errtext = capillary_manager.save_conductivy_result()
-        data = {}
-        data["errcode"] = errcode
-        data["errtext"] = errtext
-        if data["errcode"] == 1:
-            self._popup = ErrorPopup()
-        else:
-            self._popup = ConductivityPopup()
-        self._popup.show_popup(data)
+        run_calculation(self, 'conductivity', entries, 'save_conductivy_result', ConductivityPopup)
 
-class FlowScreen(Screen):
+class FlowScreen(LiveScreen):
     '''The screen for the flow
     '''
+    keys = ('Capillary', 'Towindow', 'Idiameter', 'Voltage', 'Electroosmosis')
+    method = 'compute_flow_result'
+    popup_class = FlowPopup
 
     def on_pre_enter(self):
         '''This special function launch at the clic of the button to go
@@ -445,85 +584,134 @@ class FlowScreen(Screen):
         self.ids.VoltageUnit.text = store.get('Voltage')["unit"]
         self.ids.Electroosmosis.text = str(store.get('Electroosmosis')["value"])
         self.ids.ElectroosmosisUnit.text = store.get('Electroosmosis')["unit"]
+        self.start_live()
 
     def show_flow_results(self):
-        '''Launch when clicked on result
-        Compute, store the computation and lauch a popup
+        '''Launch when clicked on result.
+        Compute and store the computation in the background, then
+        lauch a popup
         '''
-        store = get_store()
         try:
-            store.put('Capillary', value=float(self.ids.Capillary.text),
-                      unit=self.ids.CapillaryUnit.text)
-            store.put('Towindow', value=float(self.ids.Towindow.text),
-                      unit=self.ids.TowindowUnit.text)
-            store.put('Idiameter', value=float(self.ids.Idiameter.text),
-                      unit=self.ids.IdiameterUnit.text)
-            store.put('Voltage', value=float(self.ids.Voltage.text),
-                      unit=self.ids.VoltageUnit.text)
-            store.put('Electroosmosis', value=float(self.ids.Electroosmosis.text),
-                      unit=self.ids.ElectroosmosisUnit.text)
+            entries = read_entries(self, self.keys)
         except ValueError:
-            data = {}
-            data["errcode"] = 1
-            data["errtext"] = "Empty field not allowed"
-            self._popup = ErrorPopup()
-            self._popup.show_popup(data)
+            self._popup = show_results(ErrorPopup, 1, "Empty field not allowed")
             return
-        #get and save errors and value
-        capillary_manager = capillarymanager.CapillaryManager()
-        errcode, errtext = capillary_manager.save_flow_result()
-        data = {}
-        data["errcode"] = errcode
-        data["errtext"] = errtext
-        if data["errcode"] == 1:
-            self._popup = ErrorPopup()
-        else:
-            self._popup = FlowPopup()
-        self._popup.show_popup(data)
+        run_calculation(self, 'flow', entries, 'save_flow_result', FlowPopup)
+
+class CompoundRow(RecycleDataViewBehavior, BoxLayout):
+    '''A row of the compound list: the name, the migration time and
+    its unit. The rows are reused by the RecycleView, the texts entered
+    are saved in the CompoundList of the view.
+    '''
+    index = None
+    label = StringProperty()
+    value = StringProperty()
+    unit = StringProperty()
+
+    def refresh_view_attrs(self, rv, index, data):
+        '''Show the compound index of the RecycleView rv
+        '''
+        self.rv = rv
+        self.index = None
+        super(CompoundRow, self).refresh_view_attrs(rv, index, data)
+        self.index = index
+
+    def on_value_text(self, text):
+        '''Save the time entered'''
+        if self.index is not None:
+            self.value = text
+            self.rv.set_compound(self.index, value=text)
+
+    def on_unit_text(self, text):
+        '''Save the unit selected'''
+        if self.index is not None:
+            self.unit = text
+            self.rv.set_compound(self.index, unit=text)
+
+class CompoundRecycleView(RecycleView):
+    '''The list of the compounds, only the visible rows are built. The
+    on_edit event is dispatched when a compound changes.
+    '''
+    __events__ = ('on_edit',)
+
+    def __init__(self, **kwargs):
+        self.compounds = CompoundList.default()
+        super(CompoundRecycleView, self).__init__(**kwargs)
+
+    def set_compounds(self, compounds):
+        '''Show a new CompoundList
+        '''
+        self.compounds = compounds
+        self.data = compounds.get_rows()
+        self.dispatch('on_edit')
+
+    def set_compound(self, index, value=None, unit=None):
+        '''Save the text entered in a row in the model and in the data
+        of the row, without refreshing the view
+        '''
+        if value is not None:
+            self.compounds.set_value(index, value)
+            self.data[index]["value"] = value
+        if unit is not None:
+            self.compounds.set_unit(index, unit)
+            self.data[index]["unit"] = unit
+        self.dispatch('on_edit')
+
+    def on_edit(self):
+        pass
+
+class ImportPopup(CEToolBoxPopup):
+    '''Popup to import migration times pasted from a spreadsheet or
+    a text file
+    '''
+
+    def show_popup(self, screen):
+        '''Open the popup, the times are imported in screen
+        '''
+        self.screen = screen
+        self.ids.importerror.text = ""
+        self.open()
+
+    def paste(self):
+        '''Paste the clipboard in the text input
+        '''
+        self.ids.importtext.text = Clipboard.paste() or ""
 
-class MobilityScreen(Screen):
-    '''The mobility Screen
+    def import_times(self):
+        '''Replace the compounds of the screen by the times entered
+        '''
+        try:
+            values, units = parse_times(self.ids.importtext.text,
+                                        self.ids.importunit.text)
+        except ValueError as error:
+            self.ids.importerror.text = add_color(str(error), "FF0000")
+            return
+        self.screen.import_times(values, units)
+        self.dismiss()
+
+class MobilityScreen(LiveScreen):
+    '''The mobility Screen. The compounds are edited in memory and
+    written to the store, as a single entry, when the results are
+    computed, when the times are imported and when the screen is left.
     '''
+    keys = ('Capillary', 'Towindow', 'Voltage', 'Electroosmosis')
+    method = 'compute_mobility_result'
+    popup_class = MobilityPopup
 
     def show_mobility_results(self):
         '''Launch when clicked on result
-        Compute, store the computation and lauch a popup
+        Compute and store the computation in the background, then
+        lauch a popup
         '''
-        store = get_store()
         try:
-            store.put('Capillary', value=float(self.ids.Capillary.text),
-                      unit=self.ids.CapillaryUnit.text)
-            store.put('Towindow', value=float(self.ids.Towindow.text),
-                      unit=self.ids.TowindowUnit.text)
-            store.put('Voltage', value=float(self.ids.Voltage.text),
-                      unit=self.ids.VoltageUnit.text)
-            store.put('Electroosmosis', value=float(self.ids.Electroosmosis.text),
-                      unit=self.ids.ElectroosmosisUnit.text)
-            store.put('Timecompound1', value=float(self.ids.Timecompound1.text),
-                      unit=self.ids.Timecompound1Unit.text)
+            entries = read_entries(self, self.keys)
+            #save all the timecompound in a single entry
+            entries['Timecompounds'] = self.ids.compoundlist.compounds.to_entry()
         except ValueError:
-            data = {}
-            data["errcode"] = 1
-            data["errtext"] = "Empty field not allowed"
-            self._popup = ErrorPopup()
-            self._popup.show_popup(data)
+            self._popup = show_results(ErrorPopup, 1, "Empty field not allowed")
             return
-        #save all the timecompound
-        for sublist in self.timecompoundlist:
-            store.put(sublist[1].id, value=float(sublist[1].text),
-                      unit=sublist[2].text)
-        #get and save error and values
-        capillary_manager = capillarymanager.CapillaryManager()
-        errcode, errtext = capillary_manager.save_mobility_result()
-        data = {}
-        data["errcode"] = errcode
-        data["errtext"] = errtext
-
-        if data["errcode"] == 1:
-            self._popup = ErrorPopup()
-        else:
-            self._popup = MobilityPopup()
-        self._popup.show_popup(data)
+        run_calculation(self, 'mobility', entries, 'save_mobility_result',
+                        MobilityPopup)
 
     def on_pre_enter(self):
         '''Special function lauch at the clic of the button to go
@@ -539,104 +727,75 @@ class MobilityScreen(Screen):
         self.ids.VoltageUnit.text = store.get('Voltage')["unit"]
         self.ids.Electroosmosis.text = str(store.get('Electroosmosis')["value"])
         self.ids.ElectroosmosisUnit.text = store.get('Electroosmosis')["unit"]
-        self.ids.Timecompound1.text = str(store.get('Timecompound1')["value"])
-        self.ids.Timecompound1Unit.text = store.get('Timecompound1')["unit"]
-        #set the number of rows
-        self.ids.inlayout.rows = 6 + store.get('Nbtimecompound')["value"]
-        #force the good size
-        self.ids.tscrollview.change_child_height(self.ids.tscrollview.height)
-        #set the rest of the time compound
-        self.timecompoundlist = []
-        for i in range(2, store.get('Nbtimecompound')["value"]+1):
-            timecompount = CEToolBoxLabel(text="Time compound "+str(i))
-            timecompountvalue = CEToolBoxTextInput(text=str(store.get('Timecompound'+str(i))["value"]),
-                                                   id='Timecompound'+str(i))
-            timecompountunit =  CEToolBoxSpinner(text=store.get('Timecompound'+str(i))["unit"],
-                                                 id='Timecompound'+str(i)+'Unit',
-                                                 values=["s", "min"])
-            self.ids.inlayout.add_widget(timecompount)
-            self.ids.inlayout.add_widget(timecompountvalue)
-            self.ids.inlayout.add_widget(timecompountunit)
-            tosave = [timecompount, timecompountvalue, timecompountunit]
-            self.timecompoundlist.append(tosave)
-        #create the button add and del
-        self.add_button = CEToolBoxButton(text="Add", id="addbutton", on_release=self.add_line)
-        self.ids.inlayout.add_widget(self.add_button)
-        self.del_button = CEToolBoxButton(text="Del", id="delbutton", on_release=self.del_line)
-        self.ids.inlayout.add_widget(self.del_button)
-
-    def add_line(self, buttoninstance):
+        compounds = CompoundList.from_entry(store.get('Timecompounds'))
+        self.ids.compoundlist.set_compounds(compounds)
+        self.start_live()
+
+    def get_live_lines(self):
+        '''Return the lines of the results, with the µEP of the
+        compounds
+        '''
+        return self.popup_class.lines + [("µEP", 'MicroEP', scientific, "BFBFBF")]
+
+    def read_live_value(self, key):
+        '''Return the value and the unit of key, the compounds are read
+        from the compound list
+        '''
+        if key == 'Timecompounds':
+            entry = self.ids.compoundlist.compounds.to_entry()
+            return entry["value"], entry["unit"]
+        return super(MobilityScreen, self).read_live_value(key)
+
+    def add_line(self):
         '''Add a line of timecompount
-        @param buttoninstance: the instance of the button (not used)
         '''
-        #del and create again to respect the order
-        self.ids.inlayout.remove_widget(self.add_button)
-        self.ids.inlayout.remove_widget(self.del_button)
-        #create the new line
-        store = get_store()
-        lastval = store.get('Nbtimecompound')["value"]
-        store.put('Nbtimecompound', value=1+lastval)
-        self.ids.inlayout.rows = 5 + store.get('Nbtimecompound')["value"]
-        #add the widget
-        newval = str(store.get('Nbtimecompound')["value"])
-        timecompount = CEToolBoxLabel(text="Time compound "+newval)
-        timecompountvalue = CEToolBoxTextInput(text=str(1.0),
-                                               id='Timecompound'+newval)
-        timecompountunit =  CEToolBoxSpinner(text=u"min",
-                                             id='Timecompound'+newval+'Unit',
-                                             values=["s", "min"])
-        store.put('Timecompound'+newval, value=1.0, unit="min")
-        self.ids.inlayout.add_widget(timecompount)
-        self.ids.inlayout.add_widget(timecompountvalue)
-        self.ids.inlayout.add_widget(timecompountunit)
-        tosave = [timecompount, timecompountvalue, timecompountunit]
-        self.timecompoundlist.append(tosave)
-        #recreate the button
-        self.add_button = CEToolBoxButton(text="Add", id="addbutton", on_release=self.add_line)
-        self.ids.inlayout.add_widget(self.add_button)
-        self.del_button = CEToolBoxButton(text="Del", id="delbutton", on_release=self.del_line)
-        self.ids.inlayout.add_widget(self.del_button)
-        self.ids.inlayout.rows = 6 + store.get('Nbtimecompound')["value"]
-        #force the good size
-        self.ids.tscrollview.change_child_height(self.ids.tscrollview.height)
-
-    def del_line(self, buttoninstance):
+        compoundlist = self.ids.compoundlist
+        compoundlist.data.append(compoundlist.compounds.add())
+        self.on_entry_text('Timecompounds')
+
+    def del_line(self):
         '''Delete a line of timecompound (do nothing if there is only
         one timecompound line)
-        @param buttoninstance: the instance of the button (not used)
+        '''
+        compoundlist = self.ids.compoundlist
+        if compoundlist.compounds.remove_last():
+            compoundlist.data.pop()
+            self.on_entry_text('Timecompounds')
+
+    def show_import(self):
+        '''Open the popup to import migration times
+        '''
+        self._popup = get_popup(ImportPopup)
+        self._popup.show_popup(self)
+
+    def import_times(self, values, units):
+        '''Replace the compounds by imported times and save them
+        '''
+        compounds = CompoundList(values, units)
+        self.ids.compoundlist.set_compounds(compounds)
+        get_store().put('Timecompounds', **compounds.to_entry())
+
+    def save_compounds(self):
+        '''Save the compounds in the store if all the times are valid
         '''
         try:
-            widgets = self.timecompoundlist.pop()
-        except IndexError:
+            entry = self.ids.compoundlist.compounds.to_entry()
+        except ValueError:
             return
-        for w in widgets:
-            self.ids.inlayout.remove_widget(w)
-        #del the line in the jsonfile
         store = get_store()
-        lastval = store.get('Nbtimecompound')["value"]
-        store.delete('Timecompound'+str(lastval))
-        store.put('Nbtimecompound', value=lastval-1)
-        self.ids.inlayout.rows = 6 + store.get('Nbtimecompound')["value"]
-        #force the good size
-        self.ids.tscrollview.change_child_height(self.ids.tscrollview.height)
+        if store.get('Timecompounds') != entry:
+            store.put('Timecompounds', **entry)
 
     def on_leave(self):
-        '''When the screen is leaved, delete all widget generated from
-        the jsonfile'''
-        for widgets in self.timecompoundlist:
-            for w in widgets:
-                self.ids.inlayout.remove_widget(w)
-        self.ids.inlayout.remove_widget(self.add_button)
-        self.ids.inlayout.remove_widget(self.del_button)
+        '''When the screen is leaved, save the compounds'''
+        self.save_compounds()
 
     def reset(self):
         '''Executed when cliqued on the reset button
-        set the value of nbtimecompound at 1 and delete lines
+        keep a single compound with its default value
         '''
-        store = get_store()
-        nbval = store.get('Nbtimecompound')["value"]
-        for i in range(1, nbval):
-            self.del_line(1)
+        super(MobilityScreen, self).reset()
+        self.ids.compoundlist.set_compounds(CompoundList.default())
 
 class AboutScreen(Screen):
     '''The About screen
@@ -647,45 +806,120 @@ class AboutScreen(Screen):
         '''
         text = open('data/text/about.txt', 'r')
         self.ids.aboutlabel.text = '''[b][size=20]CEToolBox v'''+ __version__ +'''[/size][/b]\n\n''' + text.read()
+        cold_start = App.get_running_app().cold_start
+        if cold_start is not None:
+            self.ids.aboutlabel.text += "\n\n[i]Cold start: %.2f s[/i]" % cold_start
 
 class MenuScreen(Screen):
     '''The menu screen
     '''
     pass
 
+class LazyScreenManager(ScreenManager):
+    '''ScreenManager building a screen of the registry the first time
+    it becomes the current screen
+    '''
+
+    def __init__(self, registry, **kwargs):
+        self.registry = registry
+        super(LazyScreenManager, self).__init__(**kwargs)
+
+    def on_current(self, instance, value):
+        '''Add the screen before switching to it
+        '''
+        if value in self.registry and value not in self.screen_names:
+            self.add_widget(self.registry.get(value))
+        self.registry.touch(value)
+        super(LazyScreenManager, self).on_current(instance, value)
+
+    def evict_idle_screens(self, timeout):
+        '''Remove the screens not used for timeout seconds, except
+        the current screen and the menu
+        '''
+        for name in self.registry.idle_screens(timeout,
+                                               keep=(self.current, 'menu')):
+            screen = self.registry.evict(name)
+            if screen is not None:
+                self.remove_widget(screen)
+
 class ManagerApp(App):
     '''The app
     '''
     title = "CEToolBox"
-    create_store()
+    # the time from the start of the process to the first frame
+    cold_start = None
+    _store_created = False
 
     def build(self):
-        '''Add all the screen to the ScreenManager and
-        lauch the post_build_init method
-        '''
-        self.sm = ScreenManager()
-        self.sm.add_widget(MenuScreen(name='menu'))
-        self.sm.add_widget(InjectionScreen(name='injection'))
-        self.sm.add_widget(ViscosityScreen(name='viscosity'))
-        self.sm.add_widget(ConductivityScreen(name='conductivity'))
-        self.sm.add_widget(MobilityScreen(name='mobility'))
-        self.sm.add_widget(FlowScreen(name='flow'))
-        self.sm.add_widget(AboutScreen(name='about'))
+        '''Register the screens and lauch the post_build_init method.
+        Only the menu is built, the other screens are built the first
+        time they are shown.
+        '''
+        registry = ScreenRegistry(self.load_screen_rules)
+        for name, classname, rules in SCREENS:
+            registry.register(name, self.screen_factory(classname), rules)
+        self.sm = LazyScreenManager(registry)
+        self.sm.current = 'menu'
         self.bind(on_start=self.post_build_init)
         return self.sm
 
+    def screen_factory(self, classname):
+        '''Return the function building a screen, the store is created
+        before the first screen which uses it
+        '''
+        def factory(**kwargs):
+            if classname != 'MenuScreen':
+                self.init_store()
+            return globals()[classname](**kwargs)
+        return factory
+
+    def load_screen_rules(self, filename):
+        '''Parse the kv file of a screen and the rules shared by all
+        the screens
+        '''
+        load_base_rules()
+        Builder.load_file(filename)
+
+    def init_store(self, *args):
+        '''Create the store with its default values, once
+        '''
+        if not self._store_created:
+            create_store()
+            self._store_created = True
+
     def post_build_init(self, *args):
-        '''Bind the keyboard to go_menu method
+        '''Bind the keyboard to go_menu method, create the store after
+        the first frame and start the eviction of idle screens. SIGUSR1
+        writes the instrumentation statistics when it is enabled.
         '''
         win = Window
         win.bind(on_keyboard=self.go_menu)
+        if instrumentation.is_enabled():
+            instrumentation.install_signal_handler()
+        Clock.schedule_once(self.on_first_frame)
+        Clock.schedule_interval(self.evict_idle_screens, IDLE_CHECK_PERIOD)
+
+    def on_first_frame(self, *args):
+        '''Measure the cold start and create the store
+        '''
+        self.cold_start = time.time() - START_TIME
+        self.init_store()
+
+    def evict_idle_screens(self, *args):
+        '''Remove the screens not used for IDLE_TIMEOUT seconds
+        '''
+        self.sm.evict_idle_screens(IDLE_TIMEOUT)
 
     def go_menu(self, window, keycode1, keycode2, text, modifiers):
         ''' executed for each key press, if the key is return then
-        go to the menu screen'''
+        go to the menu screen. F12 writes the instrumentation
+        statistics when the instrumentation is enabled'''
         if keycode1 in [27, 1001]:
             self.sm.current = "menu"
             return True
+        if keycode1 == 293 and instrumentation.is_enabled():
+            instrumentation.dump()
+            return True
         return False
 
     def on_pause(self):
@@ -693,6 +927,8 @@ class ManagerApp(App):
         screen we was on'''
         store = get_store()
         store.put("pause", value=self.sm.current)
+        #the system may lack memory, keep only the current screen
+        self.sm.evict_idle_screens(0)
         return True
 
     def on_resume(self):
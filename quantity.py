@@ -0,0 +1,152 @@
+# -*. coding: utf-8 -*-
+# Copyright (c) 2015 CNRS and University of Strasbourg
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+'''
+quantity.py
+===========
+
+A Quantity is a magnitude (a float, a list or a NumPy array of values)
+and its unit. The unit is checked when the quantity is built: it must
+be known (see convertunits) and, if a dimension is expected, belong to
+that dimension, so a length entered in seconds is refused where the
+value enters the application instead of giving a wrong result later.
+
+The values entered are normalized once, to the unit the formulas use,
+when they are read:
+
+    from quantity import Quantity
+
+    length = Quantity.from_entry({"value": 0.6, "unit": "m"}, 'length', u"cm")
+    length.magnitude                       # 60.0
+    times = Quantity.from_entry({"value": [1.0, 30.0], "unit": ["min", "s"]},
+                                'time', u"s")
+    times.magnitude                        # [60.0, 30.0]
+    Quantity(2.0, u"µA", 'length')         # UnitError
+
+'''
+from convertunits import UNITS_BY_ABBR
+
+class UnitError(ValueError):
+    '''A unit is unknown, or is not a unit of the expected dimension
+    '''
+
+def units_of(unit, dimension=None):
+    '''Return the units class of a unit
+    @param unit: the unit abbreviation
+    @type unit: unicode
+    @param dimension: the dimension the unit must belong to, any by
+    default
+    @type dimension: str
+    @rtype: BaseUnits subclass
+    @raise UnitError: the unit is unknown or of another dimension
+    '''
+    try:
+        units = UNITS_BY_ABBR[unit]
+    except (KeyError, TypeError):
+        raise UnitError(u"Unknown unit %s" % (unit,))
+    if dimension is not None and units.dimension != dimension:
+        raise UnitError(u"%s is not a unit of %s" % (unit, dimension))
+    return units
+
+class Quantity(object):
+    '''A magnitude and its unit
+    '''
+    __slots__ = ('magnitude', 'unit', 'units')
+
+    def __init__(self, magnitude, unit, dimension=None):
+        '''
+        @param magnitude: the value or the values
+        @type magnitude: float, [float] or numpy.ndarray
+        @param unit: the unit of the magnitude
+        @type unit: unicode
+        @param dimension: the dimension the unit must belong to (see
+        convertunits.UNITS_BY_DIMENSION), any by default
+        @type dimension: str
+        @raise UnitError: the unit is unknown or of another dimension
+        '''
+        self.units = units_of(unit, dimension)
+        self.magnitude = magnitude
+        self.unit = unit
+
+    @classmethod
+    def from_entry(cls, entry, dimension=None, unit=None):
+        '''Return the quantity of an entry of the store, converted to
+        unit if given. An entry with a unit by value (Timecompounds) is
+        converted value by value, its unit must be given.
+        @param entry: the entry, {"value": ..., "unit": ...}
+        @type entry: dict
+        @rtype: Quantity
+        @raise UnitError: a unit is unknown or of another dimension
+        @raise ValueError: a value is not a number
+        '''
+        if isinstance(entry["unit"], list):
+            if unit is None:
+                raise UnitError(u"The values of different units need a unit")
+            #the factor of each unit, computed once by unit
+            factors = dict((item, cls(1.0, item, dimension).magnitude_in(unit))
+                           for item in set(entry["unit"]))
+            return cls([float(value) * factors[item]
+                        for value, item in zip(entry["value"], entry["unit"])],
+                       unit, dimension)
+        quantity = cls(float(entry["value"]), entry["unit"], dimension)
+        if unit is None:
+            return quantity
+        return quantity.to(unit)
+
+    @property
+    def dimension(self):
+        '''The dimension of the unit'''
+        return self.units.dimension
+
+    def magnitude_in(self, unit):
+        '''Return the magnitude converted to another unit of the same
+        dimension
+        @rtype: float, [float] or numpy.ndarray
+        @raise UnitError: the unit is unknown or of another dimension
+        '''
+        units = units_of(unit, self.dimension)
+        if unit == self.unit:
+            return self.magnitude
+        if isinstance(self.magnitude, (int, float)):
+            return units.convert_unit(self.magnitude, self.unit, unit)
+        if isinstance(self.magnitude, (list, tuple)):
+            factor = units.convert_unit(1.0, self.unit, unit)
+            return [value * factor for value in self.magnitude]
+        return units.convert_many(self.magnitude, self.unit, unit)
+
+    def to(self, unit):
+        '''Return the quantity converted to another unit of the same
+        dimension
+        @rtype: Quantity
+        @raise UnitError: the unit is unknown or of another dimension
+        '''
+        if unit == self.unit:
+            return self
+        return Quantity(self.magnitude_in(unit), unit)
+
+    def __eq__(self, other):
+        if not isinstance(other, Quantity):
+            return NotImplemented
+        return self.unit == other.unit and self.magnitude == other.magnitude
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        if equal is NotImplemented:
+            return equal
+        return not equal
+
+    __hash__ = None
+
+    def __repr__(self):
+        return 'Quantity(%r, %r)' % (self.magnitude, self.unit)
@@ -0,0 +1,193 @@
+# -*. coding: utf-8 -*-
+# Copyright (c) 2015 CNRS and University of Strasbourg
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+'''
+resultcache.py
+==============
+
+A bounded cache of the results of the calculations, the least recently
+used result is evicted when the cache is full. The operators run the
+same few methods again and again, a method computed already is not
+computed again.
+
+The key of a result is the name of the calculation and its inputs
+converted to the units of the capillary, written with DIGITS
+significant digits (see canonical), so 0.6 m and 60 cm give the same
+key.
+
+Usage example
+-------------
+
+    from resultcache import ResultCache, canonical
+
+    cache = ResultCache(maxsize=64)
+    key = ('viscosity', canonical([60.0, 50.0, 50.0, 34.47, 1200.0]))
+    result = cache.get(key)
+    if result is None:
+        result = compute()
+        cache.put(key, result)
+    cache.stats()["hits"]
+    cache.invalidate('viscosity')
+
+The application shares a cache, see get_result_cache.
+
+'''
+import threading
+from collections import OrderedDict
+
+# The number of results kept by the shared cache
+RESULT_CACHE_SIZE = 128
+
+# The number of significant digits of the inputs in a key
+DIGITS = 12
+_FORMAT = '%%.%dg' % DIGITS
+
+def canonical(values):
+    '''Return values rounded to DIGITS significant digits, as a string:
+    the same values converted from different units give the same key
+    @type values: sequence of float
+    @rtype: str
+    '''
+    return ' '.join([_FORMAT] * len(values)) % tuple(values)
+
+def _freeze(result):
+    '''Return a result which cannot be modified by the callers, and
+    whether it holds lists of values to copy
+    '''
+    errcode, errtext, results = result
+    frozen = tuple((key, tuple(value) if isinstance(value, (list, tuple)) else value, unit)
+                   for key, value, unit in results)
+    has_lists = any(isinstance(value, tuple) for key, value, unit in frozen)
+    return (errcode, errtext, frozen), has_lists
+
+def _thaw(frozen, has_lists):
+    '''Return a copy of a frozen result the caller can modify
+    '''
+    errcode, errtext, results = frozen
+    if not has_lists:
+        return errcode, errtext, list(results)
+    return errcode, errtext, [(key, list(value) if isinstance(value, tuple) else value, unit)
+                              for key, value, unit in results]
+
+class ResultCache(object):
+    '''A bounded least recently used cache of results
+    '''
+    def __init__(self, maxsize=RESULT_CACHE_SIZE):
+        '''
+        @param maxsize: the maximum number of results kept, 0 disables
+        the cache
+        @type maxsize: int
+        '''
+        self.maxsize = maxsize
+        self._results = OrderedDict()
+        # the cache is shared with the background worker thread
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._results)
+
+    def __contains__(self, key):
+        return key in self._results
+
+    def get(self, key):
+        '''Return a copy of the result of a key, the result becomes the
+        most recently used
+        @param key: the calculation name and the canonical inputs
+        @type key: tuple
+        @return: the result, None if it is not in the cache
+        @rtype: (int, str, [(str, float, str)])
+        '''
+        with self._lock:
+            try:
+                frozen = self._results.pop(key)
+            except KeyError:
+                self.misses += 1
+                return None
+            self._results[key] = frozen
+            self.hits += 1
+        return _thaw(*frozen)
+
+    def put(self, key, result):
+        '''Keep the result of a key, the least recently used results
+        are evicted if the cache is full
+        @param key: the calculation name and the canonical inputs
+        @type key: tuple
+        @param result: the error code, the error message and the results
+        @type result: (int, str, [(str, float, str)])
+        '''
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._results.pop(key, None)
+            self._results[key] = _freeze(result)
+            self._evict()
+
+    def _evict(self):
+        while len(self._results) > self.maxsize:
+            self._results.popitem(last=False)
+            self.evictions += 1
+
+    def resize(self, maxsize):
+        '''Change the maximum number of results kept
+        @type maxsize: int
+        '''
+        with self._lock:
+            self.maxsize = maxsize
+            self._evict()
+
+    def invalidate(self, calculation=None):
+        '''Forget the results of a calculation, all the results by
+        default
+        @param calculation: the name of the calculation, for instance
+        'injection'
+        @type calculation: str
+        @return: the number of results forgotten
+        @rtype: int
+        '''
+        with self._lock:
+            if calculation is None:
+                keys = list(self._results)
+            else:
+                keys = [key for key in self._results if key[0] == calculation]
+            for key in keys:
+                del self._results[key]
+        return len(keys)
+
+    def stats(self):
+        '''Return the number of hits, misses and evictions, the number of
+        results kept and the maximum
+        @rtype: {str: int}
+        '''
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses,
+                    "evictions": self.evictions, "size": len(self._results),
+                    "maxsize": self.maxsize}
+
+    def reset_stats(self):
+        '''Set the counters to zero
+        '''
+        with self._lock:
+            self.hits = self.misses = self.evictions = 0
+
+# The cache shared by the whole process (see get_result_cache)
+_result_cache = ResultCache()
+
+def get_result_cache():
+    '''Return the result cache shared by the whole process
+    @rtype: ResultCache
+    '''
+    return _result_cache
@@ -0,0 +1,270 @@
+# -*. coding: utf-8 -*-
+# Copyright (c) 2015 CNRS and University of Strasbourg
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+'''
+runhistory.py
+=============
+
+The RunHistory keeps every computed method in a SQLite database, while
+the store keeps only the last value of each key. It does not depend on
+Kivy.
+
+The runs table is append-only (the updates and the deletes are
+refused). A row holds the name of the calculation, the error code and
+message, the inputs in the units of the capillary (cm, µm, mbar, s, cp,
+g/mol, g/L, V, µA) and a column per result (see RESULT_COLUMNS), in the
+units of the results. The results not computed by the calculation are
+NULL, the µEP list is saved as JSON. The database is in WAL mode so it
+can be read while a run is appended.
+
+Usage example
+-------------
+
+The following example saves a run and finds the injections with a
+diameter of 50 µm and a plug longer than 2 % of the capillary:
+
+    from capillarycalculator import CapillaryCalculator
+    from runhistory import RunHistory
+    from storeschema import DEFAULTS
+
+    history = RunHistory('history.db')
+    calculator = CapillaryCalculator(DEFAULTS)
+    history.add_run('injection', calculator,
+                    *calculator.compute_injection_result())
+    history.find('injection', [('diameter', '=', 50.0),
+                               ('plug_percent_total', '>', 2.0)])
+
+Many runs are inserted at once with add_runs, the rows being built with
+run_row. A bulk load is faster with the indexes built once at the end:
+
+    with history.bulk_load():
+        history.add_runs(rows)
+
+'''
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from capillarycalculator import ENTRIES
+from storeschema import DEFAULTS
+
+# The input columns, the attributes of the capillary
+INPUT_COLUMNS = tuple(ENTRIES[key][0] for key in DEFAULTS if key in ENTRIES)
+
+# The column of each result key. The names of the columns are not case
+# sensitive, the viscosity result is not in the viscosity column.
+RESULT_COLUMNS = OrderedDict([
+    ('Viscosity', 'computed_viscosity'),
+    ('Conductivity', 'conductivity'),
+    ('Fieldstrength', 'field_strength'),
+    ('MicroEOF', 'micro_eof'),
+    ('Lengthpermin', 'length_per_minute'),
+    ('Flowrate', 'flow_rate'),
+    ('Hydrodynamicinjection', 'delivered_volume'),
+    ('Capillaryvolume', 'capillary_volume'),
+    ('Capillaryvolumetowin', 'to_window_volume'),
+    ('Injectionpluglen', 'injection_plug_length'),
+    ('Pluglenpertotallen', 'plug_percent_total'),
+    ('Pluglenperlentowin', 'plug_percent_to_window'),
+    ('Injectedanalyteng', 'analyte_injected_ng'),
+    ('Injectedanalytepmol', 'analyte_injected_pmol'),
+    ('Injectionpressure', 'injection_pressure'),
+    ('MicroEP', 'micro_ep'),
+])
+
+# The columns of the runs table, but the id
+COLUMNS = (('created', 'calculation', 'errcode', 'errtext') + INPUT_COLUMNS
+           + tuple(RESULT_COLUMNS.values()))
+
+# The indexes on the columns the runs are usually filtered on. Each
+# index slows down the inserts, keep them few.
+INDEXES = (('calculation', 'created'), ('diameter',), ('plug_percent_total',))
+
+# The page cache used during a bulk load, in KiB
+BULK_CACHE_SIZE = 16384
+
+# The operators allowed by find
+OPERATORS = ('=', '!=', '<', '<=', '>', '>=')
+
+def _column_type(column):
+    if column in ('calculation', 'errtext', 'micro_ep'):
+        return 'TEXT'
+    if column == 'errcode':
+        return 'INTEGER'
+    return 'REAL'
+
+def run_row(calculation, inputs, errcode, errtext, results, created=None):
+    '''Return the row of a run, in the order of COLUMNS
+    @param calculation: the name of the calculation, for instance
+    'injection'
+    @type calculation: str
+    @param inputs: the capillary or the calculator the results were
+    computed with
+    @type inputs: Capillary or CapillaryCalculator
+    @param results: the results (see CapillaryCalculator)
+    @type results: [(str, float, str)]
+    @param created: the time of the run, now by default
+    @type created: float
+    @rtype: tuple
+    '''
+    if created is None:
+        created = time.time()
+    values = dict((key, value) for key, value, unit in results)
+    if 'MicroEP' in values:
+        values['MicroEP'] = json.dumps(list(values['MicroEP']))
+    return ((created, calculation, errcode, errtext)
+            + tuple([getattr(inputs, name) for name in INPUT_COLUMNS])
+            + tuple([values.get(key) for key in RESULT_COLUMNS]))
+
+class RunHistory(object):
+    '''The history of the runs, in a SQLite database
+    '''
+    def __init__(self, filename):
+        '''Open the database, create the table and the indexes if needed
+        @param filename: the database file, or ':memory:'
+        @type filename: str
+        '''
+        self.filename = filename
+        # the connection is shared by the threads, one at a time
+        self._lock = threading.Lock()
+        self.connection = sqlite3.connect(filename, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        # a commit in WAL mode is durable at the next checkpoint
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        columns = ', '.join('%s %s' % (column, _column_type(column))
+                            for column in COLUMNS)
+        with self.connection:
+            self.connection.execute('CREATE TABLE IF NOT EXISTS runs '
+                                    '(id INTEGER PRIMARY KEY, %s)' % columns)
+            self._create_indexes()
+            for event in ('UPDATE', 'DELETE'):
+                self.connection.execute(
+                    "CREATE TRIGGER IF NOT EXISTS runs_no_%s BEFORE %s ON runs "
+                    "BEGIN SELECT RAISE(ABORT, 'the runs are append-only'); END"
+                    % (event.lower(), event))
+        self._insert = 'INSERT INTO runs (%s) VALUES (%s)' % (
+            ', '.join(COLUMNS), ', '.join('?' * len(COLUMNS)))
+
+    def _create_indexes(self):
+        for indexed in INDEXES:
+            self.connection.execute('CREATE INDEX IF NOT EXISTS runs_%s '
+                                    'ON runs (%s)' % ('_'.join(indexed),
+                                                      ', '.join(indexed)))
+
+    def close(self):
+        '''Close the database
+        '''
+        self.connection.close()
+
+    @contextmanager
+    def bulk_load(self):
+        '''Drop the indexes during a block appending many runs and build
+        them again at the end, even if the block raises. Building an
+        index once is faster than updating it at each insert. During the
+        block the pages are kept in a larger cache and the commits are
+        not synced to the disk, the runs are synced by a checkpoint at
+        the end.
+        '''
+        with self._lock:
+            cache_size = self.connection.execute('PRAGMA cache_size').fetchone()[0]
+            self.connection.execute('PRAGMA cache_size=%d' % -BULK_CACHE_SIZE)
+            self.connection.execute('PRAGMA synchronous=OFF')
+            with self.connection:
+                for indexed in INDEXES:
+                    self.connection.execute('DROP INDEX IF EXISTS runs_%s'
+                                            % '_'.join(indexed))
+        try:
+            yield self
+        finally:
+            with self._lock:
+                with self.connection:
+                    self._create_indexes()
+                self.connection.execute('PRAGMA synchronous=NORMAL')
+                self.connection.execute('PRAGMA cache_size=%d' % cache_size)
+
+    def add_run(self, calculation, inputs, errcode, errtext, results):
+        '''Append a run, see run_row
+        @return: the id of the run
+        @rtype: int
+        '''
+        row = run_row(calculation, inputs, errcode, errtext, results)
+        with self._lock:
+            with self.connection:
+                return self.connection.execute(self._insert, row).lastrowid
+
+    def add_runs(self, rows):
+        '''Append many runs in a single transaction
+        @param rows: the rows built by run_row
+        @type rows: iterable of tuple
+        @return: the number of runs added
+        @rtype: int
+        '''
+        with self._lock:
+            with self.connection:
+                return self.connection.executemany(self._insert, rows).rowcount
+
+    def count(self, calculation=None):
+        '''Return the number of runs, of a calculation if given
+        '''
+        with self._lock:
+            if calculation is None:
+                return self.connection.execute('SELECT COUNT(*) FROM runs').fetchone()[0]
+            return self.connection.execute('SELECT COUNT(*) FROM runs '
+                                           'WHERE calculation = ?',
+                                           (calculation,)).fetchone()[0]
+
+    def find(self, calculation=None, where=(), limit=None):
+        '''Return the runs matching all the conditions, the oldest first
+        @param calculation: the name of the calculation, all by default
+        @type calculation: str
+        @param where: the conditions as (column, operator, value), the
+        operator is one of OPERATORS
+        @type where: [(str, str, float)]
+        @param limit: the maximum number of runs
+        @type limit: int
+        @return: the runs as {column: value}, with their id
+        @rtype: [{str: object}]
+        @raise ValueError: unknown column or operator
+        '''
+        conditions = []
+        parameters = []
+        if calculation is not None:
+            conditions.append('calculation = ?')
+            parameters.append(calculation)
+        for column, operator, value in where:
+            if column not in COLUMNS and column != 'id':
+                raise ValueError("Unknown column %s" % column)
+            if operator not in OPERATORS:
+                raise ValueError("Unknown operator %s" % operator)
+            conditions.append('%s %s ?' % (column, operator))
+            parameters.append(value)
+        query = 'SELECT id, %s FROM runs' % ', '.join(COLUMNS)
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        query += ' ORDER BY id'
+        if limit is not None:
+            query += ' LIMIT %d' % limit
+        names = ('id',) + COLUMNS
+        with self._lock:
+            rows = self.connection.execute(query, parameters).fetchall()
+        runs = []
+        for row in rows:
+            run = dict(zip(names, row))
+            if run['micro_ep'] is not None:
+                run['micro_ep'] = json.loads(run['micro_ep'])
+            runs.append(run)
+        return runs
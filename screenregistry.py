@@ -0,0 +1,115 @@
+# -*. coding: utf-8 -*-
+# Copyright (c) 2015 CNRS and University of Strasbourg
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+'''
+screenregistry.py
+=================
+
+The ScreenRegistry knows how to build each screen of the application
+but builds a screen only the first time it is asked for. The kv rules
+of a screen are parsed at the same time. The screens which were not
+used for a while can be evicted, they are built again when needed.
+
+The function loading the kv rules is given to the constructor:
+
+    registry = ScreenRegistry(Builder.load_file)
+    registry.register('injection', InjectionScreen, 'injection.kv')
+    screen = registry.get('injection')
+
+'''
+import time
+
+class ScreenRegistry(object):
+    '''The screens of the application, built on demand
+    '''
+    def __init__(self, load_rules=None, clock=time.time):
+        '''
+        @param load_rules: the function parsing a kv file
+        @type load_rules: callable
+        @param clock: the function returning the current time
+        @type clock: callable
+        '''
+        self.load_rules = load_rules
+        self.clock = clock
+        # name -> (factory, kv file)
+        self._factories = {}
+        self._screens = {}
+        self._last_used = {}
+        self._loaded_rules = set()
+        # the time spent to build each screen, in seconds
+        self.build_times = {}
+
+    def register(self, name, factory, rules=None):
+        '''Declare a screen
+        @param name: the name of the screen
+        @type name: str
+        @param factory: called with name=name to build the screen
+        @type factory: callable
+        @param rules: the kv file of the screen, if any
+        @type rules: str
+        '''
+        self._factories[name] = (factory, rules)
+
+    def __contains__(self, name):
+        return name in self._factories
+
+    @property
+    def names(self):
+        '''The names of the registered screens
+        '''
+        return list(self._factories)
+
+    def is_built(self, name):
+        '''Return True if the screen is built
+        '''
+        return name in self._screens
+
+    def get(self, name):
+        '''Return the screen, build it first if needed
+        @raise KeyError: the screen is not registered
+        '''
+        screen = self._screens.get(name)
+        if screen is None:
+            factory, rules = self._factories[name]
+            start = self.clock()
+            if rules is not None and rules not in self._loaded_rules:
+                if self.load_rules is not None:
+                    self.load_rules(rules)
+                self._loaded_rules.add(rules)
+            screen = self._screens[name] = factory(name=name)
+            self.build_times[name] = self.clock() - start
+        self.touch(name)
+        return screen
+
+    def touch(self, name):
+        '''Record that the screen is used now
+        '''
+        if name in self._screens:
+            self._last_used[name] = self.clock()
+
+    def idle_screens(self, timeout, keep=()):
+        '''Return the built screens not used for timeout seconds
+        @param keep: the names of the screens never returned
+        @type keep: [str]
+        '''
+        now = self.clock()
+        return [name for name, last_used in self._last_used.items()
+                if now - last_used >= timeout and name not in keep]
+
+    def evict(self, name):
+        '''Forget the screen, the kv rules stay loaded
+        @return: the screen, or None if it was not built
+        '''
+        self._last_used.pop(name, None)
+        return self._screens.pop(name, None)
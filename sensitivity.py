@@ -0,0 +1,183 @@
+# -*. coding: utf-8 -*-
+# Copyright (c) 2015 CNRS and University of Strasbourg
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+'''
+sensitivity.py
+==============
+
+Local sensitivities of the outputs of a capillary to its inputs: the
+Jacobian (the partial derivatives of each output with respect to each
+input) and the elasticities (the relative change of the output for a
+relative change of the input, (dy/y) / (dx/x)).
+
+The outputs are power laws of the inputs (see capillary.POWER_LAWS and
+goalseek.TARGETS): for y = c * x1**e1 * x2**e2 * ..., dy/dxi = ei * y / xi
+and the elasticity of y to xi is ei. The Jacobian costs one evaluation of
+the outputs, instead of two evaluations by input for finite
+differences. The µEP of a compound, the difference of µapp and µEOF, is
+derived with the chain rule; its migration time is the input 'time'.
+
+Usage example
+-------------
+
+    from capillary import Capillary
+    from capillarybatch import CapillaryBatch
+    import sensitivity
+
+    result = sensitivity.sensitivity(Capillary(), time=120.0)
+    result.derivative('plug_percent_total', 'diameter')
+    result.elasticity('micro_ep', 'time')
+
+    # vectorized: one value by method
+    batch = CapillaryBatch(diameter=[25.0, 50.0, 75.0])
+    sensitivity.sensitivity(batch).jacobian.shape  # (17, 12, 3)
+
+The units are the ones of the Capillary class (cm, µm, mbar, s, cp, g/L,
+g/mol, V and µA).
+
+'''
+import numpy as np
+
+from capillary import INPUTS
+from capillarybatch import OUTPUTS
+from goalseek import TARGETS
+
+# The mobility of a compound migrating in time, the µEP is µapp - µEOF
+MICRO_APP = (1.0, (('total_length', 1), ('to_window_length', 1),
+                   ('time', -1), ('voltage', -1)))
+
+# The outputs of sensitivity, micro_app and micro_ep need the time
+SENSITIVITY_OUTPUTS = OUTPUTS + ('plug_percent_total', 'plug_percent_to_window')
+
+class Sensitivity(object):
+    '''The values, the Jacobian and the elasticities of outputs
+    '''
+    def __init__(self, outputs, inputs, values, jacobian, elasticities):
+        '''
+        @param outputs: the names of the outputs
+        @type outputs: (str, ...)
+        @param inputs: the names of the inputs
+        @type inputs: (str, ...)
+        @param values: the values, outputs x methods
+        @type values: numpy.ndarray
+        @param jacobian: the partial derivatives, outputs x inputs x
+        methods
+        @type jacobian: numpy.ndarray
+        @param elasticities: the elasticities, outputs x inputs x methods
+        @type elasticities: numpy.ndarray
+        '''
+        self.outputs = outputs
+        self.inputs = inputs
+        self.values = values
+        self.jacobian = jacobian
+        self.elasticities = elasticities
+
+    def _indexes(self, output, name):
+        if output not in self.outputs:
+            raise ValueError("Unknown output %s" % output)
+        if name not in self.inputs:
+            raise ValueError("Unknown input %s" % name)
+        return self.outputs.index(output), self.inputs.index(name)
+
+    def value(self, output):
+        '''Return the value of an output
+        @rtype: float or numpy.ndarray
+        '''
+        return _scalar(self.values[self._indexes(output, self.inputs[0])[0]])
+
+    def derivative(self, output, name):
+        '''Return the partial derivative of an output with respect to an
+        input
+        @rtype: float or numpy.ndarray
+        '''
+        return _scalar(self.jacobian[self._indexes(output, name)])
+
+    def elasticity(self, output, name):
+        '''Return the elasticity of an output to an input
+        @rtype: float or numpy.ndarray
+        '''
+        return _scalar(self.elasticities[self._indexes(output, name)])
+
+def _scalar(value):
+    if value.ndim == 0:
+        return float(value)
+    return value
+
+def _power_law(law, inputs, index, shape):
+    '''Return the value, the derivatives and the elasticities of a power
+    law
+    '''
+    constant, exponents = law
+    value = np.full(shape, constant, dtype=np.float64)
+    for name, exponent in exponents:
+        value = value * inputs[name]**exponent
+    derivatives = np.zeros((len(index),) + shape)
+    elasticities = np.zeros((len(index),) + shape)
+    for name, exponent in exponents:
+        # the product of the factors, not value / input, which is NaN
+        # when the input is 0
+        derivative = np.full(shape, constant * exponent, dtype=np.float64)
+        for other, other_exponent in exponents:
+            if other == name:
+                other_exponent -= 1
+            derivative = derivative * inputs[other]**other_exponent
+        derivatives[index[name]] = derivative
+        elasticities[index[name]] = exponent
+    return value, derivatives, elasticities
+
+def sensitivity(capillary, outputs=None, time=None):
+    '''Return the sensitivities of the outputs of a capillary, or of
+    every capillary of a batch
+    @param capillary: the capillary or the capillaries
+    @type capillary: Capillary or CapillaryBatch
+    @param outputs: the outputs (see SENSITIVITY_OUTPUTS, and micro_app
+    and micro_ep if the time is given), all by default
+    @type outputs: [str]
+    @param time: the migration time of a compound (s)
+    @type time: float or array
+    @rtype: Sensitivity
+    '''
+    names = INPUTS + (('time',) if time is not None else ())
+    available = SENSITIVITY_OUTPUTS + (('micro_app', 'micro_ep') if time is not None else ())
+    if outputs is None:
+        outputs = available
+    for name in outputs:
+        if name not in available:
+            raise ValueError("Unknown output %s" % name)
+    inputs = dict((name, np.asarray(getattr(capillary, name), dtype=np.float64))
+                  for name in INPUTS)
+    if time is not None:
+        inputs['time'] = np.asarray(time, dtype=np.float64)
+    shape = np.broadcast(*inputs.values()).shape
+    index = dict((name, i) for i, name in enumerate(names))
+    values = np.empty((len(outputs),) + shape)
+    jacobian = np.empty((len(outputs), len(names)) + shape)
+    elasticities = np.empty((len(outputs), len(names)) + shape)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for i, name in enumerate(outputs):
+            if name == 'micro_ep':
+                app = _power_law(MICRO_APP, inputs, index, shape)
+                eof = _power_law(TARGETS['micro_eof'], inputs, index, shape)
+                values[i] = app[0] - eof[0]
+                jacobian[i] = app[1] - eof[1]
+                elasticities[i] = jacobian[i] * _stack(inputs, names, shape) / values[i]
+                continue
+            law = MICRO_APP if name == 'micro_app' else TARGETS[name]
+            values[i], jacobian[i], elasticities[i] = _power_law(law, inputs, index, shape)
+    return Sensitivity(tuple(outputs), names, values, jacobian, elasticities)
+
+def _stack(inputs, names, shape):
+    '''Return the inputs as an array, inputs x methods
+    '''
+    return np.array([np.broadcast_to(inputs[name], shape) for name in names])
@@ -0,0 +1,359 @@
+# -*. coding: utf-8 -*-
+# Copyright (c) 2015 CNRS and University of Strasbourg
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+'''
+service.py
+==========
+
+A local HTTP service computing the results of the screens for other
+programs (a LIMS for instance). It needs neither Kivy nor a window and
+the requests are stateless: the store (cetoolboxdata.json) is neither
+read nor written.
+
+    python -m cetoolbox serve --port 8765
+
+A screen is computed by a POST on /injection, /viscosity,
+/conductivity, /flow or /mobility with a JSON object of store entries:
+
+    {"Capillary": {"value": 60.0, "unit": "cm"},
+     "Idiameter": 50.0,
+     "Timecompounds": {"value": [1.0, 2.5], "unit": "min"}}
+
+A bare number is in the default unit of the key and the entries not
+given take their default value (see storeschema.DEFAULTS). The response
+holds the error code, the error message and the results, as the result
+popups of the application:
+
+    {"errcode": 0, "errtext": "",
+     "results": {"Hydrodynamicinjection": {"value": 9.43, "unit": "nL"},
+                 ...}}
+
+A request which cannot be read gets a 400 response with an "error"
+message, a calculation which fails gets a 500 response with the
+error. GET /screens returns the keys read by each screen and GET
+/stats the number of requests and of batches computed.
+
+The requests for a screen arriving within WINDOW seconds of the first
+one (or the first MAX_BATCH of them) are computed together in a single
+vectorized pass by batchcalculator.compute_many.
+
+'''
+import asyncio
+import json
+import math
+from collections import OrderedDict
+
+from batchcalculator import compute_many
+from cetoolbox import SCREEN_INPUTS
+from storeschema import DEFAULTS
+
+# The address the service listens on, only the local host by default
+HOST = '127.0.0.1'
+PORT = 8765
+
+# The time the requests are gathered before being computed (s)
+WINDOW = 0.002
+
+# The maximum number of requests computed at once
+MAX_BATCH = 256
+
+# The maximum size of a request body (bytes)
+MAX_BODY = 1 << 20
+
+# The reason phrase of each status code used
+REASONS = {
+    200: 'OK',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    413: 'Payload Too Large',
+    500: 'Internal Server Error',
+}
+
+class RequestError(Exception):
+    '''An HTTP request which cannot be answered
+    '''
+    def __init__(self, status, message):
+        Exception.__init__(self, message)
+        self.status = status
+
+def _number(key, value):
+    '''Return the value of an entry as a float
+    @raise RequestError: the value is not a finite number
+    '''
+    if (isinstance(value, bool) or not isinstance(value, (int, float))
+            or not math.isfinite(value)):
+        raise RequestError(400, "The value of %s must be a number" % key)
+    return float(value)
+
+def _unit(key, unit):
+    '''Check the unit of an entry
+    @raise RequestError: the unit is not a string
+    '''
+    if not isinstance(unit, str):
+        raise RequestError(400, "The unit of %s must be a string" % key)
+    return unit
+
+def read_entries(body):
+    '''Return the store entries of a request, the entries not given
+    take their default value
+    @param body: the JSON body of the request
+    @type body: bytes
+    @rtype: {str: {str: float, str: unicode}}
+    @raise RequestError: the body is not a JSON object of entries
+    '''
+    try:
+        request = json.loads(body.decode('utf-8'))
+    except ValueError:
+        raise RequestError(400, "The body is not valid JSON")
+    if not isinstance(request, dict):
+        raise RequestError(400, "The body must be a JSON object")
+    entries = dict(DEFAULTS)
+    for key, entry in request.items():
+        if key not in DEFAULTS or key == 'pause':
+            raise RequestError(400, "Unknown entry %s" % key)
+        if not isinstance(entry, dict):
+            entry = {"value": entry}
+        if key == 'Timecompounds':
+            values = entry.get("value")
+            if not isinstance(values, list):
+                raise RequestError(400, "The value of Timecompounds must be a list")
+            unit = entry.get("unit", DEFAULTS[key]["unit"][0])
+            if not isinstance(unit, list):
+                # a unit for all the compounds
+                unit = [unit] * len(values)
+            if len(unit) != len(values):
+                raise RequestError(400, "Timecompounds needs a unit by value")
+            entries[key] = {"value": [_number(key, value) for value in values],
+                            "unit": [_unit(key, item) for item in unit]}
+        else:
+            entries[key] = {"value": _number(key, entry.get("value")),
+                            "unit": _unit(key, entry.get("unit", DEFAULTS[key]["unit"]))}
+    return entries
+
+def result_payload(result):
+    '''Return the JSON object of the result of a calculation
+    @param result: the error code, the error message and the results
+    @type result: (int, str, [(str, float, str)])
+    @rtype: OrderedDict
+    '''
+    errcode, errtext, results = result
+    return OrderedDict([
+        ("errcode", errcode),
+        ("errtext", errtext),
+        ("results", OrderedDict((key, OrderedDict([("value", value), ("unit", unit)]))
+                                for key, value, unit in results)),
+    ])
+
+class CalculationBatcher(object):
+    '''Gather the calculations requested at the same time to compute
+    them in batches, one batch by screen
+    '''
+    def __init__(self, window=WINDOW, max_batch=MAX_BATCH):
+        '''
+        @param window: the time the requests are gathered (s)
+        @type window: float
+        @param max_batch: the number of requests computing the batch
+        without waiting the end of the window
+        @type max_batch: int
+        '''
+        self.window = window
+        self.max_batch = max_batch
+        self._pending = {}
+        self._timers = {}
+        self.requests = 0
+        self.batches = 0
+        self.largest_batch = 0
+
+    def compute(self, screen, entries):
+        '''Add a calculation to the batch of its screen, it must be
+        called from the event loop
+        @param screen: the screen name (see cetoolbox.SCREEN_INPUTS)
+        @type screen: str
+        @param entries: the store entries of the method
+        @type entries: {str: dict}
+        @return: the future of the error code, the error message and
+        the results
+        @rtype: asyncio.Future
+        '''
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = self._pending.setdefault(screen, [])
+        pending.append((entries, future))
+        self.requests += 1
+        if len(pending) >= self.max_batch:
+            self.flush(screen)
+        elif len(pending) == 1:
+            self._timers[screen] = loop.call_later(self.window, self.flush, screen)
+        return future
+
+    def flush(self, screen):
+        '''Compute the pending calculations of a screen
+        '''
+        timer = self._timers.pop(screen, None)
+        if timer is not None:
+            timer.cancel()
+        pending = self._pending.pop(screen, [])
+        if not pending:
+            return
+        self.batches += 1
+        self.largest_batch = max(self.largest_batch, len(pending))
+        try:
+            results = compute_many(screen, [entries for entries, future in pending])
+        except Exception as error:
+            for entries, future in pending:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        for (entries, future), result in zip(pending, results):
+            # the future of a client which left is cancelled
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self):
+        '''Return the number of requests and of batches computed
+        @rtype: OrderedDict
+        '''
+        return OrderedDict([
+            ("requests", self.requests),
+            ("batches", self.batches),
+            ("largest_batch", self.largest_batch),
+        ])
+
+async def read_request(reader):
+    '''Read an HTTP request
+    @return: the method, the path, the headers (lower case names) and
+    the body, None when the connection is closed
+    @rtype: (str, str, {str: str}, bytes)
+    @raise RequestError: the request is malformed
+    '''
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        method, path, version = line.decode('latin-1').split()
+    except ValueError:
+        raise RequestError(400, "Malformed request line")
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, separator, value = line.decode('latin-1').partition(':')
+        if not separator:
+            raise RequestError(400, "Malformed header")
+        headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get('content-length', 0))
+    except ValueError:
+        raise RequestError(400, "Malformed Content-Length")
+    if length > MAX_BODY:
+        raise RequestError(413, "The body is too large")
+    body = await reader.readexactly(length) if length > 0 else b''
+    if version == 'HTTP/1.0' and headers.get('connection', '').lower() != 'keep-alive':
+        headers['connection'] = 'close'
+    return method, path, headers, body
+
+def http_response(status, payload, keep_alive=True):
+    '''Return an HTTP response with a JSON body
+    @rtype: bytes
+    '''
+    body = json.dumps(payload).encode('utf-8')
+    head = ('HTTP/1.1 %d %s\r\n'
+            'Content-Type: application/json\r\n'
+            'Content-Length: %d\r\n'
+            'Connection: %s\r\n\r\n'
+            % (status, REASONS[status], len(body),
+               'keep-alive' if keep_alive else 'close'))
+    return head.encode('latin-1') + body
+
+class CalculationService(object):
+    '''The HTTP service, the connections are kept alive
+    '''
+    def __init__(self, batcher=None):
+        '''
+        @param batcher: the batcher computing the calculations
+        @type batcher: CalculationBatcher
+        '''
+        self.batcher = batcher if batcher is not None else CalculationBatcher()
+
+    async def respond(self, method, path, body):
+        '''Return the status and the JSON object of the response
+        @raise RequestError: the request cannot be answered
+        '''
+        path = path.split('?', 1)[0].rstrip('/')
+        if path == '/screens':
+            if method != 'GET':
+                raise RequestError(405, "Use GET")
+            return 200, OrderedDict((screen, list(keys))
+                                    for screen, keys in SCREEN_INPUTS.items())
+        if path == '/stats':
+            if method != 'GET':
+                raise RequestError(405, "Use GET")
+            return 200, self.batcher.stats()
+        screen = path[1:]
+        if screen not in SCREEN_INPUTS:
+            raise RequestError(404, "Unknown path %s" % path)
+        if method != 'POST':
+            raise RequestError(405, "Use POST")
+        result = await self.batcher.compute(screen, read_entries(body))
+        return 200, result_payload(result)
+
+    async def handle(self, reader, writer):
+        '''Answer the requests of a connection
+        '''
+        try:
+            while True:
+                try:
+                    request = await read_request(reader)
+                except RequestError as error:
+                    # the rest of a malformed request cannot be skipped
+                    writer.write(http_response(error.status, {"error": str(error)},
+                                               keep_alive=False))
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                method, path, headers, body = request
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                try:
+                    status, payload = await self.respond(method, path, body)
+                except RequestError as error:
+                    status, payload = error.status, {"error": str(error)}
+                except Exception as error:
+                    # the other requests of the connection can be answered
+                    status, payload = 500, {"error": str(error)}
+                writer.write(http_response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+async def start(host=HOST, port=PORT, window=WINDOW, max_batch=MAX_BATCH):
+    '''Start the service
+    @return: the server, its sockets give the port when port is 0
+    @rtype: asyncio.Server
+    '''
+    service = CalculationService(CalculationBatcher(window, max_batch))
+    return await asyncio.start_server(service.handle, host, port)
+
+async def serve(host=HOST, port=PORT, window=WINDOW, max_batch=MAX_BATCH):
+    '''Run the service until it is interrupted
+    '''
+    server = await start(host, port, window, max_batch)
+    async with server:
+        await server.serve_forever()
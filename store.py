@@ -20,53 +20,279 @@ store.py
 Contain fonctions to create and access to the store
 
 """
+import os
+import threading
+from contextlib import contextmanager
+from json import dumps
 
 from kivy.storage.jsonstore import JsonStore
 
+from instrumentation import timed
+from storeschema import merge_defaults
 
+try:
+    from runhistory import RunHistory
+except ImportError:
+    # Python built without sqlite3, there is no run history
+    RunHistory = None
+
+# os.rename does not overwrite an existing file on Windows
+_replace = getattr(os, 'replace', os.rename)
+
+STORE_FILENAME = 'cetoolboxdata.json'
+
+HISTORY_FILENAME = 'cetoolboxhistory.db'
+
+# The environment variable enabling the run history, it is off by
+# default
+HISTORY_VARIABLE = 'CETOOLBOX_HISTORY'
+
+# The store shared by the whole process (see get_store)
+_store = None
+
+# The store is used by the user interface and the worker threads. The
+# lock is held by the accesses to the store, by a whole batch and by
+# get_store, so a put of a thread never lands in the batch of another.
+_store_lock = threading.RLock()
+
+# The run history shared by the whole process (see get_history)
+_history = None
+
+# Number of get_store calls served from memory (hits) and from the
+# json file (misses)
+_store_stats = {"hits": 0, "misses": 0}
+
+def _file_signature(filename):
+    """ Return the modification time and the size of the file, or None
+    if the file does not exist
+    """
+    try:
+        stat = os.stat(filename)
+    except OSError:
+        return None
+    return (getattr(stat, 'st_mtime_ns', stat.st_mtime), stat.st_size)
+
+class CEToolBoxStore(JsonStore):
+    """ A JsonStore able to group several put and delete in a single
+    write of the json file.
+
+    Usage example:
+
+        store = get_store()
+        with store.batch():
+            store.put('Capillary', value=60.0, unit="cm")
+            store.put('Towindow', value=50.0, unit="cm")
+
+    The data is copied under the lock of the store, but the file is
+    written after the lock is released, so a thread reading the store
+    does not wait for the disk. When a thread is already writing the
+    file, the others leave their copy to it and return: it writes the
+    latest copy once its own write is done.
+    """
+
+    def __init__(self, filename, **kwargs):
+        self._lock = _store_lock
+        self._batch_level = 0
+        self._batch_backup = None
+        # the content waiting to be written, and the thread writing
+        self._pending = None
+        self._write_lock = threading.Lock()
+        # the signature of the json file the data in memory comes from
+        self.signature = None
+        super(CEToolBoxStore, self).__init__(filename, **kwargs)
+
+    def store_load(self):
+        """ Read the json file and remember its signature
+        """
+        super(CEToolBoxStore, self).store_load()
+        self.signature = _file_signature(self.filename)
+        if self.signature is not None:
+            # the data in memory is the content of the file
+            self._is_changed = False
+
+    def is_up_to_date(self):
+        """ Return True if the json file was not modified by another
+        process since it was read or written by this store
+        """
+        return self.signature == _file_signature(self.filename)
+
+    def is_writing(self):
+        """ Return True if the data in memory is not written yet
+        """
+        return self._pending is not None or self._write_lock.locked()
+
+    def apply_defaults(self):
+        """ Migrate the entries and add the default entries missing
+        (see storeschema.merge_defaults), the json file is written only
+        if they changed
+        @return : True if the entries changed
+        @rtype : bool
+        """
+        with self.batch():
+            if not merge_defaults(self._data):
+                return False
+            self._is_changed = True
+        return True
+
+    def exists(self, key):
+        """ Return True if the store has an entry for key
+        """
+        with self._lock:
+            return super(CEToolBoxStore, self).exists(key)
+
+    @timed('store.get')
+    def get(self, key):
+        """ Return the entry of key, timed by the instrumentation
+        """
+        with self._lock:
+            return super(CEToolBoxStore, self).get(key)
+
+    @timed('store.put')
+    def put(self, key, **values):
+        """ Set the entry of key, timed by the instrumentation
+        """
+        with self._lock:
+            self.store_put(key, values)
+            self._snapshot()
+        self._flush()
+        return True
+
+    def delete(self, key):
+        """ Remove the entry of key
+        """
+        with self._lock:
+            self.store_delete(key)
+            self._snapshot()
+        self._flush()
+        return True
+
+    @contextmanager
+    def batch(self):
+        """ Buffer the put and delete done in the block and write them
+        at once when leaving the outermost block. If an exception is
+        raised in the block, the changes are discarded. The other
+        threads wait for the end of the batch to use the store.
+        """
+        with self._lock:
+            if self._batch_level == 0:
+                self._batch_backup = (dict(self._data), self._is_changed)
+            self._batch_level += 1
+            try:
+                yield self
+            except BaseException:
+                self._batch_level -= 1
+                if self._batch_level == 0:
+                    self._data, self._is_changed = self._batch_backup
+                    self._batch_backup = None
+                raise
+            self._batch_level -= 1
+            if self._batch_level:
+                return
+            self._batch_backup = None
+            self._snapshot()
+        self._flush()
+
+    def store_sync(self):
+        """ Write the json file unless a batch is in progress. The file
+        is written to a temporary file and then renamed so a reader
+        never sees a partial file.
+        """
+        with self._lock:
+            self._snapshot()
+        self._flush()
+
+    def _snapshot(self):
+        """ Copy the data to write, the lock must be held
+        """
+        if self._batch_level or not self._is_changed:
+            return
+        self._pending = dumps(self._data, indent=getattr(self, 'indent', None),
+                              sort_keys=getattr(self, 'sort_keys', False))
+        self._is_changed = False
+
+    def _flush(self):
+        """ Write the data copied, unless another thread is writing
+        """
+        while self._pending is not None:
+            if not self._write_lock.acquire(False):
+                # the thread writing checks the pending data after its
+                # write, it writes ours
+                return
+            try:
+                with self._lock:
+                    content, self._pending = self._pending, None
+                if content is None:
+                    continue
+                tmpfilename = self.filename + '.tmp'
+                with open(tmpfilename, 'w') as fd:
+                    fd.write(content)
+                    fd.flush()
+                    os.fsync(fd.fileno())
+                _replace(tmpfilename, self.filename)
+                with self._lock:
+                    self.signature = _file_signature(self.filename)
+            finally:
+                self._write_lock.release()
+
+
+@timed('get_store')
 def get_store():
     """ get_store return the store (it's a JsonStore).
+    The same store is shared by the whole process, the json file is
+    read again only if its modification time or its size changed.
+    The store is then replaced by a new instance: the callers must call
+    get_store each time they need the store and not keep the instance,
+    which would hold the data of the old file.
     See kivy documentation for more information :
     http://kivy.org/docs/api-kivy.storage.html#module-kivy.storage
     @return : A JsonStore object
-    @rtype : JsonStore
+    @rtype : CEToolBoxStore
+    """
+    global _store
+    with _store_lock:
+        if _store is not None and (_store._batch_level or _store.is_writing()
+                                   or _store.is_up_to_date()):
+            _store_stats["hits"] += 1
+            return _store
+        _store_stats["misses"] += 1
+        _store = CEToolBoxStore(STORE_FILENAME)
+        return _store
+
+def get_history():
+    """ get_history return the history of the runs, kept in a SQLite
+    database next to the json file. The store keeps only the last
+    results, the history keeps every run (see runhistory.py). The
+    history is optional, it is kept only when the environment variable
+    CETOOLBOX_HISTORY is set.
+    @return : the history, None if it is disabled or if sqlite3 is not
+    available
+    @rtype : RunHistory
+    """
+    global _history
+    if (_history is None and RunHistory is not None
+            and os.environ.get(HISTORY_VARIABLE)):
+        _history = RunHistory(HISTORY_FILENAME)
+    return _history
+
+def get_store_stats():
+    """ Return the number of get_store calls served from memory (hits)
+    and the number of reads of the json file (misses)
+    @rtype : {str: int}
+    """
+    return dict(_store_stats)
+
+def reset_store_stats():
+    """ Set the get_store counters to zero
     """
-    store = JsonStore('cetoolboxdata.json')
-    return store
+    _store_stats["hits"] = 0
+    _store_stats["misses"] = 0
 
 def create_store():
     """ function to create a JsonStore.
+    The json file is read once, its entries are migrated and completed
+    with the default values in memory (see storeschema.merge_defaults)
+    and it is written only if they changed.
     See kivy documentation for more information :
     http://kivy.org/docs/api-kivy.storage.html#module-kivy.storage
     """
-    store = get_store()
-    if not store.exists('Capillary'):
-        store.put('Capillary', value=60.00, unit="cm")
-    if not store.exists('Towindow'):
-        store.put('Towindow', value=50.00, unit="cm")
-    if not store.exists('Idiameter'):
-        store.put('Idiameter', value=50.00, unit="µm")
-    if not store.exists('Pressure'):
-        store.put('Pressure', value=0.5, unit="psi")
-    if not store.exists('Time'):
-        store.put('Time', value=15.0, unit="s")
-    if not store.exists('Viscosity'):
-        store.put('Viscosity', value=1.0, unit="cp")
-    if not store.exists('Concentration'):
-        store.put('Concentration', value=1.0, unit="g/L")
-    if not store.exists('Molweight'):
-        store.put('Molweight', value=1000.0, unit="g/mol")
-    if not store.exists('Detectiontime'):
-        store.put('Detectiontime', value=20.0, unit="min")
-    if not store.exists('Voltage'):
-        store.put('Voltage', value=30000.0, unit="V")
-    if not store.exists('Electriccurrent'):
-        store.put('Electriccurrent', value=25.0, unit="µA")
-    if not store.exists('Electroosmosis'):
-        store.put('Electroosmosis', value=1.0, unit="min")  
-    if not store.exists("Timecompound1"):
-        store.put('Timecompound1', value=1.0, unit="min")
-    if not store.exists("Nbtimecompound"):
-        store.put('Nbtimecompound', value=1)
-    if not store.exists("pause"):
-        store.put('pause', value="menu")
+    get_store().apply_defaults()
@@ -0,0 +1,141 @@
+# -*. coding: utf-8 -*-
+# Copyright (c) 2015 CNRS and University of Strasbourg
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+
+"""
+storeschema.py
+==============
+
+Contain the schema of the store: its version and its default values.
+This module does not depend on Kivy so the defaults can be used without
+the store.
+
+The migration times of the compounds are a single entry, Timecompounds,
+holding the list of the values and the list of the units. The previous
+versions used an entry per compound (Timecompound1, Timecompound2, ...)
+and Nbtimecompound, legacy_timecompounds converts them.
+
+The store holds the version of its schema in the Schemaversion entry.
+merge_defaults brings the entries of a store read from the json file
+to the current version (see MIGRATIONS) and adds the missing default
+entries, in memory, so the file is written at most once:
+
+    data = json.load(fd)
+    if merge_defaults(data):
+        json.dump(data, fd)
+
+The Reset buttons of the screens show the default values too.
+
+"""
+import copy
+from collections import OrderedDict
+
+# The default entry of each key of the store
+DEFAULTS = OrderedDict([
+    ('Capillary', {"value": 60.00, "unit": u"cm"}),
+    ('Towindow', {"value": 50.00, "unit": u"cm"}),
+    ('Idiameter', {"value": 50.00, "unit": u"µm"}),
+    ('Pressure', {"value": 0.5, "unit": u"psi"}),
+    ('Time', {"value": 15.0, "unit": u"s"}),
+    ('Viscosity', {"value": 1.0, "unit": u"cp"}),
+    ('Concentration', {"value": 1.0, "unit": u"g/L"}),
+    ('Molweight', {"value": 1000.0, "unit": u"g/mol"}),
+    ('Detectiontime', {"value": 20.0, "unit": u"min"}),
+    ('Voltage', {"value": 30000.0, "unit": u"V"}),
+    ('Electriccurrent', {"value": 25.0, "unit": u"µA"}),
+    ('Electroosmosis', {"value": 1.0, "unit": u"min"}),
+    ('Timecompounds', {"value": [1.0], "unit": [u"min"]}),
+    ('pause', {"value": u"menu"}),
+])
+
+# The version of the entries of the store, increased when the entries
+# change in a way the previous versions cannot read (see MIGRATIONS)
+SCHEMA_VERSION = 2
+
+# The entry holding the version of the schema of a store. A store
+# without it comes from a version older than 2.
+VERSION_KEY = 'Schemaversion'
+
+def legacy_timecompounds(store):
+    """Return the Timecompounds entry built from the Nbtimecompound and
+    Timecompound<i> entries of the previous versions, and the keys of
+    the entries to delete (including the MicroEP<i> results)
+    @param store: the store or a dictionnary of entries
+    @type store: JsonStore or {str: dict}
+    @return: the entry, None if there is nothing to convert, and the
+    keys to delete
+    @rtype: ({str: list}, [str])
+    """
+    if 'Nbtimecompound' not in store:
+        return None, []
+    values = []
+    units = []
+    obsolete = ['Nbtimecompound']
+    for i in range(1, store.get('Nbtimecompound')["value"]+1):
+        key = 'Timecompound'+str(i)
+        if key in store:
+            values.append(store.get(key)["value"])
+            units.append(store.get(key)["unit"])
+            obsolete.append(key)
+    obsolete += [key for key in store.keys()
+                 if key.startswith('MicroEP') and key[len('MicroEP'):].isdigit()]
+    if not values:
+        return None, obsolete
+    return {"value": values, "unit": units}, obsolete
+
+def _migrate_compounds(data):
+    """Version 1 to 2: an entry per compound becomes Timecompounds
+    """
+    entry, obsolete = legacy_timecompounds(data)
+    if entry is not None:
+        data['Timecompounds'] = entry
+    for key in obsolete:
+        del data[key]
+
+# The function bringing the entries of each version to the next version
+MIGRATIONS = {
+    1: _migrate_compounds,
+}
+
+def schema_version(data):
+    """Return the version of the schema of the entries of a store
+    @param data: the entries of the store
+    @type data: {str: dict}
+    @rtype: int
+    """
+    return data.get(VERSION_KEY, {}).get("value", 1)
+
+def merge_defaults(data):
+    """Migrate the entries of a store to SCHEMA_VERSION and add the
+    default entries missing, in place. The entries of a more recent
+    version are not migrated.
+    @param data: the entries of the store
+    @type data: {str: dict}
+    @return: True if the entries changed and must be written
+    @rtype: bool
+    """
+    changed = False
+    version = schema_version(data)
+    while version < SCHEMA_VERSION:
+        MIGRATIONS[version](data)
+        version += 1
+        changed = True
+    for key, entry in DEFAULTS.items():
+        if key not in data:
+            data[key] = copy.deepcopy(entry)
+            changed = True
+    if VERSION_KEY not in data or changed:
+        data[VERSION_KEY] = {"value": version}
+        changed = True
+    return changed
@@ -0,0 +1,173 @@
+# -*. coding: utf-8 -*-
+# Copyright (c) 2015 CNRS and University of Strasbourg
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+'''
+storetesting.py
+===============
+
+Helpers of the tests of the store (test_store.py and
+test_capillarymanager.py). When Kivy is not installed, a stand-in of
+the Kivy JsonStore is installed while the tests of a module run, and
+removed afterwards:
+
+    def setUpModule():
+        global store
+        store = storetesting.import_store()
+
+    def tearDownModule():
+        storetesting.restore()
+
+'''
+import json
+import os
+import shutil
+import sys
+import tempfile
+import types
+import unittest
+
+# The modules of the stand-in
+KIVY_MODULES = ('kivy', 'kivy.storage', 'kivy.storage.jsonstore')
+
+# The modules importing the store, imported again with the stand-in
+STORE_MODULES = ('store', 'capillarymanager')
+
+class JsonStore(object):
+    '''A stand-in of kivy.storage.jsonstore.JsonStore, with the same
+    behaviour for load, sync, put, get, exists and delete: the json file
+    is written when it is missing and after each put and delete.
+    '''
+    def __init__(self, filename, indent=None, sort_keys=False, **kwargs):
+        self.filename = filename
+        self.indent = indent
+        self.sort_keys = sort_keys
+        self._data = {}
+        self._is_changed = True
+        self.store_load()
+
+    def store_load(self):
+        if not os.path.exists(self.filename):
+            folder = os.path.dirname(self.filename)
+            if folder and not os.path.exists(folder):
+                os.makedirs(folder)
+            self.store_sync()
+            return
+        with open(self.filename) as fd:
+            data = fd.read()
+        if data:
+            self._data = json.loads(data)
+
+    def store_sync(self):
+        if not self._is_changed:
+            return
+        with open(self.filename, 'w') as fd:
+            json.dump(self._data, fd, indent=self.indent, sort_keys=self.sort_keys)
+        self._is_changed = False
+
+    def exists(self, key):
+        return key in self._data
+
+    def get(self, key):
+        return self._data[key]
+
+    def store_put(self, key, value):
+        self._data[key] = value
+        self._is_changed = True
+        return True
+
+    def store_delete(self, key):
+        del self._data[key]
+        self._is_changed = True
+        return True
+
+    def put(self, key, **values):
+        need_sync = self.store_put(key, values)
+        if need_sync:
+            self.store_sync()
+        return need_sync
+
+    def delete(self, key):
+        need_sync = self.store_delete(key)
+        if need_sync:
+            self.store_sync()
+        return need_sync
+
+_installed = False
+
+def has_kivy():
+    '''Return True if the Kivy store can be imported
+    '''
+    try:
+        import kivy.storage.jsonstore
+    except ImportError:
+        return False
+    return True
+
+def import_store():
+    '''Import the store module, with the stand-in of the JsonStore if
+    Kivy is missing
+    @rtype: module
+    '''
+    global _installed
+    if not _installed and not has_kivy():
+        for name in KIVY_MODULES:
+            sys.modules[name] = types.ModuleType(name)
+        sys.modules['kivy.storage.jsonstore'].JsonStore = JsonStore
+        _installed = True
+    import store
+    return store
+
+def restore():
+    '''Remove the stand-in and the modules imported with it
+    '''
+    global _installed
+    if _installed:
+        for name in KIVY_MODULES + STORE_MODULES:
+            sys.modules.pop(name, None)
+        _installed = False
+
+class StoreTestCase(unittest.TestCase):
+    '''Run each test in a temporary directory and count the writes of
+    the json file
+    '''
+    def setUp(self):
+        store = import_store()
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, 'cetoolboxdata.json')
+        self.writes = []
+        replace = store._replace
+        def counting_replace(source, destination):
+            self.writes.append(destination)
+            replace(source, destination)
+        store._replace = counting_replace
+        self.addCleanup(setattr, store, '_replace', replace)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def open_store(self):
+        '''Return a store of the json file, the writes done when it is
+        created are not counted
+        '''
+        data = import_store().CEToolBoxStore(self.filename)
+        del self.writes[:]
+        return data
+
+    def read_file(self):
+        '''Return the content of the json file, empty if it is missing
+        '''
+        if not os.path.exists(self.filename):
+            return {}
+        with open(self.filename) as fd:
+            return json.load(fd)
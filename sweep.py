@@ -0,0 +1,196 @@
+# -*. coding: utf-8 -*-
+# Copyright (c) 2015 CNRS and University of Strasbourg
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+
+'''
+Sweep
+=====
+
+Evaluate the Capillary formulas on every combination of a parameter
+grid. The grid is split into chunks of consecutive grid points which
+are evaluated by CapillaryBatch in a pool of worker processes.
+
+Each entry of the grid spec is a Capillary input name (see
+capillarybatch.INPUTS) associated to either:
+
+- a list of values in the unit used by Capillary,
+- a dictionnary {"values": [...], "unit": "psi"},
+- a dictionnary {"start": 0.5, "stop": 2.0, "num": 4, "unit": "psi"}.
+
+The inputs missing from the grid keep the Capillary default value.
+
+Usage example
+-------------
+
+    import sweep
+
+    table = sweep.sweep({"pressure": {"start": 0.5, "stop": 5.0,
+                                      "num": 10, "unit": "psi"},
+                         "duration": [5.0, 10.0, 15.0],
+                         "diameter": {"values": [25, 50, 75],
+                                      "unit": u"µm"}})
+    table["delivered_volume"]
+
+'''
+
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from capillarybatch import CapillaryBatch, INPUTS, OUTPUTS
+from convertunits import (LengthUnits, PressureUnits, TimeUnits,
+                          ConcentrationUnits, MolConcentrationUnits,
+                          MolWeightUnits, VoltUnits)
+
+# The units class and the unit used by Capillary for each input.
+# An input without units class can only be given in its Capillary unit.
+FIELD_UNITS = {
+    'total_length': (LengthUnits, u'cm'),
+    'to_window_length': (LengthUnits, u'cm'),
+    'diameter': (LengthUnits, u'µm'),
+    'pressure': (PressureUnits, u'mbar'),
+    'duration': (TimeUnits, u's'),
+    'viscosity': (None, u'cp'),
+    'molweight': (MolWeightUnits, u'g/mol'),
+    'concentration': (ConcentrationUnits, u'g/L'),
+    'voltage': (VoltUnits, u'V'),
+    'electric_current': (None, u'µA'),
+    'detection_time': (TimeUnits, u's'),
+    'electro_osmosis_time': (TimeUnits, u's'),
+}
+
+# The default number of grid points evaluated by a worker at once
+CHUNK_SIZE = 65536
+
+def unit_factor(name, unit, field_units=FIELD_UNITS):
+    '''Return the factor converting the values of an input from unit to
+    the unit used by Capillary
+    @param name: the Capillary input name
+    @type name: str
+    @param unit: the unit of the values, None for the Capillary unit
+    @type unit: unicode
+    @param field_units: the units class and the Capillary unit by input
+    @type field_units: {str: (BaseUnits, unicode)}
+    @rtype: float
+    @raise ValueError: the unit cannot be converted
+    '''
+    units, to_unit = field_units[name]
+    if unit is None or unit == to_unit:
+        return 1.0
+    if units is None:
+        raise ValueError("The unit of %s must be %s" % (name, to_unit))
+    if name == 'concentration' and unit in MolConcentrationUnits.unitList.units:
+        # the factor depends on the molweight, which may vary too
+        raise ValueError("The concentration must be given in a mass "
+                         "concentration unit, not in %s" % unit)
+    try:
+        return units.convert_unit(1.0, unit, to_unit)
+    except KeyError:
+        raise ValueError("Unknown unit %s for %s" % (unit, name))
+
+def grid_axis(name, spec):
+    '''Return the values of an axis of the grid in the unit used
+    by Capillary
+    @param name: the Capillary input name
+    @type name: str
+    @param spec: the axis specification (see the module documentation)
+    @type spec: list or dict
+    @return: the values of the axis
+    @rtype: numpy.ndarray
+    '''
+    if name not in FIELD_UNITS:
+        raise ValueError("Unknown sweep parameter %s" % name)
+    unit = None
+    if isinstance(spec, dict):
+        unit = spec.get("unit")
+        if "values" in spec:
+            values = np.asarray(spec["values"], dtype=np.float64)
+        else:
+            for key in ("start", "stop", "num"):
+                if key not in spec:
+                    raise ValueError("The axis %s needs %s, or values"
+                                     % (name, key))
+            values = np.linspace(spec["start"], spec["stop"], spec["num"])
+    else:
+        values = np.asarray(spec, dtype=np.float64)
+    values = np.atleast_1d(values)
+    factor = unit_factor(name, unit)
+    if factor != 1.0:
+        values = values * factor
+    return values
+
+def _evaluate_chunk(names, axes, start, stop, outputs):
+    '''Evaluate the grid points from start to stop (worker side)
+    '''
+    shape = tuple(len(axis) for axis in axes)
+    indexes = np.unravel_index(np.arange(start, stop), shape)
+    columns = OrderedDict()
+    for name, axis, index in zip(names, axes, indexes):
+        columns[name] = axis[index]
+    results = CapillaryBatch(**columns).compute_all()
+    for name in outputs:
+        columns[name] = results[name]
+    return columns
+
+def sweep(grid, outputs=OUTPUTS, chunk_size=CHUNK_SIZE, max_workers=None):
+    '''Evaluate the outputs on every point of the grid
+    @param grid: the grid specification by Capillary input name
+    @type grid: {str: list or dict}
+    @param outputs: the outputs to compute (see capillarybatch.OUTPUTS)
+    @type outputs: [str]
+    @param chunk_size: the number of grid points sent at once to a worker
+    @type chunk_size: int
+    @param max_workers: the number of worker processes, all the CPUs
+    by default, 1 evaluates the grid in the current process
+    @type max_workers: int
+    @return: one column per swept input and per output, one row per
+    grid point (the last input varies the fastest)
+    @rtype: OrderedDict {str: numpy.ndarray}
+    '''
+    for name in outputs:
+        if name not in OUTPUTS:
+            raise ValueError("Unknown output %s" % name)
+    if not grid:
+        raise ValueError("The grid has no parameter to sweep")
+    names = [name for name in INPUTS if name in grid]
+    for name in grid:
+        if name not in names:
+            raise ValueError("Unknown sweep parameter %s" % name)
+    axes = [grid_axis(name, grid[name]) for name in names]
+    size = int(np.prod([len(axis) for axis in axes]))
+    bounds = [(start, min(start + chunk_size, size))
+              for start in range(0, size, chunk_size)]
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = min(max_workers, len(bounds))
+
+    if max_workers <= 1:
+        chunks = [_evaluate_chunk(names, axes, start, stop, outputs)
+                  for start, stop in bounds]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(_evaluate_chunk, names, axes,
+                                       start, stop, outputs)
+                       for start, stop in bounds]
+            chunks = [future.result() for future in futures]
+
+    table = OrderedDict()
+    for name in names + list(outputs):
+        if chunks:
+            table[name] = np.concatenate([chunk[name] for chunk in chunks])
+        else:
+            table[name] = np.empty(0)
+    return table
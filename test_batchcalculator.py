@@ -0,0 +1,78 @@
+# -*. coding: utf-8 -*-
+# Copyright (c) 2015 CNRS and University of Strasbourg
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+
+import copy
+import random
+import unittest
+
+from batchcalculator import compute_many
+from cetoolbox import SCREEN_INPUTS, compute_entries
+from storeschema import DEFAULTS
+
+class TestBatchCalculator(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(4)
+        self.methods = []
+        for i in range(300):
+            entries = copy.deepcopy(DEFAULTS)
+            for key in ('Capillary', 'Towindow', 'Idiameter', 'Pressure',
+                        'Time', 'Viscosity', 'Concentration', 'Molweight',
+                        'Voltage', 'Electriccurrent', 'Detectiontime',
+                        'Electroosmosis'):
+                entries[key]["value"] = rng.choice([0.0, rng.uniform(1.0, 100.0),
+                                                    entries[key]["value"]])
+            entries['Concentration']["unit"] = rng.choice([u"g/L", u"mmol/L"])
+            times = [rng.choice([0.0, 1.0, 2.5]) for j in range(rng.randint(0, 3))]
+            entries['Timecompounds'] = {"value": times, "unit": [u"min"] * len(times)}
+            self.methods.append(entries)
+        self.methods[0]['Capillary'] = {"value": 60.0, "unit": u"league"}
+
+    def assertSameResult(self, expected, result):
+        self.assertEqual(expected[:2], result[:2])
+        self.assertEqual([(key, unit) for key, value, unit in expected[2]],
+                         [(key, unit) for key, value, unit in result[2]])
+        for (key, value, unit), (key, other, unit) in zip(expected[2], result[2]):
+            if isinstance(value, list):
+                self.assertEqual(len(value), len(other))
+            else:
+                value, other = [value], [other]
+            for item, other_item in zip(value, other):
+                self.assertAlmostEqual(item, other_item,
+                                       delta=1e-12 * max(abs(item), 1e-6))
+
+    def test_same_as_calculator(self):
+        for screen in SCREEN_INPUTS:
+            results = compute_many(screen, self.methods)
+            self.assertEqual(len(results), len(self.methods))
+            for entries, result in zip(self.methods, results):
+                self.assertSameResult(compute_entries(screen, entries)[1], result)
+
+    def test_capillary_full(self):
+        entries = dict(DEFAULTS)
+        entries['Time'] = {"value": 100.0, "unit": u"min"}
+        errcode, errtext, results = compute_many('injection', [entries])[0]
+        self.assertEqual((errcode, errtext), (2, "The capillary is full"))
+        self.assertEqual(dict((key, value) for key, value, unit in results)['Pluglenperlentowin'],
+                         100.)
+
+    def test_empty(self):
+        self.assertEqual(compute_many('flow', []), [])
+
+    def test_unknown_screen(self):
+        self.assertRaises(ValueError, compute_many, 'temperature', [DEFAULTS])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -15,7 +15,7 @@
 
 import unittest
 
-from capillary import Capillary
+from capillary import Capillary, AFFECTED_VALUES, POWER_LAWS
 
 class TestCapillary(unittest.TestCase):
 
@@ -102,5 +102,52 @@ class TestCapillary(unittest.TestCase):
         value = self.capillary.micro_ep(60)
         self.assertAlmostEqual(value, 0.00409, places=5)
 
+    def test_micro_ep_many(self):
+        values = self.capillary.micro_ep_many([60, 330, 600])
+        for value, time in zip(values, [60, 330, 600]):
+            self.assertAlmostEqual(value, self.capillary.micro_ep(time))
+
+    def test_power_laws(self):
+        for name, (constant, exponents) in POWER_LAWS.items():
+            value = constant
+            for attribute, exponent in exponents:
+                value *= getattr(self.capillary, attribute)**exponent
+            expected = getattr(self.capillary, name)()
+            self.assertAlmostEqual(value / expected, 1.0, places=12, msg=name)
+
+class TestCapillaryCache(unittest.TestCase):
+
+    def setUp(self):
+        self.capillary = Capillary()
+
+    def test_values_are_cached(self):
+        self.capillary.flow_rate_flow()
+        self.assertIn('flow_rate_flow', self.capillary._cache)
+        self.assertIn('length_per_minute', self.capillary._cache)
+        self.assertIn('micro_eof', self.capillary._cache)
+
+    def test_change_invalidates_dependent_values(self):
+        self.capillary.flow_rate_flow()
+        self.capillary.capillary_volume()
+        self.capillary.voltage = 25000.0
+        self.assertNotIn('flow_rate_flow', self.capillary._cache)
+        self.assertNotIn('micro_eof', self.capillary._cache)
+        self.assertIn('capillary_volume', self.capillary._cache)
+
+    def test_value_is_computed_again(self):
+        before = self.capillary.analyte_injected_pmol()
+        self.capillary.concentration *= 2
+        after = self.capillary.analyte_injected_pmol()
+        self.assertAlmostEqual(after, 2 * before)
+
+    def test_same_value_keeps_cache(self):
+        self.capillary.field_strength()
+        self.capillary.voltage = self.capillary.voltage
+        self.assertIn('field_strength', self.capillary._cache)
+
+    def test_affected_values_are_transitive(self):
+        self.assertIn('analyte_injected_pmol', AFFECTED_VALUES['pressure'])
+        self.assertNotIn('capillary_volume', AFFECTED_VALUES['voltage'])
+
 if __name__ == '__main__':
     unittest.main()
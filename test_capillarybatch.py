@@ -0,0 +1,67 @@
+# -*. coding: utf-8 -*-
+# Copyright (c) 2015 CNRS and University of Strasbourg
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+
+import unittest
+
+import numpy as np
+
+from capillary import Capillary
+from capillarybatch import CapillaryBatch, INPUTS, OUTPUTS
+
+class TestCapillaryBatch(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(42)
+        self.columns = {}
+        for name in INPUTS:
+            self.columns[name] = rng.uniform(1.0, 100.0, 50)
+        self.batch = CapillaryBatch(**self.columns)
+        self.capillaries = [Capillary(**dict((name, float(self.columns[name][i]))
+                                             for name in INPUTS))
+                            for i in range(50)]
+
+    def test_methods_match_scalar(self):
+        for name in OUTPUTS:
+            values = getattr(self.batch, name)()
+            expected = [getattr(capillary, name)()
+                        for capillary in self.capillaries]
+            np.testing.assert_allclose(values, expected, rtol=1e-12)
+
+    def test_compute_all_match_scalar(self):
+        results = self.batch.compute_all(time=60.0)
+        for name in OUTPUTS:
+            expected = [getattr(capillary, name)()
+                        for capillary in self.capillaries]
+            np.testing.assert_allclose(results[name], expected, rtol=1e-12)
+        expected = [capillary.micro_ep(60.0) for capillary in self.capillaries]
+        np.testing.assert_allclose(results['micro_ep'], expected, rtol=1e-12)
+
+    def test_broadcast_scalar_inputs(self):
+        batch = CapillaryBatch(diameter=[25.0, 50.0, 75.0])
+        self.assertEqual(len(batch), 3)
+        self.assertEqual(batch.total_length.shape, (3,))
+
+    def test_from_capillaries(self):
+        batch = CapillaryBatch.from_capillaries(self.capillaries)
+        np.testing.assert_array_equal(batch.diameter, self.columns['diameter'])
+
+    def test_division_by_zero(self):
+        batch = CapillaryBatch(viscosity=[1.0, 0.0])
+        results = batch.compute_all()
+        self.assertTrue(np.isfinite(results['delivered_volume'][0]))
+        self.assertTrue(np.isinf(results['delivered_volume'][1]))
+
+if __name__ == '__main__':
+    unittest.main()
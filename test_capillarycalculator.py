@@ -0,0 +1,90 @@
+# -*. coding: utf-8 -*-
+# Copyright (c) 2015 CNRS and University of Strasbourg
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+
+import subprocess
+import sys
+import unittest
+
+from capillarycalculator import CapillaryCalculator
+from quantity import UnitError
+from storeschema import DEFAULTS
+
+class TestCapillaryCalculator(unittest.TestCase):
+
+    def setUp(self):
+        self.entries = dict(DEFAULTS)
+
+    def test_units_are_converted(self):
+        self.entries['Capillary'] = {"value": 0.6, "unit": "m"}
+        self.entries['Pressure'] = {"value": 50.0, "unit": "mbar"}
+        calculator = CapillaryCalculator(self.entries)
+        self.assertAlmostEqual(calculator.total_length, 60.0)
+        self.assertAlmostEqual(calculator.pressure, 50.0)
+        self.assertAlmostEqual(calculator.detection_time, 1200.0)
+
+    def test_molar_concentration(self):
+        self.entries['Concentration'] = {"value": 2.0, "unit": "mmol/L"}
+        calculator = CapillaryCalculator(self.entries)
+        self.assertAlmostEqual(calculator.concentration, 2.0)
+
+    def test_unit_of_another_dimension(self):
+        self.entries['Capillary'] = {"value": 60.0, "unit": "s"}
+        self.assertRaises(UnitError, CapillaryCalculator, self.entries)
+
+    def test_viscosity_units(self):
+        self.entries['Viscosity'] = {"value": 0.002, "unit": "Pa.s"}
+        self.assertAlmostEqual(CapillaryCalculator(self.entries).viscosity, 2.0)
+
+    def test_viscosity_result(self):
+        errcode, errtext, results = CapillaryCalculator(self.entries).compute_vicosity_result()
+        self.assertEqual(errcode, 0)
+        self.assertEqual(results[0][0], 'Viscosity')
+
+    def test_conductivity_null_voltage(self):
+        self.entries['Voltage'] = {"value": 0.0, "unit": "V"}
+        errcode, errtext, results = CapillaryCalculator(self.entries).compute_conductivy_result()
+        self.assertEqual((errcode, errtext), (1, "The voltage cannot be null"))
+
+    def test_flow_window_too_long(self):
+        self.entries['Towindow'] = {"value": 70.0, "unit": "cm"}
+        errcode, errtext, results = CapillaryCalculator(self.entries).compute_flow_result()
+        self.assertEqual(errcode, 1)
+
+    def test_mobility_null_time(self):
+        self.entries['Timecompounds'] = {"value": [1.0, 0.0], "unit": ["min", "s"]}
+        errcode, errtext, results = CapillaryCalculator(self.entries).compute_mobility_result()
+        self.assertEqual(errtext, "The time for compound 2 cannot be null")
+
+    def test_mobility_result(self):
+        self.entries['Timecompounds'] = {"value": [1.0, 30.0, 2.0],
+                                         "unit": ["min", "s", "min"]}
+        calculator = CapillaryCalculator(self.entries)
+        errcode, errtext, results = calculator.compute_mobility_result()
+        self.assertEqual(errcode, 0)
+        self.assertEqual([key for key, value, unit in results],
+                         ["MicroEOF", "MicroEP"])
+        microep = results[1][1]
+        for value, time in zip(microep, [60.0, 30.0, 120.0]):
+            self.assertAlmostEqual(value, calculator.micro_ep(time))
+
+    def test_import_without_kivy(self):
+        code = ("import sys, capillarycalculator, cetoolbox; "
+                "print(sorted(name for name in ('kivy', 'numpy') "
+                "if name in sys.modules))")
+        output = subprocess.check_output([sys.executable, '-c', code])
+        self.assertEqual(output.strip(), b'[]')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+# -*. coding: utf-8 -*-
+# Copyright (c) 2015 CNRS and University of Strasbourg
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+
+import importlib
+import unittest
+
+import storetesting
+from storetesting import StoreTestCase
+from resultcache import get_result_cache
+from storeschema import DEFAULTS
+
+store = capillarymanager = None
+
+def setUpModule():
+    global store, capillarymanager
+    store = storetesting.import_store()
+    capillarymanager = importlib.import_module('capillarymanager')
+
+def tearDownModule():
+    storetesting.restore()
+
+class TestSaveAndCompute(StoreTestCase):
+
+    def setUp(self):
+        StoreTestCase.setUp(self)
+        filename = store.STORE_FILENAME
+        store.STORE_FILENAME = self.filename
+        self.addCleanup(setattr, store, 'STORE_FILENAME', filename)
+        self.addCleanup(setattr, store, '_store', store._store)
+        store._store = None
+        get_result_cache().invalidate()
+        self.addCleanup(get_result_cache().invalidate)
+        store.create_store()
+        self.entries = dict((key, dict(DEFAULTS[key]))
+                            for key in ('Capillary', 'Towindow', 'Idiameter',
+                                        'Pressure', 'Time', 'Viscosity',
+                                        'Concentration', 'Molweight', 'Voltage'))
+
+    def test_repeated_tap_does_not_write(self):
+        self.entries['Pressure'] = {"value": 1.0, "unit": "psi"}
+        errcode, errtext, results = capillarymanager.save_and_compute(
+            self.entries, 'save_injection_result')
+        self.assertEqual(errcode, 0)
+        writes = len(self.writes)
+        self.assertEqual(self.read_file()['Pressure']["value"], 1.0)
+        self.assertEqual(capillarymanager.save_and_compute(self.entries,
+                                                           'save_injection_result'),
+                         (errcode, errtext, results))
+        self.assertEqual(len(self.writes), writes)
+
+    def test_changed_value_written(self):
+        capillarymanager.save_and_compute(self.entries, 'save_injection_result')
+        writes = len(self.writes)
+        self.entries['Time'] = {"value": 20.0, "unit": "s"}
+        capillarymanager.save_and_compute(self.entries, 'save_injection_result')
+        self.assertEqual(len(self.writes), writes + 1)
+        self.assertEqual(self.read_file()['Time']["value"], 20.0)
+
+if __name__ == '__main__':
+    unittest.main()
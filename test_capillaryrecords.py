@@ -0,0 +1,109 @@
+# -*. coding: utf-8 -*-
+# Copyright (c) 2015 CNRS and University of Strasbourg
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+
+import unittest
+
+from capillary import Capillary, INPUTS
+from capillaryrecords import CapillaryRecords, DEFAULT_INPUTS
+
+class TestCapillaryRecords(unittest.TestCase):
+
+    def setUp(self):
+        self.records = CapillaryRecords(diameter=[25.0, 50.0, 75.0],
+                                        duration=[5.0, 10.0, 15.0])
+
+    def test_defaults(self):
+        self.assertEqual(len(self.records), 3)
+        self.assertEqual(list(self.records.column('voltage')), [30000.0] * 3)
+        self.assertEqual(len(CapillaryRecords()), 0)
+
+    def test_index(self):
+        capillary = self.records[1]
+        self.assertEqual(capillary.diameter, 50.0)
+        self.assertEqual(capillary.delivered_volume(),
+                         Capillary(diameter=50.0, duration=10.0).delivered_volume())
+        self.assertEqual(self.records[-1].diameter, 75.0)
+
+    def test_slice(self):
+        records = self.records[1:]
+        self.assertEqual(len(records), 2)
+        self.assertEqual(list(records.column('duration')), [10.0, 15.0])
+        self.assertEqual(len(self.records), 3)
+
+    def test_iteration(self):
+        rows = list(self.records)
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[2][INPUTS.index('diameter')], 75.0)
+        self.assertEqual(rows[0][INPUTS.index('pressure')],
+                         DEFAULT_INPUTS[INPUTS.index('pressure')])
+
+    def test_append_and_extend(self):
+        self.records.append(Capillary(diameter=100.0))
+        self.records.append(voltage=10000.0)
+        self.records.extend([tuple(DEFAULT_INPUTS)] * 2)
+        self.assertEqual(len(self.records), 7)
+        self.assertEqual(self.records[3].diameter, 100.0)
+        self.assertEqual(self.records[4].voltage, 10000.0)
+        self.assertEqual(self.records.nbytes, 7 * 8 * len(INPUTS))
+
+    def test_from_capillaries(self):
+        capillaries = [Capillary(total_length=float(length)) for length in range(60, 70)]
+        records = CapillaryRecords.from_capillaries(capillaries)
+        self.assertEqual(list(records.column('total_length')),
+                         [float(length) for length in range(60, 70)])
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, CapillaryRecords, width=[1.0])
+        self.assertRaises(ValueError, CapillaryRecords, diameter=[1.0],
+                          duration=[1.0, 2.0])
+        self.assertRaises(ValueError, self.records.append, width=1.0)
+
+    def test_append_invalid_value(self):
+        size = len(self.records)
+        self.assertRaises(TypeError, self.records.append, diameter='x')
+        self.assertEqual([len(column) for column in self.records.columns],
+                         [size] * len(INPUTS))
+
+    def test_extend_short_row(self):
+        size = len(self.records)
+        self.assertRaises(ValueError, self.records.extend,
+                          [tuple(DEFAULT_INPUTS), (1.0, 2.0)])
+        self.assertEqual([len(column) for column in self.records.columns],
+                         [size] * len(INPUTS))
+
+    def test_to_batch(self):
+        batch = self.records.to_batch()
+        volumes = batch.delivered_volume()
+        for i, capillary in enumerate([self.records[i] for i in range(3)]):
+            self.assertAlmostEqual(volumes[i], capillary.delivered_volume())
+
+class TestSlots(unittest.TestCase):
+
+    def test_no_dict(self):
+        capillary = Capillary()
+        self.assertFalse(hasattr(capillary, '__dict__'))
+        self.assertRaises(AttributeError, setattr, capillary, 'width', 1.0)
+
+    def test_cache_is_created_lazily(self):
+        capillary = Capillary()
+        self.assertIsNone(capillary._cache)
+        capillary.voltage = 25000.0
+        capillary.field_strength()
+        self.assertIn('field_strength', capillary._cache)
+        capillary.invalidate()
+        self.assertEqual(capillary.field_strength(), 250.0)
+
+if __name__ == '__main__':
+    unittest.main()
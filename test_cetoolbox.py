@@ -0,0 +1,96 @@
+# -*. coding: utf-8 -*-
+# Copyright (c) 2015 CNRS and University of Strasbourg
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+
+import csv
+import io
+import unittest
+
+from cetoolbox import compute_row, run_batch
+from runhistory import RunHistory
+
+class TestComputeRow(unittest.TestCase):
+
+    def setUp(self):
+        self.row = {"Capillary": "60", "Towindow": "50", "Idiameter": "50",
+                    "Pressure": "0.5", "PressureUnit": "psi", "Time": "15",
+                    "Viscosity": "1", "Concentration": "1",
+                    "Molweight": "1000", "Voltage": "30000"}
+
+    def test_injection(self):
+        errcode, errtext, results = compute_row("injection", self.row)
+        self.assertEqual(errcode, 0)
+        results = dict((key, value) for key, value, unit in results)
+        self.assertAlmostEqual(results["Hydrodynamicinjection"], 13.22, places=2)
+
+    def test_empty_field(self):
+        self.row["Time"] = ""
+        errcode, errtext, results = compute_row("injection", self.row)
+        self.assertEqual((errcode, errtext), (1, "Empty field not allowed"))
+
+    def test_validation(self):
+        self.row["Towindow"] = "70"
+        errcode, errtext, results = compute_row("injection", self.row)
+        self.assertEqual(errcode, 1)
+        self.assertEqual(results, [])
+
+    def test_clamping(self):
+        self.row["PressureUnit"] = "bar"
+        self.row["Pressure"] = "50"
+        errcode, errtext, results = compute_row("injection", self.row)
+        results = dict((key, value) for key, value, unit in results)
+        self.assertEqual(errcode, 2)
+        self.assertEqual(results["Pluglenperlentowin"], 100.)
+        self.assertEqual(results["Hydrodynamicinjection"],
+                         results["Capillaryvolume"])
+
+    def test_unknown_unit(self):
+        self.row["PressureUnit"] = "atm"
+        errcode, errtext, results = compute_row("injection", self.row)
+        self.assertEqual(errcode, 1)
+
+    def test_unit_of_another_dimension(self):
+        self.row["CapillaryUnit"] = "s"
+        errcode, errtext, results = compute_row("injection", self.row)
+        self.assertEqual((errcode, errtext), (1, "s is not a unit of length"))
+
+class TestRunBatch(unittest.TestCase):
+
+    def test_mobility(self):
+        infile = io.StringIO(u"Capillary,Towindow,Voltage,Electroosmosis,"
+                             u"Timecompound1,Timecompound2,Timecompound2Unit\n"
+                             u"60,50,30000,1,2,90,s\n"
+                             u"60,50,30000,1,2,0,s\n")
+        outfile = io.StringIO()
+        self.assertEqual(run_batch(infile, outfile, "mobility"), (2, 1))
+        rows = list(csv.DictReader(io.StringIO(outfile.getvalue())))
+        self.assertEqual(rows[0]["errcode"], "0")
+        self.assertAlmostEqual(float(rows[0]["MicroEP2"]), -0.000556, places=6)
+        self.assertEqual(rows[1]["MicroEP2"], "")
+
+    def test_history(self):
+        infile = io.StringIO(u"Capillary,Towindow,Idiameter,Voltage,Electroosmosis\n"
+                             u"60,50,50,30000,1\n"
+                             u"60,50,50,0,1\n"
+                             u"60,,50,30000,1\n")
+        history = RunHistory(':memory:')
+        run_batch(infile, io.StringIO(), "flow", history)
+        runs = history.find()
+        self.assertEqual(len(runs), 1)
+        self.assertEqual(runs[0]["calculation"], "flow")
+        self.assertEqual(runs[0]["voltage"], 30000.0)
+        self.assertAlmostEqual(runs[0]["electro_osmosis_time"], 60.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+# -*. coding: utf-8 -*-
+# Copyright (c) 2015 CNRS and University of Strasbourg
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+
+import unittest
+
+from compoundlist import CompoundList, parse_times
+
+class TestParseTimes(unittest.TestCase):
+
+    def test_lines_and_units(self):
+        values, units = parse_times(u"12.5\n13.1 min\r\n800 s\n\n", u"min")
+        self.assertEqual(values, [12.5, 13.1, 800.0])
+        self.assertEqual(units, [u"min", u"min", u"s"])
+
+    def test_spreadsheet_columns(self):
+        values, units = parse_times(u"1\t2\t3", u"s")
+        self.assertEqual(values, [1.0, 2.0, 3.0])
+        self.assertEqual(units, [u"s"] * 3)
+
+    def test_unit_without_space(self):
+        self.assertEqual(parse_times(u"30s; 2min"), ([30.0, 2.0], [u"s", u"min"]))
+
+    def test_decimal_comma(self):
+        self.assertEqual(parse_times(u"12,5\n13,1", u"min")[0], [12.5, 13.1])
+        self.assertEqual(parse_times(u"12,5\t800 s")[0], [12.5, 800.0])
+        self.assertEqual(parse_times(u"12,5")[0], [12.5])
+
+    def test_comma_separator(self):
+        self.assertEqual(parse_times(u"12.5, 13.1 ,2 min")[0], [12.5, 13.1, 2.0])
+        self.assertEqual(parse_times(u"12,5 s,13 s")[0], [12.5, 13.0])
+
+    def test_invalid_time(self):
+        self.assertRaises(ValueError, parse_times, u"Time\n12.5")
+        self.assertRaises(ValueError, parse_times, u"12.5 h")
+        self.assertRaises(ValueError, parse_times, u"  \n")
+
+class TestCompoundList(unittest.TestCase):
+
+    def test_default(self):
+        compounds = CompoundList.default()
+        self.assertEqual(compounds.to_entry(), {"value": [1.0], "unit": [u"min"]})
+
+    def test_edit(self):
+        compounds = CompoundList.default()
+        row = compounds.add()
+        self.assertEqual(row, {"index": 1, "label": u"Time compound 2",
+                               "value": u"1.0", "unit": u"min"})
+        compounds.set_value(1, u"30")
+        compounds.set_unit(1, u"s")
+        self.assertEqual(compounds.to_entry(), {"value": [1.0, 30.0],
+                                                "unit": [u"min", u"s"]})
+        self.assertTrue(compounds.remove_last())
+        self.assertFalse(compounds.remove_last())
+        self.assertEqual(len(compounds), 1)
+
+    def test_empty_value(self):
+        compounds = CompoundList.default()
+        compounds.set_value(0, u"")
+        self.assertRaises(ValueError, compounds.to_entry)
+
+if __name__ == '__main__':
+    unittest.main()
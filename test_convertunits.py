@@ -15,6 +15,9 @@
 
 import unittest
 
+import numpy as np
+
+from convertunits import convert_many, get_units
 from convertunits import LengthUnits 
 from convertunits import PressureUnits 
 from convertunits import TimeUnits 
@@ -22,6 +25,8 @@ from convertunits import ConcentrationUnits
 from convertunits import MolConcentrationUnits 
 from convertunits import MolWeightUnits 
 from convertunits import VoltUnits 
+from convertunits import ViscosityUnits
+from convertunits import CurrentUnits
 
 class TestLengthUnits(unittest.TestCase):
 
@@ -113,5 +118,65 @@ class TestVoltUnits(unittest.TestCase):
         value = VoltUnits.convert_unit(100, 'mV', 'KV')
         self.assertEqual(value, 0.0001)
 
+class TestViscosityUnits(unittest.TestCase):
+
+    def test_convert_pas_to_cp(self):
+        value = ViscosityUnits.convert_unit(0.001, 'Pa.s', 'cp')
+        self.assertAlmostEqual(value, 1.0)
+
+    def test_convert_mpas_to_cp(self):
+        value = ViscosityUnits.convert_unit(2.5, 'mPa.s', 'cp')
+        self.assertEqual(value, 2.5)
+
+class TestCurrentUnits(unittest.TestCase):
+
+    def test_convert_ma_to_microa(self):
+        value = CurrentUnits.convert_unit(0.025, 'mA', u'µA')
+        self.assertAlmostEqual(value, 25.0)
+
+class TestUnitRegistry(unittest.TestCase):
+
+    def test_get_units(self):
+        self.assertIs(get_units('psi'), PressureUnits)
+        self.assertIs(get_units(u'µm'), LengthUnits)
+        self.assertEqual(PressureUnits.dimension, 'pressure')
+
+    def test_get_unknown_units(self):
+        self.assertRaises(ValueError, get_units, 'furlong')
+
+    def test_factor_table(self):
+        table = PressureUnits.unitList.table
+        indexes = PressureUnits.unitList.indexes
+        self.assertEqual(table[indexes['bar']][indexes['mbar']], 1000)
+
+class TestConvertMany(unittest.TestCase):
+
+    def test_convert_many_single_unit(self):
+        values = TimeUnits.convert_many([1.0, 2.0], 'min', 's')
+        np.testing.assert_allclose(values, [60.0, 120.0])
+
+    def test_convert_many_mixed_units(self):
+        values = convert_many(np.array([1.0, 500.0, 0.1]),
+                              np.array(['psi', 'mbar', 'bar']), 'mbar')
+        expected = [PressureUnits.convert_unit(1.0, 'psi', 'mbar'), 500.0,
+                    100.0]
+        np.testing.assert_allclose(values, expected)
+
+    def test_convert_many_match_convert_unit(self):
+        units = ['m', 'cm', 'mm', u'µm']
+        values = np.arange(1.0, 17.0).reshape(4, 4)
+        from_units = np.array([units] * 4)
+        to_units = from_units.T
+        converted = LengthUnits.convert_many(values, from_units, to_units)
+        for i in range(4):
+            for j in range(4):
+                expected = LengthUnits.convert_unit(values[i, j],
+                                                    from_units[i, j],
+                                                    to_units[i, j])
+                self.assertAlmostEqual(converted[i, j], expected)
+
+    def test_convert_many_different_dimensions(self):
+        self.assertRaises(ValueError, convert_many, [1.0], 'psi', 's')
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,74 @@
+# -*. coding: utf-8 -*-
+# Copyright (c) 2015 CNRS and University of Strasbourg
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+
+import unittest
+
+import numpy as np
+
+from capillary import Capillary
+from goalseek import goal_seek, solve_bracketed
+
+class TestGoalSeek(unittest.TestCase):
+
+    def setUp(self):
+        self.capillary = Capillary()
+
+    def test_pressure_for_volume(self):
+        pressure = goal_seek(self.capillary, 'delivered_volume', 'pressure', 10.0)
+        self.capillary.pressure = pressure
+        self.assertAlmostEqual(self.capillary.delivered_volume(), 10.0)
+
+    def test_array_of_targets(self):
+        targets = np.array([1.0, 2.5, 5.0])
+        diameters = goal_seek(self.capillary, 'delivered_volume', 'diameter', targets)
+        self.assertEqual(diameters.shape, (3,))
+        for diameter, target in zip(diameters, targets):
+            self.capillary.diameter = diameter
+            self.assertAlmostEqual(self.capillary.delivered_volume(), target)
+
+    def test_plug_percent(self):
+        duration = goal_seek(self.capillary, 'plug_percent_to_window', 'duration', 2.0)
+        self.capillary.duration = duration
+        plug = self.capillary.injection_plug_length()
+        self.assertAlmostEqual((plug / 10) / self.capillary.to_window_length * 100, 2.0)
+        length = goal_seek(self.capillary, 'plug_percent_total', 'total_length', 1.0)
+        self.capillary.total_length = length
+        plug = self.capillary.injection_plug_length()
+        self.assertAlmostEqual((plug / 10) / length * 100, 1.0)
+
+    def test_pmol(self):
+        duration = goal_seek(self.capillary, 'analyte_injected_pmol', 'duration', 0.5)
+        self.capillary.duration = duration
+        self.assertAlmostEqual(self.capillary.analyte_injected_pmol(), 0.5)
+
+    def test_independent_input(self):
+        self.assertRaises(ValueError, goal_seek, self.capillary,
+                          'delivered_volume', 'voltage', 1.0)
+
+    def test_function(self):
+        targets = [0.001, 0.002]
+        times = goal_seek(self.capillary, lambda batch: batch.micro_ep(60.0),
+                          'electro_osmosis_time', targets, low=61.0, high=1e6)
+        for time, target in zip(times, targets):
+            self.capillary.electro_osmosis_time = time
+            self.assertAlmostEqual(self.capillary.micro_ep(60.0), target, places=9)
+
+    def test_solve_bracketed(self):
+        solution = solve_bracketed(lambda x: x**2, [4.0, 9.0, 100.0], 0.0, 5.0)
+        np.testing.assert_allclose(solution[:2], [2.0, 3.0])
+        self.assertTrue(np.isnan(solution[2]))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+# -*. coding: utf-8 -*-
+# Copyright (c) 2015 CNRS and University of Strasbourg
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+import instrumentation
+from instrumentation import timed
+
+@timed('test.double')
+def double(value):
+    return 2 * value
+
+class TestInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        self.was_enabled = instrumentation.is_enabled()
+        instrumentation.reset()
+
+    def tearDown(self):
+        if self.was_enabled:
+            instrumentation.enable()
+        else:
+            instrumentation.disable()
+        instrumentation.reset()
+
+    def test_disabled_records_nothing(self):
+        instrumentation.disable()
+        self.assertEqual(double(2), 4)
+        self.assertEqual(instrumentation.get_stats(), {})
+
+    def test_enabled_counts_calls(self):
+        instrumentation.enable()
+        for i in range(5):
+            double(i)
+        stats = instrumentation.get_stats()['test.double']
+        self.assertEqual(stats['count'], 5)
+        self.assertGreaterEqual(stats['max_us'], stats['p50_us'])
+
+    def test_percentiles(self):
+        for elapsed in range(1, 101):
+            instrumentation.record('test.record', elapsed * 1e-6)
+        stats = instrumentation.get_stats()['test.record']
+        self.assertAlmostEqual(stats['p50_us'], 51.0)
+        self.assertAlmostEqual(stats['p99_us'], 99.0)
+        self.assertAlmostEqual(stats['total_us'], 5050.0)
+
+    def test_record_from_threads(self):
+        def run():
+            for i in range(2000):
+                instrumentation.record('test.threads', 1e-6)
+        threads = [threading.Thread(target=run) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(instrumentation.get_stats()['test.threads']['count'], 8000)
+
+    def test_dump(self):
+        instrumentation.record('test.record', 1e-3)
+        directory = tempfile.mkdtemp()
+        try:
+            filename = instrumentation.dump(os.path.join(directory, 'stats.json'))
+            with open(filename) as fd:
+                stats = json.load(fd)
+        finally:
+            shutil.rmtree(directory)
+        self.assertEqual(stats['test.record']['count'], 1)
+
+    def test_signal_while_recording(self):
+        instrumentation.record('test.record', 1e-3)
+        directory = tempfile.mkdtemp()
+        dump_filename = instrumentation.DUMP_FILENAME
+        instrumentation.DUMP_FILENAME = os.path.join(directory, 'stats-%d.json')
+        try:
+            # the signal interrupts a thread holding the lock of the timers
+            with instrumentation._lock:
+                thread = instrumentation._dump_on_signal(None, None)
+            thread.join(5)
+            self.assertFalse(thread.is_alive())
+            with open(instrumentation.DUMP_FILENAME % os.getpid()) as fd:
+                stats = json.load(fd)
+        finally:
+            instrumentation.DUMP_FILENAME = dump_filename
+            shutil.rmtree(directory)
+        self.assertEqual(stats['test.record']['count'], 1)
+
+if __name__ == '__main__':
+    unittest.main()
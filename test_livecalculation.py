@@ -0,0 +1,89 @@
+# -*. coding: utf-8 -*-
+# Copyright (c) 2015 CNRS and University of Strasbourg
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+
+import unittest
+
+from capillarycalculator import CapillaryCalculator
+from livecalculation import LiveCalculation
+from storeschema import DEFAULTS
+
+class TestLiveCalculation(unittest.TestCase):
+
+    def setUp(self):
+        self.live = LiveCalculation(DEFAULTS, 'compute_injection_result')
+
+    def expected(self, key, value, unit):
+        entries = dict(DEFAULTS)
+        entries[key] = {"value": value, "unit": unit}
+        return CapillaryCalculator(entries).compute_injection_result()
+
+    def test_same_results_as_the_calculator(self):
+        errcode, errtext, changed = self.live.compute()
+        self.assertEqual((errcode, errtext, changed),
+                         CapillaryCalculator(DEFAULTS).compute_injection_result())
+
+    def test_only_changed_results(self):
+        self.live.compute()
+        self.assertTrue(self.live.set_value('Voltage', 25000.0))
+        errcode, errtext, changed = self.live.compute()
+        self.assertEqual([key for key, value, unit in changed], ['Fieldstrength'])
+        self.assertEqual(changed[0], self.expected('Voltage', 25000.0, u"V")[2][-2])
+
+    def test_affected_values_only_are_computed_again(self):
+        self.live.compute()
+        cache = self.live.calculator.capillary._cache
+        self.live.set_value('Voltage', 25000.0)
+        self.assertIn('capillary_volume', cache)
+        self.assertNotIn('field_strength', cache)
+
+    def test_unit_change(self):
+        self.live.compute()
+        self.live.set_value('Capillary', 0.6, u"m")
+        self.assertEqual(self.live.compute()[2], [])
+        self.live.set_value('Pressure', 50.0, u"mbar")
+        errcode, errtext, changed = self.live.compute()
+        expected = dict((key, value) for key, value, unit
+                        in self.expected('Pressure', 50.0, u"mbar")[2])
+        for key, value, unit in changed:
+            self.assertAlmostEqual(value, expected[key])
+
+    def test_molweight_updates_molar_concentration(self):
+        self.live.set_value('Concentration', 2.0, u"mmol/L")
+        self.live.set_value('Molweight', 500.0)
+        self.assertAlmostEqual(self.live.calculator.concentration, 1.0)
+        self.assertAlmostEqual(self.live.calculator.capillary.concentration, 1.0)
+
+    def test_unchanged_value(self):
+        self.assertFalse(self.live.set_value('Voltage', 30000.0))
+
+    def test_error_then_fixed(self):
+        self.live.compute()
+        self.live.set_value('Viscosity', 0.0)
+        self.assertEqual(self.live.compute()[:2], (1, "The viscosity cannot be null"))
+        self.live.set_value('Viscosity', 1.0)
+        errcode, errtext, changed = self.live.compute()
+        self.assertEqual(errcode, 0)
+        self.assertEqual(len(changed), 11)
+
+    def test_store_is_not_written(self):
+        entries = dict((key, dict(entry)) for key, entry in DEFAULTS.items())
+        live = LiveCalculation(entries, 'compute_mobility_result')
+        live.set_value('Timecompounds', [2.0, 3.0], [u"min", u"min"])
+        errcode, errtext, changed = live.compute()
+        self.assertEqual(len(dict((key, value) for key, value, unit in changed)['MicroEP']), 2)
+        self.assertEqual(entries['Timecompounds'], DEFAULTS['Timecompounds'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+# -*. coding: utf-8 -*-
+# Copyright (c) 2015 CNRS and University of Strasbourg
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+
+import unittest
+
+import numpy as np
+
+from quantity import Quantity, UnitError, units_of
+from convertunits import LengthUnits
+
+class TestQuantity(unittest.TestCase):
+
+    def test_units_of(self):
+        self.assertIs(units_of(u"µm", 'length'), LengthUnits)
+        self.assertRaises(UnitError, units_of, 'furlong')
+        self.assertRaises(UnitError, units_of, 's', 'length')
+
+    def test_dimension_checked(self):
+        self.assertEqual(Quantity(2.0, u"µA", 'current').dimension, 'current')
+        self.assertRaises(UnitError, Quantity, 2.0, u"µA", 'length')
+        self.assertRaises(UnitError, Quantity(1.0, 'm').to, 's')
+
+    def test_convert(self):
+        self.assertEqual(Quantity(0.6, 'm').to('cm'), Quantity(60.0, 'cm'))
+        self.assertEqual(Quantity([1.0, 2.0], 'min').magnitude_in('s'), [60.0, 120.0])
+        np.testing.assert_allclose(Quantity(np.array([1.0, 2.0]), 'bar').magnitude_in('mbar'),
+                                   [1000.0, 2000.0])
+        quantity = Quantity(5.0, 'cp')
+        self.assertIs(quantity.to('cp'), quantity)
+
+    def test_from_entry(self):
+        quantity = Quantity.from_entry({"value": 0.5, "unit": "psi"}, 'pressure', 'mbar')
+        self.assertAlmostEqual(quantity.magnitude, 34.474)
+        self.assertEqual(quantity.unit, 'mbar')
+        self.assertRaises(UnitError, Quantity.from_entry,
+                          {"value": 0.5, "unit": "psi"}, 'time', 's')
+
+    def test_from_entry_unit_by_value(self):
+        entry = {"value": [1.0, 30.0], "unit": ["min", "s"]}
+        self.assertEqual(Quantity.from_entry(entry, 'time', 's').magnitude, [60.0, 30.0])
+        self.assertRaises(UnitError, Quantity.from_entry, entry, 'time')
+        entry["unit"][1] = "cm"
+        self.assertRaises(UnitError, Quantity.from_entry, entry, 'time', 's')
+
+if __name__ == '__main__':
+    unittest.main()
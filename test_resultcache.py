@@ -0,0 +1,103 @@
+# -*. coding: utf-8 -*-
+# Copyright (c) 2015 CNRS and University of Strasbourg
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+
+import unittest
+
+from capillarycalculator import CapillaryCalculator
+from convertunits import PressureUnits
+from resultcache import ResultCache, canonical
+from storeschema import DEFAULTS
+
+class TestResultCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = ResultCache(maxsize=2)
+        self.result = (0, "", [("MicroEP", [1.0, 2.0], "cm²/V/s")])
+
+    def test_get_put(self):
+        self.assertIsNone(self.cache.get(('flow', 1.0)))
+        self.cache.put(('flow', 1.0), self.result)
+        self.assertEqual(self.cache.get(('flow', 1.0)), self.result)
+        stats = self.cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["size"]), (1, 1, 1))
+
+    def test_result_is_copied(self):
+        self.cache.put(('mobility',), self.result)
+        self.cache.get(('mobility',))[2][0][1].append(3.0)
+        self.assertEqual(self.cache.get(('mobility',)), self.result)
+
+    def test_least_recently_used_evicted(self):
+        self.cache.put(('flow', 1.0), self.result)
+        self.cache.put(('flow', 2.0), self.result)
+        self.cache.get(('flow', 1.0))
+        self.cache.put(('flow', 3.0), self.result)
+        self.assertIn(('flow', 1.0), self.cache)
+        self.assertNotIn(('flow', 2.0), self.cache)
+        self.assertEqual(self.cache.stats()["evictions"], 1)
+        self.cache.resize(1)
+        self.assertEqual(len(self.cache), 1)
+        self.assertEqual(self.cache.stats()["evictions"], 2)
+
+    def test_disabled(self):
+        cache = ResultCache(maxsize=0)
+        cache.put(('flow',), self.result)
+        self.assertEqual(len(cache), 0)
+
+    def test_invalidate(self):
+        self.cache.put(('flow', 1.0), self.result)
+        self.cache.put(('injection', 1.0), self.result)
+        self.assertEqual(self.cache.invalidate('flow'), 1)
+        self.assertEqual(list(self.cache._results), [('injection', 1.0)])
+        self.assertEqual(self.cache.invalidate(), 1)
+        self.assertEqual(len(self.cache), 0)
+
+    def test_canonical(self):
+        self.assertEqual(canonical([0.6 * 100.0, 1.0]), canonical([60.0, 1.0]))
+        self.assertNotEqual(canonical([60.0]), canonical([60.001]))
+        self.assertEqual(canonical([]), '')
+
+    def test_cached_result(self):
+        cache = ResultCache()
+        entries = dict(DEFAULTS)
+        expected = CapillaryCalculator(entries).compute_injection_result()
+        self.assertEqual(CapillaryCalculator(entries).cached_result('injection', cache),
+                         expected)
+        # the same capillary in other units is a hit
+        entries['Capillary'] = {"value": 0.6, "unit": "m"}
+        entries['Pressure'] = {"value": PressureUnits.convert_unit(DEFAULTS['Pressure']["value"],
+                                                                   "psi", "mbar"),
+                               "unit": "mbar"}
+        self.assertEqual(CapillaryCalculator(entries).cached_result('injection', cache),
+                         expected)
+        # the viscosity does not depend on the voltage
+        CapillaryCalculator(entries).cached_result('viscosity', cache)
+        entries['Voltage'] = {"value": 10000.0, "unit": "V"}
+        CapillaryCalculator(entries).cached_result('viscosity', cache)
+        self.assertEqual(cache.stats()["hits"], 2)
+
+    def test_cached_mobility(self):
+        cache = ResultCache()
+        entries = dict(DEFAULTS)
+        entries['Timecompounds'] = {"value": [1.0, 2.0], "unit": ["min", "min"]}
+        CapillaryCalculator(entries).cached_result('mobility', cache)
+        entries['Timecompounds'] = {"value": [60.0, 2.0], "unit": ["s", "min"]}
+        CapillaryCalculator(entries).cached_result('mobility', cache)
+        entries['Timecompounds'] = {"value": [1.0, 3.0], "unit": ["min", "min"]}
+        errcode, errtext, results = CapillaryCalculator(entries).cached_result('mobility', cache)
+        self.assertEqual(len(results[1][1]), 2)
+        self.assertEqual((cache.stats()["hits"], cache.stats()["misses"]), (1, 2))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+# -*. coding: utf-8 -*-
+# Copyright (c) 2015 CNRS and University of Strasbourg
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from capillarycalculator import CapillaryCalculator
+from runhistory import INDEXES, RunHistory, run_row
+from storeschema import DEFAULTS
+
+class TestRunHistory(unittest.TestCase):
+
+    def setUp(self):
+        self.history = RunHistory(':memory:')
+
+    def tearDown(self):
+        self.history.close()
+
+    def calculator(self, **values):
+        entries = dict(DEFAULTS)
+        for key, value in values.items():
+            entries[key] = {"value": value, "unit": DEFAULTS[key]["unit"]}
+        return CapillaryCalculator(entries)
+
+    def test_add_run(self):
+        calculator = self.calculator()
+        result = calculator.compute_injection_result()
+        self.history.add_run('injection', calculator, *result)
+        run, = self.history.find('injection')
+        self.assertEqual(run["errcode"], 0)
+        self.assertEqual(run["diameter"], 50.0)
+        self.assertAlmostEqual(run["pressure"], calculator.pressure)
+        results = dict((key, value) for key, value, unit in result[2])
+        self.assertEqual(run["delivered_volume"], results["Hydrodynamicinjection"])
+        self.assertEqual(run["plug_percent_total"], results["Pluglenpertotallen"])
+        self.assertIsNone(run["computed_viscosity"])
+
+    def test_find(self):
+        rows = []
+        for diameter in (25.0, 50.0, 75.0):
+            for time in (5.0, 15.0, 60.0):
+                calculator = self.calculator(Idiameter=diameter, Time=time)
+                rows.append(run_row('injection', calculator,
+                                    *calculator.compute_injection_result()))
+        calculator = self.calculator()
+        rows.append(run_row('viscosity', calculator,
+                            *calculator.compute_vicosity_result()))
+        self.assertEqual(self.history.add_runs(rows), 10)
+        self.assertEqual(self.history.count(), 10)
+        self.assertEqual(self.history.count('injection'), 9)
+        runs = self.history.find('injection', [('diameter', '=', 50.0),
+                                               ('plug_percent_total', '>', 2.0)])
+        self.assertEqual([run["duration"] for run in runs], [60.0])
+        self.assertEqual(len(self.history.find(where=[('diameter', '=', 50.0)])), 4)
+        self.assertEqual(len(self.history.find(limit=2)), 2)
+
+    def test_micro_ep(self):
+        calculator = self.calculator(Timecompounds=[1.0, 2.0])
+        result = calculator.compute_mobility_result()
+        self.history.add_run('mobility', calculator, *result)
+        run, = self.history.find()
+        self.assertEqual(run["micro_ep"], result[2][1][1])
+
+    def test_invalid_query(self):
+        self.assertRaises(ValueError, self.history.find, where=[('diameter; DROP', '=', 1)])
+        self.assertRaises(ValueError, self.history.find, where=[('diameter', 'LIKE', 1)])
+
+    def test_append_only(self):
+        calculator = self.calculator()
+        self.history.add_run('viscosity', calculator,
+                             *calculator.compute_vicosity_result())
+        self.assertRaises(sqlite3.DatabaseError, self.history.connection.execute,
+                          'DELETE FROM runs')
+        self.assertRaises(sqlite3.DatabaseError, self.history.connection.execute,
+                          'UPDATE runs SET diameter = 1')
+
+    def test_bulk_load(self):
+        calculator = self.calculator()
+        row = run_row('injection', calculator, *calculator.compute_injection_result())
+        cache_size = self.history.connection.execute('PRAGMA cache_size').fetchone()[0]
+        with self.history.bulk_load():
+            self.history.add_runs([row] * 5)
+        self.assertEqual(self.history.count('injection'), 5)
+        indexes = self.history.connection.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type = 'index' "
+            "AND name LIKE 'runs_%'").fetchone()[0]
+        self.assertEqual(indexes, len(INDEXES))
+        self.assertEqual(self.history.connection.execute('PRAGMA cache_size').fetchone()[0],
+                         cache_size)
+        # NORMAL
+        self.assertEqual(self.history.connection.execute('PRAGMA synchronous').fetchone()[0], 1)
+
+    def test_file(self):
+        directory = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(directory, 'history.db')
+            history = RunHistory(filename)
+            mode = history.connection.execute('PRAGMA journal_mode').fetchone()[0]
+            self.assertEqual(mode, 'wal')
+            calculator = self.calculator()
+            history.add_run('flow', calculator, *calculator.compute_flow_result())
+            history.close()
+            history = RunHistory(filename)
+            self.assertEqual(history.count('flow'), 1)
+            history.close()
+        finally:
+            shutil.rmtree(directory)
+
+if __name__ == '__main__':
+    unittest.main()
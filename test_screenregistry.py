@@ -0,0 +1,67 @@
+# -*. coding: utf-8 -*-
+# Copyright (c) 2015 CNRS and University of Strasbourg
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+
+import unittest
+
+from screenregistry import ScreenRegistry
+
+class FakeScreen(object):
+
+    def __init__(self, name):
+        self.name = name
+
+class TestScreenRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 0.0
+        self.loaded = []
+        self.registry = ScreenRegistry(self.loaded.append, lambda: self.now)
+        self.registry.register('menu', FakeScreen)
+        self.registry.register('injection', FakeScreen, 'injection.kv')
+        self.registry.register('flow', FakeScreen, 'flow.kv')
+
+    def test_screen_built_on_demand(self):
+        self.assertFalse(self.registry.is_built('injection'))
+        self.assertEqual(self.loaded, [])
+        screen = self.registry.get('injection')
+        self.assertEqual(screen.name, 'injection')
+        self.assertEqual(self.loaded, ['injection.kv'])
+        self.assertIs(self.registry.get('injection'), screen)
+
+    def test_unknown_screen(self):
+        self.assertNotIn('settings', self.registry)
+        self.assertRaises(KeyError, self.registry.get, 'settings')
+
+    def test_idle_screens(self):
+        self.registry.get('menu')
+        self.registry.get('injection')
+        self.now = 100.0
+        self.registry.get('flow')
+        self.assertEqual(sorted(self.registry.idle_screens(50)),
+                         ['injection', 'menu'])
+        self.assertEqual(self.registry.idle_screens(50, keep=('menu',)),
+                         ['injection'])
+
+    def test_evict(self):
+        screen = self.registry.get('injection')
+        self.assertIs(self.registry.evict('injection'), screen)
+        self.assertFalse(self.registry.is_built('injection'))
+        self.assertIsNone(self.registry.evict('injection'))
+        self.assertIsNot(self.registry.get('injection'), screen)
+        # the rules are parsed once
+        self.assertEqual(self.loaded, ['injection.kv'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+# -*. coding: utf-8 -*-
+# Copyright (c) 2015 CNRS and University of Strasbourg
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+
+import unittest
+
+import numpy as np
+
+from capillary import Capillary, INPUTS
+from capillarybatch import CapillaryBatch
+from sensitivity import sensitivity
+
+TIME = 120.0
+
+def output(capillary, name, time=TIME):
+    '''Return an output of a scalar capillary'''
+    if name == 'plug_percent_total':
+        return capillary.injection_plug_length() / 10 / capillary.total_length * 100
+    if name == 'plug_percent_to_window':
+        return capillary.injection_plug_length() / 10 / capillary.to_window_length * 100
+    if name in ('micro_app', 'micro_ep'):
+        return getattr(capillary, name)(time)
+    return getattr(capillary, name)()
+
+class TestSensitivity(unittest.TestCase):
+
+    def setUp(self):
+        self.capillary = Capillary()
+        self.result = sensitivity(self.capillary, time=TIME)
+
+    def test_shape(self):
+        self.assertEqual(self.result.jacobian.shape, (19, 13))
+        self.assertEqual(self.result.inputs[-1], 'time')
+
+    def test_values(self):
+        for name in self.result.outputs:
+            self.assertAlmostEqual(self.result.value(name) / output(self.capillary, name),
+                                   1.0)
+
+    def test_finite_differences(self):
+        step = 1e-6
+        for name in INPUTS + ('time',):
+            if name == 'time':
+                capillary, time = self.capillary, TIME * (1 + step)
+            else:
+                capillary, time = Capillary(), TIME
+                setattr(capillary, name, getattr(capillary, name) * (1 + step))
+            for out in self.result.outputs:
+                before = output(self.capillary, out)
+                after = output(capillary, out, time)
+                elasticity = (after - before) / before / step
+                self.assertAlmostEqual(self.result.elasticity(out, name),
+                                       elasticity, places=4,
+                                       msg="%s / %s" % (out, name))
+
+    def test_derivative(self):
+        self.assertAlmostEqual(self.result.derivative('plug_percent_total', 'diameter'),
+                               2 * self.result.value('plug_percent_total')
+                               / self.capillary.diameter)
+        self.assertEqual(self.result.elasticity('delivered_volume', 'diameter'), 4.0)
+        self.assertEqual(self.result.derivative('capillary_volume', 'voltage'), 0.0)
+
+    def test_zero_input(self):
+        capillary = Capillary(pressure=0.0)
+        result = sensitivity(capillary, outputs=['delivered_volume'])
+        self.assertEqual(result.value('delivered_volume'), 0.0)
+        capillary.pressure = 1.0
+        self.assertAlmostEqual(result.derivative('delivered_volume', 'pressure')
+                               / capillary.delivered_volume(), 1.0)
+        self.assertEqual(result.derivative('delivered_volume', 'diameter'), 0.0)
+
+    def test_batch(self):
+        diameters = np.array([25.0, 50.0, 75.0])
+        result = sensitivity(CapillaryBatch(diameter=diameters),
+                             outputs=['injection_plug_length'])
+        self.assertEqual(result.jacobian.shape, (1, 12, 3))
+        for i, diameter in enumerate(diameters):
+            scalar = sensitivity(Capillary(diameter=diameter),
+                                 outputs=['injection_plug_length'])
+            self.assertAlmostEqual(result.derivative('injection_plug_length', 'diameter')[i],
+                                   scalar.derivative('injection_plug_length', 'diameter'))
+
+    def test_unknown(self):
+        self.assertRaises(ValueError, sensitivity, self.capillary, ['micro_ep'])
+        self.assertRaises(ValueError, self.result.derivative, 'micro_ep', 'width')
+
+if __name__ == '__main__':
+    unittest.main()
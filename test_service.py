@@ -0,0 +1,127 @@
+# -*. coding: utf-8 -*-
+# Copyright (c) 2015 CNRS and University of Strasbourg
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+
+import asyncio
+import json
+import unittest
+from unittest import mock
+
+from capillarycalculator import CapillaryCalculator
+from loadtest import _request, percentile
+from service import (CalculationBatcher, RequestError, read_entries,
+                     start)
+from storeschema import DEFAULTS
+
+class TestService(unittest.TestCase):
+
+    def test_read_entries(self):
+        entries = read_entries(json.dumps({
+            "Capillary": {"value": 0.6, "unit": "m"},
+            "Idiameter": 75,
+            "Timecompounds": {"value": [1.0, 30.0], "unit": "s"}}).encode('utf-8'))
+        self.assertEqual(entries['Capillary'], {"value": 0.6, "unit": "m"})
+        self.assertEqual(entries['Idiameter'], {"value": 75.0, "unit": u"µm"})
+        self.assertEqual(entries['Timecompounds'],
+                         {"value": [1.0, 30.0], "unit": ["s", "s"]})
+        self.assertEqual(entries['Pressure'], DEFAULTS['Pressure'])
+
+    def test_read_entries_errors(self):
+        for body in (b'{', b'[]', b'{"Temperature": 20}',
+                     b'{"Capillary": "60"}', b'{"Capillary": NaN}',
+                     b'{"Capillary": {"value": 60, "unit": 1}}',
+                     b'{"Timecompounds": {"value": [1], "unit": []}}'):
+            self.assertRaises(RequestError, read_entries, body)
+
+    def test_batching(self):
+        batcher = CalculationBatcher(window=0.05)
+        async def compute():
+            futures = [batcher.compute('viscosity', DEFAULTS) for i in range(10)]
+            futures.append(batcher.compute('flow', DEFAULTS))
+            return await asyncio.gather(*futures)
+        results = asyncio.run(compute())
+        self.assertEqual(len(results), 11)
+        self.assertEqual(results[0], CapillaryCalculator(DEFAULTS).compute_vicosity_result())
+        self.assertEqual(batcher.stats()["batches"], 2)
+        self.assertEqual(batcher.stats()["largest_batch"], 10)
+
+    def test_max_batch(self):
+        batcher = CalculationBatcher(window=10.0, max_batch=4)
+        async def compute():
+            return await asyncio.gather(*[batcher.compute('conductivity', DEFAULTS)
+                                          for i in range(8)])
+        asyncio.run(compute())
+        self.assertEqual(batcher.stats()["batches"], 2)
+
+    def test_http(self):
+        async def session():
+            server = await start(port=0)
+            port = server.sockets[0].getsockname()[1]
+            try:
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+                responses = []
+                for method, path, body in (
+                        ('POST', '/mobility', b'{"Timecompounds": [1.0, 2.0]}'),
+                        ('POST', '/injection', b'{"Idiameter": 0}'),
+                        ('POST', '/injection', b'{"Capillary": "long"}'),
+                        ('GET', '/injection', b''),
+                        ('GET', '/unknown', b''),
+                        ('GET', '/stats', b'')):
+                    status, response = await _request(reader, writer, method, path, body)
+                    responses.append((status, json.loads(response.decode('utf-8'))))
+                writer.close()
+                return responses
+            finally:
+                server.close()
+                await server.wait_closed()
+        responses = asyncio.run(session())
+        status, mobility = responses[0]
+        self.assertEqual((status, mobility["errcode"]), (200, 0))
+        self.assertEqual(len(mobility["results"]["MicroEP"]["value"]), 2)
+        self.assertEqual(mobility["results"]["MicroEOF"]["unit"], u"cm²/V/s")
+        self.assertEqual(responses[1], (200, {"errcode": 1,
+                                              "errtext": "The diameter cannot be null",
+                                              "results": {}}))
+        self.assertEqual([status for status, payload in responses[2:5]], [400, 405, 404])
+        self.assertEqual(responses[5][1]["requests"], 2)
+
+    def test_http_calculation_error(self):
+        async def session():
+            server = await start(port=0)
+            port = server.sockets[0].getsockname()[1]
+            try:
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+                responses = []
+                with mock.patch('service.compute_many', side_effect=MemoryError("full")):
+                    responses.append(await _request(reader, writer, 'POST', '/flow', b'{}'))
+                # the connection is still open
+                responses.append(await _request(reader, writer, 'POST', '/flow', b'{}'))
+                writer.close()
+                return responses
+            finally:
+                server.close()
+                await server.wait_closed()
+        responses = asyncio.run(session())
+        self.assertEqual(responses[0][0], 500)
+        self.assertEqual(json.loads(responses[0][1].decode('utf-8')), {"error": "full"})
+        self.assertEqual(responses[1][0], 200)
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile(values, 100), 100)
+
+if __name__ == '__main__':
+    unittest.main()
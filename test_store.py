@@ -0,0 +1,243 @@
+# -*. coding: utf-8 -*-
+# Copyright (c) 2015 CNRS and University of Strasbourg
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+
+import json
+import os
+import threading
+import unittest
+
+import storetesting
+from storetesting import StoreTestCase
+
+store = None
+
+def setUpModule():
+    global store
+    store = storetesting.import_store()
+
+def tearDownModule():
+    storetesting.restore()
+
+class TestBatch(StoreTestCase):
+
+    def test_put_writes(self):
+        data = self.open_store()
+        data.put('Capillary', value=60.0, unit="cm")
+        self.assertEqual(len(self.writes), 1)
+        self.assertEqual(self.read_file()['Capillary'], {"value": 60.0, "unit": "cm"})
+        self.assertFalse(os.path.exists(self.filename + '.tmp'))
+
+    def test_single_write_on_exit(self):
+        data = self.open_store()
+        with data.batch():
+            data.put('Capillary', value=60.0, unit="cm")
+            data.put('Towindow', value=50.0, unit="cm")
+            self.assertEqual(self.writes, [])
+            self.assertNotIn('Capillary', self.read_file())
+        self.assertEqual(self.writes, [self.filename])
+        self.assertEqual(sorted(self.read_file()), ['Capillary', 'Towindow'])
+
+    def test_nested(self):
+        data = self.open_store()
+        with data.batch():
+            with data.batch():
+                data.put('Capillary', value=60.0, unit="cm")
+            self.assertEqual(self.writes, [])
+            data.put('Towindow', value=50.0, unit="cm")
+        self.assertEqual(len(self.writes), 1)
+        self.assertEqual(data._batch_level, 0)
+
+    def test_rollback(self):
+        data = self.open_store()
+        data.put('Capillary', value=60.0, unit="cm")
+        with self.assertRaises(ZeroDivisionError):
+            with data.batch():
+                data.put('Capillary', value=100.0, unit="cm")
+                with data.batch():
+                    data.put('Towindow', value=50.0, unit="cm")
+                    1 / 0
+        self.assertEqual(data.get('Capillary')["value"], 60.0)
+        self.assertFalse(data.exists('Towindow'))
+        self.assertEqual(data._batch_level, 0)
+        self.assertEqual(len(self.writes), 1)
+        self.assertEqual(self.read_file()['Capillary']["value"], 60.0)
+
+    def test_rollback_keyboard_interrupt(self):
+        data = self.open_store()
+        with self.assertRaises(KeyboardInterrupt):
+            with data.batch():
+                data.put('Capillary', value=100.0, unit="cm")
+                raise KeyboardInterrupt
+        self.assertFalse(data.exists('Capillary'))
+        self.assertEqual(data._batch_level, 0)
+
+    def test_unchanged_not_written(self):
+        data = self.open_store()
+        data.put('Capillary', value=60.0, unit="cm")
+        with data.batch():
+            data.get('Capillary')
+        self.assertEqual(len(self.writes), 1)
+
+    def test_apply_defaults(self):
+        data = self.open_store()
+        self.assertTrue(data.apply_defaults())
+        self.assertEqual(len(self.writes), 1)
+        self.assertIn('Capillary', self.read_file())
+        self.assertFalse(data.apply_defaults())
+        self.assertEqual(len(self.writes), 1)
+
+class TestThreads(StoreTestCase):
+
+    def run_during_batch(self, data, fail):
+        '''Open a batch on a worker thread and put an entry from the
+        current thread while the batch is open
+        '''
+        opened = threading.Event()
+        release = threading.Event()
+        def work():
+            try:
+                with data.batch():
+                    data.put('Capillary', value=100.0, unit="cm")
+                    opened.set()
+                    release.wait(5)
+                    if fail:
+                        raise ZeroDivisionError
+            except ZeroDivisionError:
+                pass
+        worker = threading.Thread(target=work)
+        worker.start()
+        self.assertTrue(opened.wait(5))
+        put = threading.Thread(target=data.put, args=('pause',),
+                               kwargs={"value": "injection"})
+        put.start()
+        # the put waits for the end of the batch
+        put.join(0.05)
+        self.assertTrue(put.is_alive())
+        release.set()
+        worker.join(5)
+        put.join(5)
+        self.assertFalse(put.is_alive())
+
+    def test_put_during_batch(self):
+        data = self.open_store()
+        self.run_during_batch(data, fail=False)
+        self.assertEqual(self.read_file()['Capillary']["value"], 100.0)
+        self.assertEqual(self.read_file()['pause']["value"], "injection")
+
+    def test_put_during_rolled_back_batch(self):
+        data = self.open_store()
+        data.put('Capillary', value=60.0, unit="cm")
+        self.run_during_batch(data, fail=True)
+        self.assertEqual(data.get('Capillary')["value"], 60.0)
+        self.assertEqual(data.get('pause')["value"], "injection")
+        self.assertEqual(self.read_file()['pause']["value"], "injection")
+
+    def test_access_during_write(self):
+        data = self.open_store()
+        writing = threading.Event()
+        release = threading.Event()
+        replace = store._replace
+        def slow_replace(source, destination):
+            writing.set()
+            release.wait(5)
+            replace(source, destination)
+        store._replace = slow_replace
+        worker = threading.Thread(target=data.put, args=('Capillary',),
+                                  kwargs={"value": 100.0, "unit": "cm"})
+        worker.start()
+        self.assertTrue(writing.wait(5))
+        # the interface neither waits for the write nor loses its put
+        self.assertEqual(data.get('Capillary')["value"], 100.0)
+        data.put('pause', value="injection")
+        self.assertEqual(self.writes, [])
+        self.assertTrue(data.is_writing())
+        release.set()
+        worker.join(5)
+        self.assertFalse(data.is_writing())
+        self.assertEqual(self.read_file()['pause']["value"], "injection")
+        self.assertEqual(self.read_file()['Capillary']["value"], 100.0)
+
+class TestGetStore(StoreTestCase):
+
+    def setUp(self):
+        StoreTestCase.setUp(self)
+        filename = store.STORE_FILENAME
+        store.STORE_FILENAME = self.filename
+        self.addCleanup(setattr, store, 'STORE_FILENAME', filename)
+        self.addCleanup(setattr, store, '_store', store._store)
+        store._store = None
+        store.reset_store_stats()
+        self.addCleanup(store.reset_store_stats)
+
+    def test_hit(self):
+        first = store.get_store()
+        first.put('Capillary', value=60.0, unit="cm")
+        self.assertIs(store.get_store(), first)
+        self.assertEqual(store.get_store_stats(), {"hits": 1, "misses": 1})
+
+    def test_miss_after_external_write(self):
+        first = store.get_store()
+        first.put('Capillary', value=60.0, unit="cm")
+        with open(self.filename, 'w') as fd:
+            json.dump({"Capillary": {"value": 100.0, "unit": "cm"},
+                       "Towindow": {"value": 50.0, "unit": "cm"}}, fd)
+        second = store.get_store()
+        self.assertIsNot(second, first)
+        self.assertEqual(second.get('Capillary')["value"], 100.0)
+        self.assertEqual(store.get_store_stats(), {"hits": 0, "misses": 2})
+        self.assertIs(store.get_store(), second)
+
+    def test_hit_during_batch(self):
+        first = store.get_store()
+        with first.batch():
+            first.put('Capillary', value=60.0, unit="cm")
+            self.assertIs(store.get_store(), first)
+
+    def test_reset_store_stats(self):
+        store.get_store()
+        store.get_store()
+        store.reset_store_stats()
+        self.assertEqual(store.get_store_stats(), {"hits": 0, "misses": 0})
+
+class TestGetHistory(unittest.TestCase):
+
+    def setUp(self):
+        self.addCleanup(setattr, store, '_history', store._history)
+        store._history = None
+        self.environ = os.environ.pop(store.HISTORY_VARIABLE, None)
+        self.addCleanup(self.restore_environ)
+        filename = store.HISTORY_FILENAME
+        store.HISTORY_FILENAME = ':memory:'
+        self.addCleanup(setattr, store, 'HISTORY_FILENAME', filename)
+
+    def restore_environ(self):
+        os.environ.pop(store.HISTORY_VARIABLE, None)
+        if self.environ is not None:
+            os.environ[store.HISTORY_VARIABLE] = self.environ
+
+    def test_disabled_by_default(self):
+        self.assertIsNone(store.get_history())
+
+    def test_enabled(self):
+        if store.RunHistory is None:
+            self.skipTest("sqlite3 is not available")
+        os.environ[store.HISTORY_VARIABLE] = '1'
+        history = store.get_history()
+        self.assertIsNotNone(history)
+        self.assertIs(store.get_history(), history)
+        history.close()
+
+if __name__ == '__main__':
+    unittest.main()
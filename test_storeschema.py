@@ -0,0 +1,79 @@
+# -*. coding: utf-8 -*-
+# Copyright (c) 2015 CNRS and University of Strasbourg
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+
+import unittest
+
+from storeschema import (DEFAULTS, SCHEMA_VERSION, VERSION_KEY,
+                         legacy_timecompounds, merge_defaults,
+                         schema_version)
+
+class TestLegacyTimecompounds(unittest.TestCase):
+
+    def test_convert(self):
+        store = dict(DEFAULTS)
+        del store['Timecompounds']
+        store['Nbtimecompound'] = {"value": 2}
+        store['Timecompound1'] = {"value": 1.0, "unit": "min"}
+        store['Timecompound2'] = {"value": 30.0, "unit": "s"}
+        store['MicroEP1'] = {"value": 0.001, "unit": "cm²/V/s"}
+        entry, obsolete = legacy_timecompounds(store)
+        self.assertEqual(entry, {"value": [1.0, 30.0], "unit": ["min", "s"]})
+        self.assertEqual(sorted(obsolete), ['MicroEP1', 'Nbtimecompound',
+                                            'Timecompound1', 'Timecompound2'])
+
+    def test_nothing_to_convert(self):
+        self.assertEqual(legacy_timecompounds(DEFAULTS), (None, []))
+
+class TestMergeDefaults(unittest.TestCase):
+
+    def test_new_store(self):
+        data = {}
+        self.assertTrue(merge_defaults(data))
+        self.assertEqual(schema_version(data), SCHEMA_VERSION)
+        for key in DEFAULTS:
+            self.assertEqual(data[key], DEFAULTS[key])
+        # the defaults are copied
+        data['Timecompounds']["value"].append(2.0)
+        self.assertEqual(DEFAULTS['Timecompounds']["value"], [1.0])
+
+    def test_up_to_date(self):
+        data = {}
+        merge_defaults(data)
+        data['Capillary'] = {"value": 80.0, "unit": "cm"}
+        self.assertFalse(merge_defaults(data))
+        self.assertEqual(data['Capillary'], {"value": 80.0, "unit": "cm"})
+
+    def test_migrate_version_1(self):
+        data = {'Capillary': {"value": 80.0, "unit": "cm"},
+                'Nbtimecompound': {"value": 1},
+                'Timecompound1': {"value": 30.0, "unit": "s"},
+                'MicroEP1': {"value": 0.001, "unit": "cm²/V/s"}}
+        self.assertEqual(schema_version(data), 1)
+        self.assertTrue(merge_defaults(data))
+        self.assertEqual(data['Timecompounds'], {"value": [30.0], "unit": ["s"]})
+        self.assertEqual(data['Capillary'], {"value": 80.0, "unit": "cm"})
+        for key in ('Nbtimecompound', 'Timecompound1', 'MicroEP1'):
+            self.assertNotIn(key, data)
+        self.assertEqual(data[VERSION_KEY], {"value": SCHEMA_VERSION})
+
+    def test_newer_version(self):
+        data = {}
+        merge_defaults(data)
+        data[VERSION_KEY] = {"value": SCHEMA_VERSION + 1}
+        self.assertFalse(merge_defaults(data))
+        self.assertEqual(schema_version(data), SCHEMA_VERSION + 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+# -*. coding: utf-8 -*-
+# Copyright (c) 2015 CNRS and University of Strasbourg
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+
+import unittest
+
+import numpy as np
+
+from capillary import Capillary
+from sweep import grid_axis, sweep
+
+class TestSweep(unittest.TestCase):
+
+    def setUp(self):
+        self.grid = {"pressure": {"values": [0.5, 1.0], "unit": "psi"},
+                     "duration": [5.0, 10.0, 15.0],
+                     "diameter": {"start": 25.0, "stop": 75.0, "num": 3}}
+
+    def test_grid_axis_converts_units(self):
+        values = grid_axis("total_length", {"values": [1.0], "unit": "m"})
+        self.assertAlmostEqual(values[0], 100.0)
+
+    def test_grid_axis_unknown_unit(self):
+        self.assertRaises(ValueError, grid_axis, "viscosity",
+                          {"values": [1.0], "unit": "pa.s"})
+
+    def test_sweep_match_scalar(self):
+        table = sweep(self.grid, chunk_size=4, max_workers=1)
+        self.assertEqual(len(table["pressure"]), 18)
+        for i in range(18):
+            capillary = Capillary(diameter=table["diameter"][i],
+                                  pressure=table["pressure"][i],
+                                  duration=table["duration"][i])
+            self.assertAlmostEqual(table["delivered_volume"][i],
+                                   capillary.delivered_volume())
+
+    def test_sweep_order(self):
+        table = sweep(self.grid, max_workers=1)
+        self.assertEqual(list(table["duration"][:3]), [5.0, 10.0, 15.0])
+        self.assertEqual(list(table["diameter"][:3]), [25.0, 25.0, 25.0])
+
+    def test_sweep_process_pool(self):
+        serial = sweep(self.grid, outputs=["injection_plug_length"],
+                       chunk_size=5, max_workers=1)
+        parallel = sweep(self.grid, outputs=["injection_plug_length"],
+                         chunk_size=5, max_workers=2)
+        np.testing.assert_array_equal(serial["injection_plug_length"],
+                                      parallel["injection_plug_length"])
+
+    def test_unknown_parameter(self):
+        self.assertRaises(ValueError, sweep, {"temperature": [20.0]})
+
+    def test_grid_axis_incomplete_range(self):
+        self.assertRaises(ValueError, grid_axis, "pressure",
+                          {"start": 0.5, "stop": 2.0})
+        self.assertRaises(ValueError, grid_axis, "pressure", {"num": 3})
+
+    def test_empty_grid(self):
+        self.assertRaises(ValueError, sweep, {})
+
+    def test_grid_axis_unit_not_converted(self):
+        self.assertRaises(ValueError, grid_axis, "pressure",
+                          {"values": [1.0], "unit": "atm"})
+        self.assertRaises(ValueError, grid_axis, "concentration",
+                          {"values": [1.0], "unit": "mmol/L"})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+# -*. coding: utf-8 -*-
+# Copyright (c) 2015 CNRS and University of Strasbourg
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+
+import unittest
+
+from capillary import Capillary
+from uncertainty import input_distribution, propagate
+
+class TestUncertainty(unittest.TestCase):
+
+    def setUp(self):
+        self.inputs = {"diameter": {"distribution": "uniform", "value": 50.0,
+                                    "tolerance": 1.0},
+                       "pressure": {"distribution": "normal", "mean": 0.5,
+                                    "std": 0.01, "unit": "psi"},
+                       "viscosity": {"distribution": "triangular", "low": 0.9,
+                                     "mode": 1.0, "high": 1.1},
+                       "time": {"value": 2.0, "unit": "min"}}
+
+    def test_input_distribution(self):
+        self.assertEqual(input_distribution("diameter", 50.0), ('constant', (50.0,)))
+        distribution, (low, high) = input_distribution(
+            "total_length", {"distribution": "uniform", "value": 0.6,
+                             "tolerance": 0.01, "unit": "m"})
+        self.assertEqual(distribution, 'uniform')
+        self.assertAlmostEqual(low, 59.0)
+        self.assertAlmostEqual(high, 61.0)
+
+    def test_invalid_spec(self):
+        self.assertRaises(ValueError, input_distribution, "temperature", 20.0)
+        self.assertRaises(ValueError, input_distribution, "diameter",
+                          {"distribution": "poisson", "lam": 1.0})
+        self.assertRaises(ValueError, propagate, {}, 10, outputs=["micro_ep"])
+        self.assertRaises(ValueError, propagate, {"diameter": 50.0}, 0)
+        self.assertRaises(ValueError, input_distribution, "pressure",
+                          {"value": 1.0, "unit": "atm"})
+        self.assertRaises(ValueError, input_distribution, "concentration",
+                          {"value": 1.0, "unit": "mmol/L"})
+
+    def test_constant_inputs(self):
+        stats = propagate({"diameter": 50.0}, samples=10, seed=0,
+                          outputs=["capillary_volume"])
+        volume = stats["capillary_volume"]
+        self.assertAlmostEqual(volume["mean"], Capillary(diameter=50.0).capillary_volume())
+        self.assertAlmostEqual(volume["std"], 0.0)
+        self.assertEqual((volume["count"], volume["invalid"]), (10, 0))
+
+    def test_statistics(self):
+        stats = propagate(self.inputs, samples=200000, seed=1)
+        volume = stats["delivered_volume"]
+        percentiles = volume["percentiles"]
+        self.assertTrue(percentiles[2.5] < percentiles[50.0] < percentiles[97.5])
+        pressure = 0.5 * 68.9475729
+        expected = Capillary(diameter=50.0, pressure=pressure).delivered_volume()
+        self.assertAlmostEqual(volume["mean"] / expected, 1.0, places=2)
+        self.assertAlmostEqual(stats["micro_ep"]["std"], 0.0)
+
+    def test_chunked_moments(self):
+        whole = propagate(self.inputs, samples=1000, seed=3, chunk_size=1000,
+                          max_workers=1, outputs=["delivered_volume"],
+                          return_samples=True)["delivered_volume"]
+        chunked = propagate(self.inputs, samples=1000, seed=3, chunk_size=1000,
+                            max_workers=1, outputs=["delivered_volume"],
+                            percentiles=())["delivered_volume"]
+        samples = whole["samples"]
+        self.assertAlmostEqual(whole["mean"] / samples.mean(), 1.0, places=12)
+        self.assertAlmostEqual(whole["std"] / samples.std(ddof=1), 1.0, places=10)
+        self.assertEqual(chunked["percentiles"], {})
+        self.assertEqual(chunked["mean"], whole["mean"])
+        several = propagate(self.inputs, samples=1000, seed=3, chunk_size=300,
+                            max_workers=1, outputs=["delivered_volume"],
+                            return_samples=True)["delivered_volume"]
+        samples = several["samples"]
+        self.assertAlmostEqual(several["mean"] / samples.mean(), 1.0, places=12)
+        self.assertAlmostEqual(several["std"] / samples.std(ddof=1), 1.0, places=10)
+
+    def test_reproducible(self):
+        first = propagate(self.inputs, samples=1000, seed=3, chunk_size=300,
+                          max_workers=1, outputs=["injection_plug_length"])
+        second = propagate(self.inputs, samples=1000, seed=3, chunk_size=300,
+                           max_workers=2, outputs=["injection_plug_length"])
+        self.assertEqual(first, second)
+
+    def test_invalid_samples(self):
+        stats = propagate({"total_length": 0.0,
+                           "voltage": {"distribution": "uniform", "low": 1.0,
+                                       "high": 2.0}},
+                          samples=1000, seed=0, outputs=["field_strength"],
+                          return_samples=True)
+        strength = stats["field_strength"]
+        self.assertEqual((strength["count"], strength["invalid"]), (0, 1000))
+        self.assertNotEqual(strength["mean"], strength["mean"])
+        self.assertEqual(len(strength["samples"]), 1000)
+
+if __name__ == '__main__':
+    unittest.main()
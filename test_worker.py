@@ -0,0 +1,76 @@
+# -*. coding: utf-8 -*-
+# Copyright (c) 2015 CNRS and University of Strasbourg
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+
+import threading
+import unittest
+
+from worker import BackgroundWorker
+
+class TestBackgroundWorker(unittest.TestCase):
+
+    def setUp(self):
+        # the callbacks to call on the "user interface" thread
+        self.dispatched = []
+        self.worker = BackgroundWorker(self.dispatched.append)
+
+    def tearDown(self):
+        self.worker.stop()
+
+    def run_dispatched(self):
+        self.worker.stop()
+        while self.dispatched:
+            self.dispatched.pop(0)()
+
+    def test_result(self):
+        results = []
+        self.worker.submit('add', lambda a, b: a + b, (1, 2), on_result=results.append)
+        self.run_dispatched()
+        self.assertEqual(results, [3])
+
+    def test_runs_on_background_thread(self):
+        threads = []
+        self.worker.submit('thread', lambda: threads.append(threading.current_thread()))
+        self.run_dispatched()
+        self.assertIsNot(threads[0], threading.current_thread())
+
+    def test_error(self):
+        errors = []
+        self.worker.submit('error', lambda: 1 / 0, on_error=errors.append)
+        self.run_dispatched()
+        self.assertIsInstance(errors[0], ZeroDivisionError)
+
+    def test_repeated_submit_collapsed(self):
+        started = threading.Event()
+        release = threading.Event()
+        results = []
+        def job():
+            started.set()
+            release.wait()
+            return 'done'
+        self.assertTrue(self.worker.submit('tap', job, on_result=results.append))
+        started.wait()
+        self.assertFalse(self.worker.submit('tap', job, on_result=results.append))
+        self.assertTrue(self.worker.is_pending('tap'))
+        release.set()
+        self.run_dispatched()
+        self.assertEqual(results, ['done'])
+        self.assertFalse(self.worker.is_pending('tap'))
+        # a new tap once the result was delivered runs again
+        self.assertTrue(self.worker.submit('tap', lambda: 'again', on_result=results.append))
+        self.run_dispatched()
+        self.assertEqual(results, ['done', 'again'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,286 @@
+# -*. coding: utf-8 -*-
+# Copyright (c) 2015 CNRS and University of Strasbourg
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+'''
+Uncertainty
+===========
+
+Propagate the uncertainties of the inputs to the outputs of the
+Capillary formulas by Monte Carlo: samples are drawn for every input
+from its distribution, all the outputs are computed by CapillaryBatch
+and the mean, the standard deviation and percentiles of each output are
+returned.
+
+Each entry of the inputs spec is a Capillary input name (see
+capillarybatch.INPUTS), or 'time' for the migration time of a compound
+(giving micro_app and micro_ep), associated to either:
+
+- a value in the unit used by Capillary,
+- a dictionnary {"value": 0.5, "unit": "psi"},
+- a dictionnary {"distribution": "normal", "mean": 50.0, "std": 0.5},
+- a dictionnary {"distribution": "uniform", "low": 49.0, "high": 51.0},
+  or {"distribution": "uniform", "value": 50.0, "tolerance": 1.0},
+- a dictionnary {"distribution": "triangular", "low": 0.9, "mode": 1.0,
+  "high": 1.1}.
+
+A distribution can have a "unit" too. The inputs missing from the spec
+keep the Capillary default value. The viscosity spread due to the
+temperature is given as a distribution of the viscosity.
+
+The samples are drawn by chunks, each chunk with its own random
+generator spawned from the seed (numpy.random.SeedSequence), so a
+seeded propagation gives the same results whatever the number of worker
+processes. As in sweep.py, the chunks are evaluated in a pool of worker
+processes when there are several chunks. The mean and the standard
+deviation are merged from the moments of the chunks; the samples of the
+outputs are kept, in one array by output, only when percentiles are
+asked or the samples are returned, so percentiles=() bounds the memory
+to a few chunks whatever the number of samples.
+
+Usage example
+-------------
+
+    import uncertainty
+
+    stats = uncertainty.propagate(
+        {"diameter": {"distribution": "uniform", "value": 50.0,
+                      "tolerance": 1.0, "unit": u"µm"},
+         "pressure": {"distribution": "normal", "mean": 0.5, "std": 0.01,
+                      "unit": "psi"},
+         "viscosity": {"distribution": "normal", "mean": 1.0, "std": 0.02},
+         "duration": {"distribution": "normal", "mean": 15.0, "std": 0.1}},
+        samples=10**6, seed=42)
+    stats["analyte_injected_ng"]["percentiles"][97.5]
+
+'''
+
+import itertools
+import os
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from capillarybatch import CapillaryBatch, INPUTS, OUTPUTS
+from convertunits import TimeUnits
+from sweep import FIELD_UNITS, unit_factor
+
+# The units of the inputs, with the migration time of a compound
+INPUT_UNITS = dict(FIELD_UNITS)
+INPUT_UNITS['time'] = (TimeUnits, u's')
+
+# The parameters of each distribution
+DISTRIBUTIONS = {
+    'normal': ('mean', 'std'),
+    'uniform': ('low', 'high'),
+    'triangular': ('low', 'mode', 'high'),
+}
+
+# The percentiles returned by default
+PERCENTILES = (2.5, 50.0, 97.5)
+
+# The default number of samples drawn by a worker at once
+CHUNK_SIZE = 1 << 20
+
+def input_distribution(name, spec):
+    '''Return the distribution of an input in the unit used by Capillary
+    @param name: the Capillary input name, or 'time'
+    @type name: str
+    @param spec: the input specification (see the module documentation)
+    @type spec: float or dict
+    @return: the name of the distribution ('constant' for a value) and
+    its parameters
+    @rtype: (str, (float, ...))
+    '''
+    if name not in INPUT_UNITS:
+        raise ValueError("Unknown input %s" % name)
+    if not isinstance(spec, dict):
+        return 'constant', (float(spec),)
+    spec = dict(spec)
+    distribution = spec.pop("distribution", 'constant')
+    unit = spec.pop("unit", None)
+    if distribution == 'constant':
+        parameters = (float(spec["value"]),)
+    elif distribution == 'uniform' and "tolerance" in spec:
+        parameters = (spec["value"] - spec["tolerance"],
+                      spec["value"] + spec["tolerance"])
+    elif distribution in DISTRIBUTIONS:
+        parameters = tuple(float(spec[key]) for key in DISTRIBUTIONS[distribution])
+    else:
+        raise ValueError("Unknown distribution %s" % distribution)
+    factor = unit_factor(name, unit, INPUT_UNITS)
+    if factor != 1.0:
+        parameters = tuple(parameter * factor for parameter in parameters)
+    return distribution, parameters
+
+def _draw(rng, distribution, parameters, size):
+    '''Draw size samples of a distribution
+    '''
+    if distribution == 'constant':
+        return np.full(size, parameters[0])
+    return getattr(rng, distribution)(*parameters, size=size)
+
+def _sample_chunk(distributions, size, seed, outputs):
+    '''Draw size samples of the inputs and compute the outputs (worker
+    side)
+    '''
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for name in sorted(distributions):
+        distribution, parameters = distributions[name]
+        columns[name] = _draw(rng, distribution, parameters, size)
+    time = columns.pop('time', None)
+    results = CapillaryBatch(**columns).compute_all(time)
+    return dict((name, results[name]) for name in outputs)
+
+def _moments(samples):
+    '''Return the number of finite samples, the number of the others,
+    their mean and the sum of the squared deviations to the mean
+    '''
+    finite = samples[np.isfinite(samples)]
+    if not finite.size:
+        return 0, int(samples.size), 0.0, 0.0
+    mean = float(finite.mean())
+    return (int(finite.size), int(samples.size - finite.size), mean,
+            float(np.square(finite - mean).sum()))
+
+def _merge_moments(moments):
+    '''Merge the moments of the chunks (Chan et al. pairwise update)
+    '''
+    count = invalid = 0
+    mean = squares = 0.0
+    for chunk_count, chunk_invalid, chunk_mean, chunk_squares in moments:
+        invalid += chunk_invalid
+        if not chunk_count:
+            continue
+        total = count + chunk_count
+        delta = chunk_mean - mean
+        mean += delta * chunk_count / total
+        squares += chunk_squares + delta * delta * count * chunk_count / total
+        count = total
+    return count, invalid, mean, squares
+
+def _statistics(moments, samples, percentiles):
+    '''Return the statistics of an output from the moments of its chunks
+    and its samples (only needed for the percentiles)
+    '''
+    count, invalid, mean, squares = _merge_moments(moments)
+    stats = OrderedDict()
+    stats["count"] = count
+    stats["invalid"] = invalid
+    if count:
+        stats["mean"] = mean
+        stats["std"] = (squares / (count - 1)) ** 0.5 if count > 1 else 0.0
+    else:
+        stats["mean"] = stats["std"] = float('nan')
+    if count and len(percentiles):
+        values = np.percentile(samples[np.isfinite(samples)], percentiles)
+    else:
+        values = [float('nan')] * len(percentiles)
+    stats["percentiles"] = OrderedDict((percentile, float(value))
+                                       for percentile, value in zip(percentiles, values))
+    return stats
+
+def _chunks(distributions, sizes, seeds, outputs, max_workers):
+    '''Yield the index and the outputs of each chunk, as soon as they
+    are computed. At most two chunks by worker are waiting at once.
+    '''
+    if max_workers <= 1:
+        for index, (size, seed) in enumerate(zip(sizes, seeds)):
+            yield index, _sample_chunk(distributions, size, seed, outputs)
+        return
+    jobs = iter(enumerate(zip(sizes, seeds)))
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        running = {}
+        for index, (size, seed) in itertools.islice(jobs, 2 * max_workers):
+            running[executor.submit(_sample_chunk, distributions, size, seed,
+                                    outputs)] = index
+        while running:
+            done, pending = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = running.pop(future)
+                for next_index, (size, seed) in itertools.islice(jobs, 1):
+                    running[executor.submit(_sample_chunk, distributions,
+                                            size, seed, outputs)] = next_index
+                yield index, future.result()
+
+def propagate(inputs, samples=100000, outputs=None, percentiles=PERCENTILES,
+              seed=None, chunk_size=CHUNK_SIZE, max_workers=None,
+              return_samples=False):
+    '''Propagate the uncertainties of the inputs to the outputs
+    @param inputs: the distribution of each input (see the module
+    documentation)
+    @type inputs: {str: float or dict}
+    @param samples: the number of samples
+    @type samples: int
+    @param outputs: the outputs (see capillarybatch.OUTPUTS, and
+    micro_app and micro_ep if the time is given), all by default
+    @type outputs: [str]
+    @param percentiles: the percentiles to compute, between 0 and 100,
+    () keeps no sample in memory
+    @type percentiles: [float]
+    @param seed: the seed, the results are reproducible when it is
+    given
+    @type seed: int
+    @param chunk_size: the number of samples drawn at once by a worker
+    @type chunk_size: int
+    @param max_workers: the number of worker processes, all the CPUs
+    by default, 1 draws the samples in the current process
+    @type max_workers: int
+    @param return_samples: return the samples of the outputs too
+    @type return_samples: bool
+    @return: by output the number of finite samples (count), the number
+    of infinite or nan samples (invalid), the mean, the standard
+    deviation (std) and the percentiles as {percentile: value}, and the
+    samples if asked
+    @rtype: OrderedDict {str: OrderedDict}
+    @raise ValueError: invalid input, output or number of samples
+    '''
+    if samples < 1:
+        raise ValueError("At least one sample is needed")
+    distributions = dict((name, input_distribution(name, spec))
+                         for name, spec in inputs.items())
+    available = OUTPUTS + (('micro_app', 'micro_ep') if 'time' in inputs else ())
+    if outputs is None:
+        outputs = available
+    for name in outputs:
+        if name not in available:
+            raise ValueError("Unknown output %s" % name)
+    sizes = [min(chunk_size, samples - start)
+             for start in range(0, samples, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = min(max_workers, len(sizes))
+
+    # the chunks are copied into the samples as they are computed, the
+    # samples are kept only for the percentiles
+    starts = np.cumsum([0] + sizes[:-1])
+    keep = bool(len(percentiles)) or return_samples
+    values = dict((name, np.empty(samples) if keep else None) for name in outputs)
+    moments = dict((name, [None] * len(sizes)) for name in outputs)
+    for index, chunk in _chunks(distributions, sizes, seeds, outputs, max_workers):
+        start = starts[index]
+        for name in outputs:
+            column = chunk.pop(name)
+            moments[name][index] = _moments(column)
+            if keep:
+                values[name][start:start + len(column)] = column
+
+    stats = OrderedDict()
+    for name in outputs:
+        stats[name] = _statistics(moments[name], values[name], percentiles)
+        if return_samples:
+            stats[name]["samples"] = values[name]
+    return stats
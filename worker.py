@@ -0,0 +1,116 @@
+# -*. coding: utf-8 -*-
+# Copyright (c) 2015 CNRS and University of Strasbourg
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+'''
+worker.py
+=========
+
+The BackgroundWorker runs the calculations (and the writes of the
+store) on a background thread so the user interface does not freeze.
+The result is handed back by a dispatch function, in the application
+it schedules the callback on the Kivy main thread:
+
+    worker = BackgroundWorker(lambda func: Clock.schedule_once(lambda dt: func()))
+    worker.submit('injection', compute, (entries,), on_result=show)
+
+A job has a key (for instance the name of the screen). While a job is
+pending, until its callback was called, the jobs submitted with the
+same key are dropped, so repeated taps on a button run one calculation.
+The jobs run one at a time, in the order they were submitted.
+
+'''
+import threading
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+def call_now(func):
+    '''Dispatch function calling the callback on the worker thread
+    '''
+    func()
+
+class BackgroundWorker(object):
+    '''A background thread running jobs one at a time
+    '''
+    def __init__(self, dispatch=call_now):
+        '''
+        @param dispatch: called with a function without argument which
+        must be called on the thread of the user interface
+        @type dispatch: callable
+        '''
+        self.dispatch = dispatch
+        self._queue = queue.Queue()
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def is_pending(self, key):
+        '''Return True if a job of key was submitted and its callback
+        was not called yet
+        '''
+        with self._lock:
+            return key in self._pending
+
+    def submit(self, key, func, args=(), on_result=None, on_error=None):
+        '''Run func(*args) on the background thread, then dispatch
+        on_result(result), or on_error(exception) if it raised
+        @param key: the jobs of the same key are collapsed
+        @type key: str
+        @return: False if the job was dropped because a job of key is
+        pending
+        @rtype: bool
+        '''
+        with self._lock:
+            if key in self._pending:
+                return False
+            self._pending.add(key)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run,
+                                                name='BackgroundWorker')
+                self._thread.daemon = True
+                self._thread.start()
+        self._queue.put((key, func, args, on_result, on_error))
+        return True
+
+    def stop(self):
+        '''Stop the thread once the submitted jobs are done
+        '''
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            key, func, args, on_result, on_error = job
+            try:
+                result = func(*args)
+            except Exception as error:
+                self._deliver(key, on_error, error)
+            else:
+                self._deliver(key, on_result, result)
+
+    def _deliver(self, key, callback, value):
+        def deliver():
+            with self._lock:
+                self._pending.discard(key)
+            if callback is not None:
+                callback(value)
+        self.dispatch(deliver)